@@ -0,0 +1,70 @@
+"""
+Row hashing for deduplication keys
+
+Each column is hashed to uint64 by pandas (vectorized in C), then the
+per-column hashes are folded row-wise with a splitmix64 finalizer. The numpy
+and numba paths produce identical values, so a row hashes the same however
+large its batch is; numba only takes over on large frames where its parallel
+loop beats numpy's per-column temporaries.
+"""
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+# Below this many rows the JIT dispatch and thread start-up are not worth it
+NUMBA_MIN_ROWS = 100_000
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_S27 = np.uint64(27)
+_S30 = np.uint64(30)
+_S31 = np.uint64(31)
+
+
+def _combine_numpy(column_hashes: np.ndarray) -> np.ndarray:
+    """Fold a (n_columns, n_rows) uint64 array into one hash per row"""
+    out = np.full(column_hashes.shape[1], _GOLDEN, dtype=np.uint64)
+    for values in column_hashes:
+        x = (out ^ values) + _GOLDEN
+        x = (x ^ (x >> _S30)) * _MIX1
+        x = (x ^ (x >> _S27)) * _MIX2
+        out = x ^ (x >> _S31)
+    return out
+
+
+_combine_numba = None
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _combine_numba(column_hashes):
+        """Same fold as _combine_numpy, one row per parallel iteration"""
+        n_columns, n_rows = column_hashes.shape
+        out = np.empty(n_rows, dtype=np.uint64)
+        for i in prange(n_rows):
+            h = _GOLDEN
+            for j in range(n_columns):
+                x = (h ^ column_hashes[j, i]) + _GOLDEN
+                x = (x ^ (x >> _S30)) * _MIX1
+                x = (x ^ (x >> _S27)) * _MIX2
+                h = x ^ (x >> _S31)
+            out[i] = h
+        return out
+
+
+def row_hash_u64(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """Return one uint64 hash per row of df[columns]"""
+    column_hashes = np.empty((len(columns), len(df)), dtype=np.uint64)
+    for j, column in enumerate(columns):
+        column_hashes[j] = pd.util.hash_pandas_object(df[column], index=False).to_numpy()
+
+    if _combine_numba is not None and len(df) >= NUMBA_MIN_ROWS:
+        return _combine_numba(column_hashes)
+    return _combine_numpy(column_hashes)
@@ -6,6 +6,10 @@ Saves results to database via SmartDatabaseManager
 """
 import sys
 import os
+import hashlib
+import sqlite3
+from collections import OrderedDict
+from contextlib import nullcontext
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional, Union
@@ -25,6 +29,83 @@ logging.basicConfig(
 logger = logging.getLogger('FinBERT')
 
 
+class SentenceScoreCache:
+    """
+    Two-level cache of FinBERT probabilities keyed by model variant and text
+    
+    Keys are 8-byte BLAKE2b digests of the namespace (model name, backend and
+    precision, as scores differ slightly between them) and the stripped text,
+    lowercased only for uncased tokenizers where case never changes the
+    scores. Values are the three float32 probabilities the model produced.
+    Recent entries live in an in-memory LRU; everything is persisted to a
+    SQLite file so re-crawled or syndicated sentences are never scored twice.
+    """
+    
+    def __init__(self, path: str = "data/cache/finbert_scores.sqlite", max_memory: int = 200_000,
+                 namespace: str = "", lowercase: bool = False):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_memory = max_memory
+        self.namespace = namespace
+        self.lowercase = lowercase
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS scores (key BLOB PRIMARY KEY, probs BLOB NOT NULL)")
+        self._conn.commit()
+    
+    def key(self, text: str) -> bytes:
+        text = text.strip()
+        if self.lowercase:
+            text = text.lower()
+        return hashlib.blake2b(f"{self.namespace}\0{text}".encode('utf-8'), digest_size=8).digest()
+    
+    def _remember(self, key: bytes, probs: np.ndarray):
+        self._memory[key] = probs
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+    
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Cached probabilities for each text, None where not cached"""
+        keys = [self.key(text) for text in texts]
+        found = {}
+        missing = []
+        for key in keys:
+            probs = self._memory.get(key)
+            if probs is not None:
+                self._memory.move_to_end(key)
+                found[key] = probs
+            else:
+                missing.append(key)
+        
+        # SQLite caps bound parameters, so look the rest up in slices
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT key, probs FROM scores WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                probs = np.frombuffer(blob, dtype=np.float32)
+                self._remember(key, probs)
+                found[key] = probs
+        
+        return [found.get(key) for key in keys]
+    
+    def put_many(self, texts: List[str], predictions: np.ndarray):
+        """Store one row of probabilities per text, in a single transaction"""
+        rows = []
+        for text, row in zip(texts, predictions):
+            key = self.key(text)
+            probs = np.asarray(row, dtype=np.float32)
+            self._remember(key, probs)
+            rows.append((key, probs.tobytes()))
+        self._conn.executemany("INSERT OR REPLACE INTO scores (key, probs) VALUES (?, ?)", rows)
+        self._conn.commit()
+    
+    def close(self):
+        self._conn.close()
+
+
 class FinBERTEngine:
     """
     Financial Sentiment Analysis using FinBERT
@@ -48,9 +129,13 @@ class FinBERTEngine:
         """
         self.use_smart_db = use_smart_db
         self.device = device
+        self.model_name = "ProsusAI/finbert"
         self.model = None
         self.tokenizer = None
         self.smart_db = None
+        self.autocast_dtype = None
+        self.backend = 'torch'
+        self.score_cache: Optional[SentenceScoreCache] = None
         
         if self.use_smart_db:
             self.smart_db = SmartDatabaseManager()
@@ -66,10 +151,8 @@ class FinBERTEngine:
             
             logger.info("Loading FinBERT model...")
             
-            model_name = "ProsusAI/finbert"
-            
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=True)
+            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
             
             # Move model to device
             if self.device == 'cuda' and torch.cuda.is_available():
@@ -89,6 +172,168 @@ class FinBERTEngine:
             logger.error(f"Failed to load FinBERT model: {e}")
             raise
     
+    def enable_half_precision(self) -> bool:
+        """
+        Run the model in FP16 (BF16 on Ampere+) on the CUDA path
+        
+        Casts the weights and wraps forward passes in torch.autocast so
+        matmuls use tensor cores. No-op on CPU.
+        
+        Returns:
+            True if half precision is now in use
+        """
+        import torch
+        
+        if self.device != 'cuda' or not torch.cuda.is_available():
+            return False
+        
+        dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        torch.set_float32_matmul_precision('high')
+        self.model = self.model.to(dtype).eval()
+        self.autocast_dtype = dtype
+        if self.score_cache is not None:
+            self.score_cache.namespace = self._score_variant()
+        
+        logger.info(f"FinBERT running in {dtype} on GPU")
+        return True
+    
+    def enable_compile(self, mode: str = "reduce-overhead") -> bool:
+        """
+        Compile the PyTorch model with torch.compile (PyTorch 2.x)
+        
+        A warm-up pass triggers compilation here, so a missing compiler
+        toolchain falls back to eager mode instead of failing mid-run.
+        No-op for the ONNX Runtime model.
+        
+        Args:
+            mode: torch.compile mode ('reduce-overhead' uses CUDA graphs on GPU)
+        
+        Returns:
+            True if the compiled model is now in use
+        """
+        import torch
+        
+        if not hasattr(torch, 'compile') or not isinstance(self.model, torch.nn.Module):
+            return False
+        
+        eager_model = self.model
+        try:
+            self.model = torch.compile(eager_model, mode=mode, fullgraph=False, dynamic=True)
+            self._predict(["warm-up"])
+        except Exception as e:
+            logger.warning(f"torch.compile failed, keeping eager model: {e}")
+            self.model = eager_model
+            return False
+        
+        logger.info(f"FinBERT compiled with torch.compile (mode={mode})")
+        return True
+    
+    def enable_onnx_runtime(self, export_dir: str = "data/models/finbert_onnx") -> bool:
+        """
+        Swap the PyTorch model for an optimized INT8 ONNX Runtime model (CPU)
+        
+        The first call exports FinBERT to ONNX, applies graph optimizations
+        and dynamic INT8 quantization (AVX512-VNNI kernels), and caches the
+        result under ``export_dir``; later calls just load it. Requires
+        ``optimum[onnxruntime]``; otherwise the PyTorch model is kept.
+        
+        Args:
+            export_dir: Directory for the exported/quantized ONNX model
+            
+        Returns:
+            True if the ONNX Runtime model is now in use
+        """
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import (ORTModelForSequenceClassification,
+                                             ORTOptimizer, ORTQuantizer)
+            from optimum.onnxruntime.configuration import (AutoQuantizationConfig,
+                                                           OptimizationConfig)
+        except ImportError as e:
+            logger.warning(f"ONNX Runtime not available, keeping PyTorch model: {e}")
+            logger.warning("Install with: pip install optimum[onnxruntime]")
+            return False
+        
+        export_path = Path(export_dir)
+        optimized_path = export_path / "optimized"
+        quantized_path = export_path / "quantized"
+        quantized_file = "model_optimized_quantized.onnx"
+        
+        try:
+            if not (quantized_path / quantized_file).exists():
+                logger.info("Exporting FinBERT to ONNX (one-time)...")
+                ort_model = ORTModelForSequenceClassification.from_pretrained(
+                    self.model_name, export=True
+                )
+                
+                optimizer = ORTOptimizer.from_pretrained(ort_model)
+                optimizer.optimize(
+                    save_dir=optimized_path,
+                    optimization_config=OptimizationConfig(optimization_level=99)
+                )
+                
+                quantizer = ORTQuantizer.from_pretrained(
+                    optimized_path, file_name="model_optimized.onnx"
+                )
+                quantizer.quantize(
+                    save_dir=quantized_path,
+                    quantization_config=AutoQuantizationConfig.avx512_vnni(
+                        is_static=False, per_channel=False
+                    )
+                )
+            
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = os.cpu_count() or 1
+            
+            self.model = ORTModelForSequenceClassification.from_pretrained(
+                quantized_path,
+                file_name=quantized_file,
+                session_options=session_options
+            )
+        except Exception as e:
+            logger.warning(f"ONNX Runtime export failed, keeping PyTorch model: {e}")
+            return False
+        
+        self.backend = 'onnx-int8'
+        if self.score_cache is not None:
+            self.score_cache.namespace = self._score_variant()
+        
+        logger.info("FinBERT running on ONNX Runtime (INT8)")
+        return True
+    
+    def _score_variant(self) -> str:
+        """Model name, backend and precision: what a cached score depends on"""
+        precision = str(self.autocast_dtype).replace('torch.', '') if self.autocast_dtype else 'float32'
+        return f"{self.model_name}|{self.backend}|{precision}"
+    
+    def enable_score_cache(self, path: str = "data/cache/finbert_scores.sqlite",
+                           max_memory: int = 200_000) -> bool:
+        """
+        Memoize analyze_batch scores per text (in-memory LRU + SQLite on disk)
+        
+        Texts already scored, in this run or an earlier one, skip the model.
+        Entries are keyed by model name, backend and precision (see
+        _score_variant), so FP32, FP16/BF16 and INT8 runs can share one file.
+        
+        Args:
+            path: SQLite file holding the persisted scores
+            max_memory: Number of entries kept in the in-memory LRU
+            
+        Returns:
+            True if the cache is now in use
+        """
+        try:
+            self.score_cache = SentenceScoreCache(
+                path, max_memory=max_memory, namespace=self._score_variant(),
+                lowercase=bool(getattr(self.tokenizer, 'do_lower_case', False))
+            )
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"FinBERT score cache unavailable: {e}")
+            return False
+        
+        logger.info(f"FinBERT score cache enabled at {path}")
+        return True
+    
     def analyze_sentiment(self, text: str) -> Dict[str, Union[str, float, Dict[str, float]]]:
         """
         Analyze sentiment of a single text
@@ -116,28 +361,7 @@ class FinBERTEngine:
             }
         
         try:
-            import torch
-            
-            # Tokenize input
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-                padding=True
-            )
-            
-            # Move to device
-            if self.device == 'cuda':
-                inputs = {k: v.cuda() for k, v in inputs.items()}
-            
-            # Get predictions
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            
-            # Convert to numpy
-            predictions = predictions.cpu().numpy()[0]
+            predictions = self._predict([text])[0]
             
             # Labels: positive (0), negative (1), neutral (2) - from model config
             labels = ['positive', 'negative', 'neutral']
@@ -162,10 +386,66 @@ class FinBERTEngine:
                 'error': str(e)
             }
     
+    def tokenize_all(self, texts: List[str]):
+        """
+        Tokenize every text in one fast-tokenizer call
+        
+        Sequences are truncated but left unpadded so each model batch can
+        later be padded only to its own longest member.
+        
+        Returns:
+            BatchEncoding with per-text ``input_ids``/``attention_mask`` lists
+        """
+        return self.tokenizer(texts, truncation=True, max_length=512)
+    
+    def _forward(self, inputs) -> np.ndarray:
+        """
+        Run one forward pass over already-tokenized, padded tensors
+        
+        Returns:
+            Array of shape (batch, 3) with positive/negative/neutral probabilities
+        """
+        import torch
+        
+        if self.device == 'cuda':
+            inputs = {k: v.cuda() for k, v in inputs.items()}
+        
+        autocast = (torch.autocast('cuda', dtype=self.autocast_dtype)
+                    if self.autocast_dtype is not None else nullcontext())
+        
+        with torch.inference_mode(), autocast:
+            outputs = self.model(**inputs)
+            predictions = torch.nn.functional.softmax(outputs.logits.float(), dim=-1)
+        
+        return predictions.cpu().numpy()
+    
+    def _predict(self, texts: List[str]) -> np.ndarray:
+        """
+        Run one forward pass over a batch of texts
+        
+        Texts are padded to the longest one in the batch.
+        
+        Returns:
+            Array of shape (len(texts), 3) with positive/negative/neutral probabilities
+        """
+        inputs = self.tokenizer(
+            texts,
+            return_tensors="pt",
+            truncation=True,
+            max_length=512,
+            padding=True
+        )
+        return self._forward(inputs)
+    
     def analyze_batch(self, texts: List[str], batch_size: int = 16) -> List[Dict]:
         """
         Analyze sentiment of multiple texts in batches
         
+        All texts are tokenized in a single call; each batch is then a
+        single model forward pass. Texts are batched in order of token
+        length so each batch pads to a similar size; results are returned
+        in input order.
+        
         Args:
             texts: List of texts to analyze
             batch_size: Number of texts to process at once
@@ -173,17 +453,78 @@ class FinBERTEngine:
         Returns:
             List of sentiment analysis results
         """
-        results = []
-        
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
+        labels = ['positive', 'negative', 'neutral']
+        results = [None] * len(texts)
+        
+        # Empty/non-string texts get the neutral default without a model call
+        valid = []
+        for i, text in enumerate(texts):
+            if text and isinstance(text, str):
+                valid.append(i)
+            else:
+                results[i] = self.analyze_sentiment(text)
+        
+        # Texts scored before come straight from the score cache
+        if self.score_cache is not None and valid:
+            cached = self.score_cache.get_many([texts[i] for i in valid])
+            misses = []
+            for i, probs in zip(valid, cached):
+                if probs is None:
+                    misses.append(i)
+                else:
+                    scores = {label: float(score) for label, score in zip(labels, probs)}
+                    sentiment = max(scores, key=scores.get)
+                    results[i] = {
+                        'sentiment': sentiment,
+                        'confidence': scores[sentiment],
+                        'scores': scores
+                    }
+            valid = misses
+        
+        if not valid:
+            return results
+        
+        # Tokenize everything once, then visit texts in token-length order so
+        # each batch pads to a similar size (attention is quadratic in length)
+        encodings = self.tokenize_all([texts[i] for i in valid])
+        order = sorted(range(len(valid)), key=lambda k: len(encodings['input_ids'][k]))
+        
+        for start in range(0, len(order), batch_size):
+            batch_pos = order[start:start + batch_size]
+            batch_idx = [valid[k] for k in batch_pos]
+            
+            try:
+                inputs = self.tokenizer.pad(
+                    {key: [encodings[key][k] for k in batch_pos] for key in encodings.keys()},
+                    return_tensors="pt"
+                )
+                predictions = self._forward(inputs)
+            except Exception as e:
+                logger.error(f"Error analyzing batch: {e}")
+                for i in batch_idx:
+                    results[i] = {
+                        'sentiment': 'neutral',
+                        'confidence': 0.0,
+                        'scores': {'positive': 0.0, 'negative': 0.0, 'neutral': 1.0},
+                        'error': str(e)
+                    }
+                continue
+            
+            if self.score_cache is not None:
+                self.score_cache.put_many([texts[i] for i in batch_idx], predictions)
             
-            for text in batch:
-                result = self.analyze_sentiment(text)
-                results.append(result)
+            for i, row in zip(batch_idx, predictions):
+                scores = {label: float(score) for label, score in zip(labels, row)}
+                sentiment = max(scores, key=scores.get)
+                results[i] = {
+                    'sentiment': sentiment,
+                    'confidence': scores[sentiment],
+                    'scores': scores
+                }
             
-            if (i + batch_size) % 100 == 0:
-                logger.info(f"Processed {i + batch_size}/{len(texts)} texts")
+            done = start + len(batch_idx)
+            if done % 100 < batch_size:
+                logger.info(f"Processed {done}/{len(valid)} texts")
         
         return results
     
@@ -246,57 +587,91 @@ class FinBERTEngine:
         if not text or not symbols:
             return {}
         
-        import re
+        results = self.analyze_per_symbol_batch([(text, symbol) for symbol in symbols])
+        
+        return {
+            symbol: result
+            for symbol, result in zip(symbols, results)
+            if result is not None
+        }
+    
+    def analyze_per_symbol_batch(self, pairs: List[tuple], batch_size: int = 16) -> List[Optional[Dict]]:
+        """
+        Per-symbol sentiment for many (text, symbol) pairs at once
         
-        # Split into sentences
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
+        Same selection rules as analyze_per_symbol, but the candidate
+        sentences of every pair are deduplicated and sent through the model
+        together in batches of ``batch_size``.
+        
+        Args:
+            pairs: List of (text, symbol) tuples
+            batch_size: Number of sentences per forward pass
+            
+        Returns:
+            List aligned with ``pairs``; each item is the result for that
+            symbol or None when no sentence produced a usable score
+        """
+        import re
         
-        symbol_sentiments = {}
+        sentence_cache = {}
+        candidates = []
+        unique_texts = {}
         
-        for symbol in symbols:
+        for text, symbol in pairs:
+            if not text:
+                candidates.append(([], False))
+                continue
+            
+            # Split into sentences (once per distinct text)
+            sentences = sentence_cache.get(text)
+            if sentences is None:
+                sentences = [s.strip() for s in re.split(r'[.!?]+', text) if len(s.strip()) > 10]
+                sentence_cache[text] = sentences
+            
             # Find sentences mentioning this symbol
             # Check for symbol itself and common variations
             symbol_patterns = [
-                symbol,  # Exact match
-                symbol.replace('USDT', ''),  # Crypto without USDT
-                f"${symbol}",  # With dollar sign
+                symbol.upper(),  # Exact match
+                symbol.replace('USDT', '').upper(),  # Crypto without USDT
+                f"${symbol}".upper(),  # With dollar sign
+            ]
+            relevant_sentences = [
+                sentence for sentence in sentences
+                if any(pattern in sentence.upper() for pattern in symbol_patterns)
             ]
             
-            relevant_sentences = []
-            for sentence in sentences:
-                sentence_upper = sentence.upper()
-                if any(pattern.upper() in sentence_upper for pattern in symbol_patterns):
-                    relevant_sentences.append(sentence)
-            
-            if not relevant_sentences:
+            if relevant_sentences:
+                candidates.append((relevant_sentences, True))
+            else:
                 # Symbol mentioned but no clear sentence - use full text
-                result = self.analyze_sentiment(text)
-                symbol_sentiments[symbol] = result
+                candidates.append(([text], False))
+            
+            for candidate in candidates[-1][0]:
+                unique_texts.setdefault(candidate, len(unique_texts))
+        
+        analyzed = self.analyze_batch(list(unique_texts), batch_size=batch_size)
+        
+        results = []
+        for texts, matched in candidates:
+            if not texts:
+                results.append(None)
+                continue
+            
+            if not matched:
+                results.append(dict(analyzed[unique_texts[texts[0]]]))
                 continue
             
-            # Analyze all relevant sentences
+            # Track the sentence with highest confidence
             best_result = None
             max_confidence = 0
-            
-            for sentence in relevant_sentences:
-                try:
-                    result = self.analyze_sentiment(sentence)
-                    
-                    # Track the sentence with highest confidence
-                    if result['confidence'] > max_confidence:
-                        max_confidence = result['confidence']
-                        best_result = result
-                        best_result['matched_sentence'] = sentence
-                
-                except Exception as e:
-                    logger.warning(f"Error analyzing sentence for {symbol}: {e}")
-                    continue
-            
-            if best_result:
-                symbol_sentiments[symbol] = best_result
+            for sentence in texts:
+                result = analyzed[unique_texts[sentence]]
+                if result['confidence'] > max_confidence:
+                    max_confidence = result['confidence']
+                    best_result = dict(result, matched_sentence=sentence)
+            results.append(best_result)
         
-        return symbol_sentiments
+        return results
     
     def analyze_and_save(self, source: Optional[str] = None,
                         start_date: Optional[str] = None,
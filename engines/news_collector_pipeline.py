@@ -242,13 +242,15 @@ class NewsCollectorPipeline:
         if df.empty:
             return df
         
-        # Generate content_hash (same as NewsEngine logic)
-        df['content_hash'] = df.apply(
-            lambda row: hashlib.md5(
-                (row['title'] + row['source'] + str(row['timestamp'])).encode()
-            ).hexdigest(),
-            axis=1
-        )
+        # Generate content_hash (same as NewsEngine logic). The hash input is
+        # concatenated column-wise; tz-aware astype(str) matches str(Timestamp)
+        timestamps = df['timestamp']
+        if isinstance(timestamps.dtype, pd.DatetimeTZDtype):
+            timestamp_text = timestamps.astype(str)
+        else:
+            timestamp_text = timestamps.map(str)
+        hash_input = df['title'].str.cat([df['source'], timestamp_text])
+        df['content_hash'] = [hashlib.md5(text.encode()).hexdigest() for text in hash_input]
         
         # Check existing hashes in database
         existing_query = """
@@ -3,11 +3,15 @@ RSS Engine for retrieving RSS feed data
 Supports proxy rotation and multiple RSS sources
 """
 import json
-import time
-from typing import Optional, Dict, Any, List
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import urlparse
 import random
+import xml.etree.ElementTree as ET
 
 try:
     from .database import DatabaseEngine
@@ -18,8 +22,10 @@ except ImportError:
 
 try:
     import feedparser
+    from feedparser.datetimes import _parse_date as parse_feed_date
 except ImportError:
     feedparser = None
+    parse_feed_date = None
 
 try:
     import requests
@@ -28,6 +34,28 @@ try:
 except ImportError:
     requests = None
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Arrow schema for parsed entries; source/category repeat heavily so they are
+# dictionary-encoded
+ENTRY_SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('s', tz='UTC')),
+    ('source', pa.dictionary(pa.int16(), pa.string())),
+    ('category', pa.dictionary(pa.int16(), pa.string())),
+    ('title', pa.string()),
+    ('link', pa.string()),
+    ('description', pa.string()),
+    ('author', pa.string()),
+    ('tags', pa.string()),
+]) if pa is not None else None
+
 
 class RSSEngine:
     """
@@ -67,7 +95,7 @@ class RSSEngine:
                         'category': category
                     }
                     self.sources.append(source)
-            print(f"Loaded {len(self.sources)} feeds from '{config_path}' (nested format)")
+            logger.info(f"Loaded {len(self.sources)} feeds from '{config_path}' (nested format)")
         else:
             self.sources = []
         
@@ -76,6 +104,7 @@ class RSSEngine:
         
         self.session = self._create_session()
         self.proxy_index = 0
+        self._proxy_lock = threading.Lock()
         
         # Initialize database if enabled
         self.db = None
@@ -84,16 +113,16 @@ class RSSEngine:
             if use_smart_db and SmartDatabaseManager is not None:
                 try:
                     self.db = SmartDatabaseManager(db_config_path)
-                    print("Smart Database integration enabled for RSS")
+                    logger.info("Smart Database integration enabled for RSS")
                 except Exception as e:
-                    print(f"Failed to initialize Smart Database: {e}")
+                    logger.warning(f"Failed to initialize Smart Database: {e}")
                     self.db = None
             elif DatabaseEngine is not None:
                 try:
                     self.db = DatabaseEngine(db_config_path)
-                    print("Database integration enabled for RSS")
+                    logger.info("Database integration enabled for RSS")
                 except Exception as e:
-                    print(f"Failed to initialize database: {e}")
+                    logger.warning(f"Failed to initialize database: {e}")
                     self.db = None
         
     def _load_config(self, config_path: str) -> Dict[str, Any]:
@@ -102,7 +131,7 @@ class RSSEngine:
             with open(config_path, 'r') as f:
                 return json.load(f)
         except FileNotFoundError:
-            print(f"Config file {config_path} not found, using defaults")
+            logger.warning(f"Config file {config_path} not found, using defaults")
             return self._default_config()
     
     def _default_config(self) -> Dict[str, Any]:
@@ -118,7 +147,11 @@ class RSSEngine:
                 "timeout": 30,
                 "max_retries": 3,
                 "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "update_interval_minutes": 15
+                "update_interval_minutes": 15,
+                "batch_timeout": 60,
+                "max_workers": 8,
+                "per_host_concurrency": 2,
+                "stream_feeds": False
             }
         }
     
@@ -160,8 +193,9 @@ class RSSEngine:
         rotation = self.proxy_config.get("rotation", "round-robin")
         
         if rotation == "round-robin":
-            proxy = proxy_list[self.proxy_index % len(proxy_list)]
-            self.proxy_index += 1
+            with self._proxy_lock:
+                proxy = proxy_list[self.proxy_index % len(proxy_list)]
+                self.proxy_index += 1
         elif rotation == "random":
             proxy = random.choice(proxy_list)
         else:
@@ -191,7 +225,11 @@ class RSSEngine:
                 use_proxy = self.proxy_config.get("enabled", False)
             
             # Fetch with or without proxy
-            if use_proxy and self.session:
+            if self.settings.get("stream_feeds", False) and self.session:
+                proxy = self._get_proxy() if use_proxy else None
+                with self.session.get(url, timeout=timeout, proxies=proxy, stream=True) as response:
+                    feed = self._parse_feed_stream(response)
+            elif use_proxy and self.session:
                 proxy = self._get_proxy()
                 response = self.session.get(url, timeout=timeout, proxies=proxy)
                 feed = feedparser.parse(response.content)
@@ -201,9 +239,91 @@ class RSSEngine:
             return feed
             
         except Exception as e:
-            print(f"Error fetching feed from {url}: {e}")
+            logger.warning(f"Error fetching feed from {url}: {e}")
             return None
     
+    def _parse_feed_stream(self, response, chunk_size: int = 65536) -> feedparser.FeedParserDict:
+        """
+        Parse an RSS/Atom response incrementally as its body arrives
+        
+        Each <item>/<entry> is converted as soon as it closes and its element
+        is cleared, so memory is bounded by a single entry instead of the whole
+        document. Entries are shaped like feedparser's so parse_feed_entries
+        handles both. Malformed XML stops the parse and sets ``bozo``, keeping
+        the entries read so far.
+        
+        Args:
+            response: Streaming requests response
+            chunk_size: Bytes read per network chunk
+        
+        Returns:
+            FeedParserDict with an ``entries`` list
+        """
+        parser = ET.XMLPullParser(events=('end',))
+        entries = []
+        bozo = 0
+        
+        try:
+            for chunk in response.iter_content(chunk_size):
+                parser.feed(chunk)
+                for _, elem in parser.read_events():
+                    if _local_name(elem.tag) in ('item', 'entry'):
+                        entries.append(_entry_from_element(elem))
+                        elem.clear()
+            parser.close()
+        except ET.ParseError as e:
+            logger.warning(f"Malformed feed {response.url}: {e}")
+            bozo = 1
+        
+        return feedparser.FeedParserDict(entries=entries, bozo=bozo)
+    
+    def _fetch_sources(self, sources: List[Dict[str, Any]],
+                       use_proxy: bool = None) -> List[Tuple[Dict[str, Any], Any]]:
+        """
+        Fetch several sources concurrently
+        
+        The whole batch is bounded by ``settings.batch_timeout`` seconds and
+        each host gets at most ``settings.per_host_concurrency`` requests in
+        flight, so feeds sharing a server are not hammered. Feeds that have
+        not finished when the deadline expires are abandoned.
+        
+        Args:
+            sources: Source dicts with 'name', 'url' and 'category'
+            use_proxy: Whether to use proxy
+        
+        Returns:
+            (source, feed) pairs for the sources that completed in time,
+            in configuration order
+        """
+        if not sources:
+            return []
+        
+        batch_timeout = self.settings.get("batch_timeout", 60)
+        max_workers = self.settings.get("max_workers", 8)
+        per_host = self.settings.get("per_host_concurrency", 2)
+        
+        host_semaphores = {}
+        for source in sources:
+            netloc = urlparse(source['url']).netloc
+            if netloc not in host_semaphores:
+                host_semaphores[netloc] = threading.BoundedSemaphore(per_host)
+        
+        def fetch(source):
+            with host_semaphores[urlparse(source['url']).netloc]:
+                logger.info(f"Fetching {source.get('name', 'Unknown')}...")
+                return self.fetch_feed(source['url'], use_proxy)
+        
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(sources)))
+        futures = {executor.submit(fetch, source): source for source in sources}
+        done, not_done = wait(futures, timeout=batch_timeout)
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        if not_done:
+            logger.warning(f"Batch timeout after {batch_timeout}s - "
+                           f"abandoned {len(not_done)} of {len(sources)} feed(s)")
+        
+        return [(source, future.result()) for future, source in futures.items() if future in done]
+    
     def parse_feed_entries(self, feed: feedparser.FeedParserDict, 
                           source_name: str = "Unknown",
                           category: str = "general") -> List[Dict[str, Any]]:
@@ -218,37 +338,29 @@ class RSSEngine:
         Returns:
             List of parsed entries
         """
-        entries = []
+        # Skip entries without valid timestamps up front so the loop below
+        # has nothing left that can fail
+        valid = [e for e in feed.entries
+                 if e.get('published_parsed') or e.get('updated_parsed')]
+        skipped = len(feed.entries) - len(valid)
+        if skipped and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{source_name}: skipped {skipped} entries without a timestamp")
         
-        for entry in feed.entries:
-            try:
-                # Extract published date - ensure timezone-aware UTC timestamps
-                published = None
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    published = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
-                elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                    published = datetime(*entry.updated_parsed[:6], tzinfo=timezone.utc)
-                else:
-                    # Skip entries without valid timestamps
-                    continue
-                
-                # Extract entry data
-                entry_data = {
-                    'timestamp': published,
-                    'source': source_name,
-                    'category': category,
-                    'title': entry.get('title', ''),
-                    'link': entry.get('link', ''),
-                    'description': entry.get('summary', entry.get('description', '')),
-                    'author': entry.get('author', ''),
-                    'tags': ', '.join([tag.term for tag in entry.get('tags', [])]) if entry.get('tags') else ''
-                }
-                
-                entries.append(entry_data)
-                
-            except Exception as e:
-                print(f"Error parsing entry: {e}")
-                continue
+        entries = []
+        for entry in valid:
+            # Timezone-aware UTC timestamps
+            parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+            tags = entry.get('tags')
+            entries.append({
+                'timestamp': datetime(*parsed[:6], tzinfo=timezone.utc),
+                'source': source_name,
+                'category': category,
+                'title': entry.get('title', ''),
+                'link': entry.get('link', ''),
+                'description': entry.get('summary', entry.get('description', '')),
+                'author': entry.get('author', ''),
+                'tags': ', '.join(tag.get('term') or '' for tag in tags) if tags else ''
+            })
         
         return entries
     
@@ -265,27 +377,23 @@ class RSSEngine:
         """
         all_entries = []
         
+        sources = []
         for source in self.sources:
+            if not source.get('url', ''):
+                logger.info(f"Skipping source '{source.get('name', 'Unknown')}' - no URL provided")
+                continue
+            sources.append(source)
+        
+        for source, feed in self._fetch_sources(sources, use_proxy):
             name = source.get('name', 'Unknown')
-            url = source.get('url', '')
             category = source.get('category', 'general')
             
-            if not url:
-                print(f"Skipping source '{name}' - no URL provided")
-                continue
-            
-            print(f"Fetching {name}...")
-            feed = self.fetch_feed(url, use_proxy)
-            
             if feed:
                 entries = self.parse_feed_entries(feed, name, category)
                 all_entries.extend(entries)
-                print(f"  → Retrieved {len(entries)} entries")
+                logger.info(f"  → {name}: retrieved {len(entries)} entries")
             else:
-                print(f"  → Failed to retrieve feed")
-            
-            # Small delay between requests to be polite
-            time.sleep(0.5)
+                logger.info(f"  → {name}: failed to retrieve feed")
         
         # Save to database if enabled
         if save_to_db and all_entries and self.db:
@@ -294,9 +402,8 @@ class RSSEngine:
                 if df is not None:
                     # Use smart database for better organization
                     if hasattr(self.db, 'store_news_data'):
-                        # Group by source and store separately
-                        for source in df['source'].unique():
-                            source_df = df[df['source'] == source]
+                        # Group by source and store separately (one pass over df)
+                        for source, source_df in df.groupby('source', sort=False):
                             self.db.store_news_data(source_df, source=source)
                     else:
                         # Fallback to legacy database
@@ -305,9 +412,9 @@ class RSSEngine:
                         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                         filename = f"rss_feeds_{timestamp}"
                         self.db.save_to_parquet(df, filename)
-                    print(f"RSS data saved to database")
+                    logger.info(f"RSS data saved to database")
             except Exception as e:
-                print(f"Failed to save to database: {e}")
+                logger.error(f"Failed to save to database: {e}")
         
         return all_entries
     
@@ -332,7 +439,7 @@ class RSSEngine:
                 break
         
         if not source:
-            print(f"Source '{name}' not found in configuration")
+            logger.warning(f"Source '{name}' not found in configuration")
             return []
         
         url = source.get('url', '')
@@ -355,9 +462,9 @@ class RSSEngine:
                     else:
                         table_name = "rss_feeds"
                         self.db.insert_dataframe(table_name, df, if_exists='append')
-                    print(f"RSS data saved to database")
+                    logger.info(f"RSS data saved to database")
             except Exception as e:
-                print(f"Failed to save to database: {e}")
+                logger.error(f"Failed to save to database: {e}")
         
         return entries
     
@@ -376,19 +483,16 @@ class RSSEngine:
         """
         all_entries = []
         
-        filtered_sources = [s for s in self.sources if s.get('category') == category]
+        filtered_sources = [s for s in self.sources
+                            if s.get('category') == category and s.get('url')]
         
-        for source in filtered_sources:
+        for source, feed in self._fetch_sources(filtered_sources, use_proxy):
             name = source.get('name', 'Unknown')
-            url = source.get('url', '')
-            
-            print(f"Fetching {name}...")
-            feed = self.fetch_feed(url, use_proxy)
             
             if feed:
                 entries = self.parse_feed_entries(feed, name, category)
                 all_entries.extend(entries)
-                print(f"  → Retrieved {len(entries)} entries")
+                logger.info(f"  → {name}: retrieved {len(entries)} entries")
         
         # Save to database if enabled
         if save_to_db and all_entries and self.db:
@@ -396,9 +500,8 @@ class RSSEngine:
                 df = self.to_dataframe(all_entries)
                 if df is not None:
                     if hasattr(self.db, 'store_news_data'):
-                        # Smart database - store by source
-                        for source in df['source'].unique():
-                            source_df = df[df['source'] == source]
+                        # Smart database - store by source (one pass over df)
+                        for source, source_df in df.groupby('source', sort=False):
                             self.db.store_news_data(source_df, source=f"{source}_{category}")
                     else:
                         # Legacy database
@@ -407,9 +510,9 @@ class RSSEngine:
                         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                         filename = f"rss_{category}_{timestamp}"
                         self.db.save_to_parquet(df, filename)
-                    print(f"RSS data saved to database")
+                    logger.info(f"RSS data saved to database")
             except Exception as e:
-                print(f"Failed to save to database: {e}")
+                logger.error(f"Failed to save to database: {e}")
         
         return all_entries
     
@@ -438,7 +541,7 @@ class RSSEngine:
             'url': url,
             'category': category
         })
-        print(f"Added source: {name}")
+        logger.info(f"Added source: {name}")
     
     def save_config(self, config_path: Optional[str] = None):
         """
@@ -453,7 +556,7 @@ class RSSEngine:
         with open(config_path, 'w') as f:
             json.dump(self.config, f, indent=2)
         
-        print(f"Configuration saved to {config_path}")
+        logger.info(f"Configuration saved to {config_path}")
     
     def query_saved_data(self, table_name: str = "rss_feeds", 
                         sql_filter: Optional[str] = None) -> Optional[Any]:
@@ -468,7 +571,7 @@ class RSSEngine:
             DataFrame with query results or None if database not available
         """
         if not self.db:
-            print("Database not initialized")
+            logger.warning("Database not initialized")
             return None
         
         try:
@@ -477,7 +580,7 @@ class RSSEngine:
             else:
                 return self.db.query(f"SELECT * FROM {table_name}")
         except Exception as e:
-            print(f"Query failed: {e}")
+            logger.error(f"Query failed: {e}")
             return None
     
     def list_saved_tables(self) -> List[str]:
@@ -492,7 +595,7 @@ class RSSEngine:
         """Close database connection"""
         if self.db:
             self.db.close()
-            print("Database connection closed")
+            logger.info("Database connection closed")
     
     def to_dataframe(self, entries: List[Dict[str, Any]]):
         """
@@ -509,8 +612,23 @@ class RSSEngine:
             df = pd.DataFrame(entries)
             return df
         except ImportError:
-            print("pandas not installed. Install with: pip install pandas")
+            logger.error("pandas not installed. Install with: pip install pandas")
+            return None
+    
+    def to_arrow(self, entries: List[Dict[str, Any]]):
+        """
+        Convert entries straight to a pyarrow Table, skipping pandas
+        
+        Args:
+            entries: List of parsed RSS entries
+        
+        Returns:
+            pyarrow Table following ENTRY_SCHEMA
+        """
+        if pa is None:
+            logger.error("pyarrow not installed. Install with: pip install pyarrow")
             return None
+        return pa.Table.from_pylist(entries, schema=ENTRY_SCHEMA)
 
 
 def main():
@@ -572,6 +690,8 @@ def main():
         parser.print_help()
         return
     
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     # Initialize RSS engine
     rss = RSSEngine(args.config, use_database=not args.no_db)
     
@@ -601,9 +721,7 @@ def main():
                     print(f"  - [{entry['source']}] {entry['title']}")
                 
                 if args.output:
-                    df = rss.to_dataframe(entries)
-                    if df is not None:
-                        _save_output(df, args.output)
+                    _save_entries(rss, entries, args.output)
         
         elif args.command == 'fetch-category':
             entries = rss.fetch_by_category(
@@ -613,9 +731,7 @@ def main():
             )
             print(f"\nTotal entries retrieved: {len(entries)}")
             if entries and args.output:
-                df = rss.to_dataframe(entries)
-                if df is not None:
-                    _save_output(df, args.output)
+                _save_entries(rss, entries, args.output)
         
         elif args.command == 'fetch-url':
             feed = rss.fetch_feed(args.url, use_proxy=args.proxy)
@@ -623,9 +739,7 @@ def main():
                 entries = rss.parse_feed_entries(feed, args.name, args.category)
                 print(f"Retrieved {len(entries)} entries from {args.name}")
                 if entries and args.output:
-                    df = rss.to_dataframe(entries)
-                    if df is not None:
-                        _save_output(df, args.output)
+                    _save_entries(rss, entries, args.output)
         
         elif args.command == 'add-source':
             rss.add_source(args.name, args.url, args.category)
@@ -649,6 +763,51 @@ def main():
         rss.close()
 
 
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from an element tag"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _entry_from_element(elem) -> "feedparser.FeedParserDict":
+    """Build a feedparser-style entry from an RSS <item> or Atom <entry>"""
+    entry = feedparser.FeedParserDict()
+    tags = []
+    
+    for child in elem:
+        name = _local_name(child.tag)
+        text = (child.text or '').strip()
+        
+        if name == 'title':
+            entry['title'] = text
+        elif name == 'link':
+            # Atom links carry the URL in href; prefer rel="alternate"
+            href = child.get('href')
+            if href is None:
+                entry['link'] = text
+            elif child.get('rel', 'alternate') == 'alternate' or 'link' not in entry:
+                entry['link'] = href
+        elif name in ('description', 'summary'):
+            entry.setdefault('summary', text)
+        elif name == 'content' and 'summary' not in entry:
+            entry['summary'] = text
+        elif name in ('author', 'creator'):
+            # Atom nests the name inside <author><name>
+            author_name = next((c.text for c in child if _local_name(c.tag) == 'name'), None)
+            entry['author'] = (author_name or text).strip()
+        elif name in ('pubDate', 'published'):
+            entry['published_parsed'] = parse_feed_date(text)
+        elif name in ('updated', 'date'):
+            entry['updated_parsed'] = parse_feed_date(text)
+        elif name == 'category':
+            term = child.get('term') or text
+            if term:
+                tags.append(feedparser.FeedParserDict(term=term))
+    
+    if tags:
+        entry['tags'] = tags
+    return entry
+
+
 def _save_output(df, output_path):
     """Helper function to save DataFrame to file"""
     if output_path.endswith('.csv'):
@@ -660,5 +819,17 @@ def _save_output(df, output_path):
     print(f"Data saved to {output_path}")
 
 
+def _save_entries(rss, entries, output_path):
+    """Helper function to save parsed entries, writing parquet via Arrow"""
+    if output_path.endswith('.parquet') and pa is not None:
+        table = rss.to_arrow(entries)
+        pq.write_table(table, output_path, compression='zstd', use_dictionary=True)
+        print(f"Data saved to {output_path}")
+        return
+    df = rss.to_dataframe(entries)
+    if df is not None:
+        _save_output(df, output_path)
+
+
 if __name__ == "__main__":
     main()
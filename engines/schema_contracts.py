@@ -19,7 +19,7 @@ class TableContract:
 TABLE_CONTRACTS: Dict[str, TableContract] = {
     "market_data": TableContract(
         description="OHLCV bars fetched via connectors or ingested CSVs",
-        storage_pattern="data/market/{source}/{symbol}/{interval}.parquet",
+        storage_pattern="data/market/source={source}/symbol={symbol}/interval={interval}/data.parquet",
         unique_key=["symbol", "timestamp", "source", "interval"],
         columns={
             "timestamp": "TIMESTAMP",
@@ -40,7 +40,7 @@ TABLE_CONTRACTS: Dict[str, TableContract] = {
     ),
     "news_data": TableContract(
         description="Normalized RSS or news documents",
-        storage_pattern="data/news/{source}/{year}/{month}.parquet",
+        storage_pattern="data/news/src={source}/year={year}/month={month}/data.parquet",
         unique_key=["link", "timestamp"],
         columns={
             "timestamp": "TIMESTAMP",
@@ -16,10 +16,22 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional
+import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    from pybloom_live import ScalableBloomFilter
+except ImportError:
+    ScalableBloomFilter = None
+
 from engines.finbert import FinBERTEngine
 from engines.smart_db import SmartDatabaseManager
 
@@ -31,6 +43,39 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Category order makes code - 1 equal to the score sign
+SENTIMENT_CATEGORIES = ['negative', 'neutral', 'positive']
+
+
+def _score_from_codes(codes: np.ndarray, confidence: np.ndarray) -> np.ndarray:
+    """Signed score from SENTIMENT_CATEGORIES codes (numpy fallback)"""
+    sign = codes.astype(np.int8) - 1
+    sign[codes < 0] = 0  # unknown labels count as neutral
+    return sign * confidence
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _score_from_codes(codes, confidence):  # noqa: F811 - compiled variant
+        """Signed score from SENTIMENT_CATEGORIES codes in one fused pass"""
+        out = np.empty_like(confidence)
+        for i in range(confidence.size):
+            if codes[i] == 2:
+                out[i] = confidence[i]
+            elif codes[i] == 0:
+                out[i] = -confidence[i]
+            else:
+                out[i] = 0.0
+        return out
+
+
+def _signed_score(sentiment: np.ndarray, confidence: np.ndarray) -> np.ndarray:
+    """+confidence for positive, -confidence for negative, 0 for neutral"""
+    # get_indexer maps unknown labels to -1 without the Categorical warning
+    codes = pd.Index(SENTIMENT_CATEGORIES).get_indexer(sentiment).astype(np.int8)
+    return _score_from_codes(codes, np.ascontiguousarray(confidence, dtype=np.float64))
+
+
 class SentimentAnalysisPipeline:
     """
     Pipeline orquestrador para análise de sentimento em notícias.
@@ -47,15 +92,20 @@ class SentimentAnalysisPipeline:
     NÃO duplica código - apenas orquestra FinBERTEngine existente.
     """
     
-    def __init__(self, device: str = 'cpu', batch_size: int = 16):
+    def __init__(self, device: str = 'cpu', batch_size: int = 16, use_onnx: bool = True,
+                 compile_model: bool = True):
         """
         Initialize SentimentAnalysisPipeline.
         
         Args:
             device: 'cpu' or 'cuda' for GPU acceleration
             batch_size: Batch size for processing (larger = faster but more RAM)
+            use_onnx: On CPU, run FinBERT through ONNX Runtime with INT8
+                quantization when optimum/onnxruntime are installed
+            compile_model: Compile the PyTorch model with torch.compile
         """
         self.batch_size = batch_size
+        self._run_started_at = datetime.now()
         
         # Initialize engines (reuse existing)
         logger.info("Initializing FinBERT engine...")
@@ -65,8 +115,21 @@ class SentimentAnalysisPipeline:
             device=device
         )
         
+        if device == 'cpu' and use_onnx:
+            self.finbert.enable_onnx_runtime()
+        elif device == 'cuda':
+            self.finbert.enable_half_precision()
+        
+        # Only applies when the model is still PyTorch (not ONNX Runtime)
+        if compile_model:
+            self.finbert.enable_compile()
+        
         self.db = SmartDatabaseManager()
         
+        # Content hashes already in news_sentiment, so repeated articles
+        # (same story in several feeds/categories) skip FinBERT
+        self._seen_hashes = self._load_seen_hashes()
+        
         logger.info("SentimentAnalysisPipeline initialized")
     
     def run(self, limit: Optional[int] = None):
@@ -78,6 +141,9 @@ class SentimentAnalysisPipeline:
         """
         logger.info("=== SentimentAnalysisPipeline.run() ===")
         
+        # Single timestamp for every row written by this run
+        self._run_started_at = datetime.now()
+        
         # 1. Load pending news
         pending_news = self._load_pending_news(limit)
         
@@ -85,11 +151,50 @@ class SentimentAnalysisPipeline:
             logger.info("No pending news to analyze")
             return
         
+        # Skip content that was already analyzed, but still mark it processed
+        pending_news, duplicate_ids = self._filter_seen_content(pending_news)
+        if duplicate_ids:
+            logger.info(f"Skipping {len(duplicate_ids)} articles with already-analyzed content")
+            self._update_status(duplicate_ids)
+        
+        if pending_news.empty:
+            logger.info("No new content to analyze")
+            return
+        
         logger.info(f"Processing {len(pending_news)} pending articles")
         
+        # Process in chunks so peak memory is bounded by the chunk, and each
+        # chunk is marked processed as soon as it is saved. Writes run on a
+        # background thread so chunk N is saved while chunk N+1 is inferred;
+        # at most one chunk waits to be written.
+        chunk_size = self.batch_size * 64
+        total = 0
+        pending_write = None
+        
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            for start in range(0, len(pending_news), chunk_size):
+                analyzed, symbol_df = self._analyze_chunk(pending_news.iloc[start:start + chunk_size])
+                
+                if pending_write is not None:
+                    pending_write.result()
+                pending_write = writer.submit(self._save_chunk, analyzed, symbol_df)
+                total += len(analyzed)
+            
+            if pending_write is not None:
+                pending_write.result()
+        
+        logger.info(f"Pipeline complete: {total} articles analyzed")
+    
+    def _analyze_chunk(self, news: pd.DataFrame):
+        """
+        Run inference for one chunk of pending news.
+        
+        Returns:
+            (analyzed articles, per-symbol results or None)
+        """
         # 2. Analyze general sentiment (uses FinBERTEngine.analyze_news_df)
         analyzed = self.finbert.analyze_news_df(
-            pending_news,
+            news,
             text_column='title',
             description_column='description'
         )
@@ -97,16 +202,70 @@ class SentimentAnalysisPipeline:
         # 3. Calculate composite sentiment score
         analyzed = self._calculate_sentiment_score(analyzed)
         
-        # 4. Save general sentiment
-        self._save_general_sentiment(analyzed)
+        # 4. Analyze per-symbol sentiment
+        symbol_df = self._analyze_per_symbol(analyzed)
         
-        # 5. Analyze per-symbol sentiment
-        self._analyze_per_symbol(analyzed)
+        return analyzed, symbol_df
+    
+    def _save_chunk(self, analyzed: pd.DataFrame, symbol_df: Optional[pd.DataFrame]):
+        """Persist one analyzed chunk and mark it processed"""
+        # 5. Save general and per-symbol sentiment
+        self._save_general_sentiment(analyzed)
+        if symbol_df is not None:
+            self._save_symbol_sentiment(symbol_df)
         
         # 6. Update status to 'processed'
         self._update_status(analyzed['id'].tolist())
         
-        logger.info(f"Pipeline complete: {len(analyzed)} articles analyzed")
+        if 'content_hash' in analyzed.columns:
+            for content_hash in analyzed['content_hash'].dropna():
+                self._seen_hashes.add(content_hash)
+    
+    def _load_seen_hashes(self):
+        """
+        Build the set of content hashes already in news_sentiment.
+        
+        Uses a ScalableBloomFilter (0.1% false positives) when pybloom_live
+        is installed to keep memory flat, otherwise an exact set.
+        """
+        if ScalableBloomFilter is not None:
+            seen = ScalableBloomFilter(initial_capacity=1_000_000, error_rate=0.001)
+        else:
+            seen = set()
+        
+        try:
+            df = self.db.query(
+                "SELECT DISTINCT content_hash FROM news_sentiment WHERE content_hash IS NOT NULL"
+            )
+        except Exception as e:
+            logger.info(f"No analyzed content hashes loaded: {e}")
+            return seen
+        
+        for content_hash in df['content_hash']:
+            seen.add(content_hash)
+        
+        logger.info(f"Loaded {len(df)} analyzed content hashes")
+        return seen
+    
+    def _filter_seen_content(self, df: pd.DataFrame):
+        """
+        Drop articles whose content was already analyzed.
+        
+        An article is skipped if its content_hash is in the seen filter or
+        appears earlier in the same batch. Rows without a hash are kept.
+        
+        Returns:
+            (articles to analyze, ids of skipped articles)
+        """
+        if 'content_hash' not in df.columns:
+            return df, []
+        
+        hashes = df['content_hash']
+        has_hash = hashes.notna()
+        seen = hashes.map(lambda h: h in self._seen_hashes, na_action='ignore')
+        duplicate = has_hash & (seen.fillna(False).astype(bool) | hashes.duplicated())
+        
+        return df[~duplicate], df.loc[duplicate, 'id'].tolist()
     
     def _load_pending_news(self, limit: Optional[int] = None) -> pd.DataFrame:
         """Load news with status='pending' from news_raw"""
@@ -146,124 +305,175 @@ class SentimentAnalysisPipeline:
         
         Range: -1.0 (very negative) to +1.0 (very positive)
         """
-        def calc_score(row):
-            if row['sentiment'] == 'positive':
-                return row['sentiment_confidence']
-            elif row['sentiment'] == 'negative':
-                return -row['sentiment_confidence']
-            else:  # neutral
-                return 0.0
-        
-        df['sentiment_score'] = df.apply(calc_score, axis=1)
+        df['sentiment_score'] = _signed_score(
+            df['sentiment'].to_numpy(),
+            df['sentiment_confidence'].to_numpy(dtype=np.float64)
+        )
         
         return df
     
     def _save_general_sentiment(self, df: pd.DataFrame):
         """Save general sentiment analysis to news_sentiment table"""
-        # Prepare data
-        sentiment_df = pd.DataFrame()
-        sentiment_df['id'] = 'sentiment_' + df['id']
-        sentiment_df['news_id'] = df['id']
-        sentiment_df['timestamp'] = df['timestamp']
-        sentiment_df['source'] = df['source']
-        sentiment_df['title'] = df['title']
-        sentiment_df['link'] = df['link']
-        sentiment_df['sentiment'] = df['sentiment']
-        sentiment_df['sentiment_score'] = df['sentiment_score']
-        sentiment_df['confidence'] = df['sentiment_confidence']
-        sentiment_df['positive_score'] = df['sentiment_positive']
-        sentiment_df['negative_score'] = df['sentiment_negative']
-        sentiment_df['neutral_score'] = df['sentiment_neutral']
-        sentiment_df['analyzed_at'] = datetime.now()
+        # Prepare data (one constructor call, raw arrays skip index alignment)
+        sentiment_df = pd.DataFrame({
+            'id': 'sentiment_' + df['id'].astype(str).to_numpy(dtype=object),
+            'news_id': df['id'].to_numpy(),
+            'timestamp': df['timestamp'].array,  # keeps tz-aware dtype
+            'source': df['source'].to_numpy(),
+            'title': df['title'].to_numpy(),
+            'link': df['link'].to_numpy(),
+            'sentiment': df['sentiment'].to_numpy(),
+            'sentiment_score': df['sentiment_score'].to_numpy(),
+            'confidence': df['sentiment_confidence'].to_numpy(),
+            'positive_score': df['sentiment_positive'].to_numpy(),
+            'negative_score': df['sentiment_negative'].to_numpy(),
+            'neutral_score': df['sentiment_neutral'].to_numpy(),
+            'analyzed_at': self._run_started_at
+        })
+        if 'content_hash' in df.columns:
+            sentiment_df['content_hash'] = df['content_hash'].to_numpy()
         
         # Save to database
         try:
-            self.db.save_dataframe(sentiment_df, 'news_sentiment', mode='append')
+            self.db.bulk_insert(sentiment_df, 'news_sentiment')
             logger.info(f"Saved {len(sentiment_df)} general sentiment analyses")
         except Exception as e:
             logger.error(f"Error saving general sentiment: {e}")
     
-    def _analyze_per_symbol(self, df: pd.DataFrame):
-        """Analyze sentiment per symbol mentioned"""
-        symbol_results = []
-        
-        for _, row in df.iterrows():
-            # Get all symbols mentioned
-            tickers = row.get('tickers_mentioned', '')
-            cryptos = row.get('cryptos_mentioned', '')
-            
-            # Combine and clean
-            symbols = []
-            if tickers:
-                symbols.extend([s.strip() for s in str(tickers).split(',') if s.strip()])
-            if cryptos:
-                symbols.extend([s.strip() for s in str(cryptos).split(',') if s.strip()])
-            
-            if not symbols:
-                continue
-            
-            # Combine title + description for context
-            full_text = f"{row['title']} {row.get('description', '')}"
-            
-            # Analyze per symbol (uses FinBERTEngine.analyze_per_symbol)
-            try:
-                symbol_sentiments = self.finbert.analyze_per_symbol(full_text, symbols)
-                
-                for symbol, sentiment_data in symbol_sentiments.items():
-                    result = {
-                        'id': f"symbol_{row['id']}_{symbol}",
-                        'news_id': row['id'],
-                        'symbol': symbol,
-                        'timestamp': row['timestamp'],
-                        'source': row['source'],
-                        'title': row['title'],
-                        'sentiment': sentiment_data['sentiment'],
-                        'sentiment_score': (
-                            sentiment_data['confidence'] if sentiment_data['sentiment'] == 'positive'
-                            else -sentiment_data['confidence'] if sentiment_data['sentiment'] == 'negative'
-                            else 0.0
-                        ),
-                        'confidence': sentiment_data['confidence'],
-                        'positive_score': sentiment_data['scores']['positive'],
-                        'negative_score': sentiment_data['scores']['negative'],
-                        'neutral_score': sentiment_data['scores']['neutral'],
-                        'matched_sentence': sentiment_data.get('matched_sentence', ''),
-                        'analyzed_at': datetime.now()
-                    }
-                    symbol_results.append(result)
-                    
-            except Exception as e:
-                logger.warning(f"Error analyzing per-symbol for {row['id']}: {e}")
-                continue
-        
-        # Save per-symbol results
-        if symbol_results:
-            symbol_df = pd.DataFrame(symbol_results)
-            
-            try:
-                self.db.save_dataframe(symbol_df, 'news_by_symbol', mode='append')
-                logger.info(f"Saved {len(symbol_df)} per-symbol sentiment analyses")
-            except Exception as e:
-                logger.error(f"Error saving per-symbol sentiment: {e}")
-        else:
+    def _explode_symbols(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Expand tickers_mentioned/cryptos_mentioned into one row per symbol.
+        
+        Returns:
+            DataFrame with 'id' and 'symbol' columns, empty and repeated
+            symbols removed
+        """
+        mentioned = [
+            df[col].fillna('').astype(str)
+            for col in ('tickers_mentioned', 'cryptos_mentioned')
+            if col in df.columns
+        ]
+        if not mentioned:
+            return pd.DataFrame({'id': [], 'symbol': []})
+        
+        combined = mentioned[0]
+        for extra in mentioned[1:]:
+            combined = combined + ',' + extra
+        
+        exploded = df[['id']].assign(symbol=combined.str.split(',')).explode('symbol')
+        exploded['symbol'] = exploded['symbol'].str.strip()
+        exploded = exploded[exploded['symbol'] != '']
+        
+        # A symbol listed twice (or as both ticker and crypto) is analyzed once
+        return exploded.drop_duplicates(['id', 'symbol']).reset_index(drop=True)
+    
+    def _analyze_per_symbol(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Analyze sentiment per symbol mentioned.
+        
+        Returns:
+            One row per (article, symbol), or None if there is nothing to save
+        """
+        # Symbol lists per article, built with vectorized string ops
+        symbols_by_id = self._explode_symbols(df).groupby('id', sort=False)['symbol'].agg(list)
+        
+        # Collect every (text, symbol) pair first so FinBERT sees them in batches;
+        # article_pos maps each pair back to its article's row in `articles`
+        articles = df[df['id'].isin(symbols_by_id.index)]
+        article_pos = []
+        pairs = []
+        # Combine title + description for context (one Arrow concat, no per-row f-strings)
+        full_texts = articles['title'].fillna('').astype('string[pyarrow]')
+        if 'description' in articles.columns:
+            full_texts = full_texts + ' ' + articles['description'].fillna('').astype('string[pyarrow]')
+        full_texts = full_texts.to_numpy(dtype=object)
+        
+        for pos, news_id in enumerate(articles['id']):
+            full_text = full_texts[pos]
+            for symbol in symbols_by_id[news_id]:
+                article_pos.append(pos)
+                pairs.append((full_text, symbol))
+        
+        try:
+            symbol_sentiments = self.finbert.analyze_per_symbol_batch(pairs, batch_size=self.batch_size)
+        except Exception as e:
+            logger.error(f"Error analyzing per-symbol sentiment: {e}")
+            return None
+        
+        kept = [i for i, result in enumerate(symbol_sentiments) if result is not None]
+        if not kept:
             logger.info("No symbol-specific analyses to save")
+            return None
+        
+        # Fill preallocated typed columns (SoA) in a single pass
+        n = len(kept)
+        symbol_arr = np.empty(n, dtype=object)
+        sentiment_arr = np.empty(n, dtype=object)
+        matched_arr = np.empty(n, dtype=object)
+        confidence_arr = np.empty(n, dtype=np.float64)
+        positive_arr = np.empty(n, dtype=np.float64)
+        negative_arr = np.empty(n, dtype=np.float64)
+        neutral_arr = np.empty(n, dtype=np.float64)
+        
+        for j, i in enumerate(kept):
+            result = symbol_sentiments[i]
+            scores = result['scores']
+            symbol_arr[j] = pairs[i][1]
+            sentiment_arr[j] = result['sentiment']
+            matched_arr[j] = result.get('matched_sentence', '')
+            confidence_arr[j] = result['confidence']
+            positive_arr[j] = scores['positive']
+            negative_arr[j] = scores['negative']
+            neutral_arr[j] = scores['neutral']
+        
+        # Article columns are gathered by position instead of copied per pair
+        take = np.asarray(article_pos, dtype=np.intp)[kept]
+        news_id_arr = articles['id'].to_numpy(dtype=object)[take]
+        
+        symbol_df = pd.DataFrame({
+            'id': 'symbol_' + news_id_arr + '_' + symbol_arr,
+            'news_id': news_id_arr,
+            'symbol': symbol_arr,
+            'timestamp': articles['timestamp'].array.take(take),
+            'source': articles['source'].to_numpy()[take],
+            'title': articles['title'].to_numpy()[take],
+            'sentiment': sentiment_arr,
+            'sentiment_score': _signed_score(sentiment_arr, confidence_arr),
+            'confidence': confidence_arr,
+            'positive_score': positive_arr,
+            'negative_score': negative_arr,
+            'neutral_score': neutral_arr,
+            'matched_sentence': matched_arr,
+            'analyzed_at': self._run_started_at
+        })
+        
+        return symbol_df
+    
+    def _save_symbol_sentiment(self, symbol_df: pd.DataFrame):
+        """Save per-symbol sentiment analysis to news_by_symbol table"""
+        try:
+            self.db.bulk_insert(symbol_df, 'news_by_symbol')
+            logger.info(f"Saved {len(symbol_df)} per-symbol sentiment analyses")
+        except Exception as e:
+            logger.error(f"Error saving per-symbol sentiment: {e}")
     
     def _update_status(self, news_ids: list):
         """Update news_raw status to 'processed'"""
         if not news_ids:
             return
         
-        # Build update query
-        ids_str = "', '".join(news_ids)
-        query = f"""
+        # IDs are bound as a single list parameter: one statement, no
+        # quoting/injection issues and no per-parameter limits
+        query = """
         UPDATE news_raw
         SET status = 'processed',
-            processed_at = '{datetime.now().isoformat()}'
-        WHERE id IN ('{ids_str}')
+            processed_at = ?
+        WHERE id IN (SELECT UNNEST(?::VARCHAR[]))
         """
+        params = [self._run_started_at.isoformat(), list(news_ids)]
         
         try:
-            self.db.execute(query)
+            self.db.execute(query, params)
             logger.info(f"Updated {len(news_ids)} articles to 'processed' status")
         except Exception as e:
             logger.error(f"Error updating status: {e}")
@@ -17,12 +17,27 @@ from __future__ import (absolute_import, division, print_function,
 
 import json
 import logging
-from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, time
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 import backtrader as bt
+import numpy as np
 import pandas as pd
+from requests.adapters import HTTPAdapter
+
+try:
+    import exchange_calendars as xcals
+except ImportError:
+    xcals = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 from engines.smart_db import SmartDatabaseManager
 
@@ -34,6 +49,91 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Column dtypes for portfolio_state writes. Declared rather than inferred so
+# a snapshot without positions doesn't create integer columns. Strings stay
+# object: DuckDB would store pandas categoricals as ENUMs.
+PORTFOLIO_SCHEMA = {
+    'timestamp': 'object',
+    'exchange': 'object',
+    'symbol': 'object',
+    'position_size': 'float64',
+    'avg_entry_price': 'float64',
+    'current_price': 'float64',
+    'unrealized_pnl': 'float64',
+    'total_cash': 'float64',
+    'total_value': 'float64',
+}
+
+# SQL is fixed text with bound parameters: nothing is interpolated per call
+DAILY_PNL_QUERY = """
+SELECT SUM(pnl) as daily_pnl
+FROM paper_trades
+WHERE exchange = ?
+AND DATE(exit_time) = CURRENT_DATE
+AND status = 'closed'
+"""
+
+UPDATE_STATUS_QUERY = """
+UPDATE realtime_alerts
+SET status = u.status,
+    execution_details = u.details,
+    execution_time = $4
+FROM (
+    SELECT UNNEST($1::VARCHAR[]) AS id,
+           UNNEST($2::VARCHAR[]) AS status,
+           UNNEST($3::VARCHAR[]) AS details
+) AS u
+WHERE realtime_alerts.id = u.id
+"""
+
+
+def _kelly_sizes(p: np.ndarray, b: np.ndarray, kelly_fraction: np.ndarray,
+                 max_position: np.ndarray, cash: np.ndarray,
+                 price: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Fractional Kelly percentage and position size per signal (numpy fallback)"""
+    # A NaN confidence sizes to 0 (rejected as too small), as max(0, nan) did
+    kelly = np.nan_to_num((b * p - (1 - p)) / b * kelly_fraction, nan=0.0)
+    kelly_pct = np.clip(kelly, 0, max_position)
+    position_size = np.divide(
+        cash * kelly_pct, price,
+        out=np.zeros_like(kelly_pct), where=price > 0
+    )
+    return kelly_pct, position_size
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _kelly_sizes(p, b, kelly_fraction, max_position, cash, price):  # noqa: F811 - compiled variant
+        """Fractional Kelly percentage and position size in one fused pass"""
+        kelly_pct = np.empty_like(p)
+        position_size = np.empty_like(p)
+        for i in range(p.size):
+            kelly = (b[i] * p[i] - (1 - p[i])) / b[i] * kelly_fraction[i]
+            if not kelly > 0.0:  # also catches NaN confidences
+                kelly = 0.0
+            kelly = min(kelly, max_position[i])
+            kelly_pct[i] = kelly
+            position_size[i] = cash[i] * kelly / price[i] if price[i] > 0 else 0.0
+        return kelly_pct, position_size
+
+
+@dataclass(frozen=True, slots=True)
+class RiskContext:
+    """Per-exchange risk settings from config/paper_trading.json (percentages in %)"""
+    
+    min_confidence: float
+    max_position_size_pct: float
+    max_portfolio_risk_pct: float
+    default_stop_loss_pct: float
+    default_take_profit_pct: float
+    kelly_fraction: float
+    
+    @classmethod
+    def from_settings(cls, settings: Dict) -> 'RiskContext':
+        """Build from a risk_settings dict, ignoring unrelated keys"""
+        return cls(**{name: float(settings[name]) for name in cls.__slots__})
+
+
 class SignalExecutionManager:
     """
     Gerenciador central de execução de sinais de trading.
@@ -62,12 +162,22 @@ class SignalExecutionManager:
         self.config = self._load_config()
         self.db = SmartDatabaseManager()
         
+        # Built once: O(1) crypto lookups instead of scanning the config list
+        self._crypto_pairs = frozenset(self.config['binance']['trading_pairs'])
+        
+        # NYSE session calendar for Alpaca trading hours (optional)
+        self._nyse = xcals.get_calendar('XNYS') if xcals is not None else None
+        
         # Trading components
         self.alpaca_store = None
         self.alpaca_broker = None
         self.ccxt_store = None
         self.ccxt_broker = None
         
+        self._run_started_at = datetime.now()
+        self._run_started_iso = self._run_started_at.isoformat()
+        self._run_started_utc = pd.Timestamp.now(tz='UTC')
+        
         # State tracking
         self.portfolio_state = {
             'alpaca': {'cash': 0.0, 'positions': {}, 'total_value': 0.0},
@@ -153,19 +263,22 @@ class SignalExecutionManager:
         try:
             df = self.db.query(query)
             if not df.empty:
-                for _, row in df.iterrows():
-                    exchange = row['exchange'].lower()
-                    if exchange in self.portfolio_state:
-                        self.portfolio_state[exchange]['cash'] = row['total_cash']
-                        self.portfolio_state[exchange]['total_value'] = row['total_value']
-                        
-                        if row['position_size'] != 0:
-                            self.portfolio_state[exchange]['positions'][row['symbol']] = {
-                                'size': row['position_size'],
-                                'avg_price': row['avg_entry_price'],
-                                'current_price': row['current_price'],
-                                'pnl': row['unrealized_pnl']
-                            }
+                df = df.assign(exchange=df['exchange'].str.lower())
+                df = df[df['exchange'].isin(list(self.portfolio_state))]
+                
+                for exchange, group in df.groupby('exchange', sort=False):
+                    state = self.portfolio_state[exchange]
+                    state['cash'] = group['total_cash'].iloc[-1]
+                    state['total_value'] = group['total_value'].iloc[-1]
+                    
+                    held = group[group['position_size'] != 0]
+                    state['positions'].update({
+                        symbol: {'size': size, 'avg_price': avg_price, 'current_price': current_price, 'pnl': pnl}
+                        for symbol, size, avg_price, current_price, pnl in zip(
+                            held['symbol'], held['position_size'], held['avg_entry_price'],
+                            held['current_price'], held['unrealized_pnl']
+                        )
+                    })
                 
                 logger.info(f"Loaded portfolio state: {self.portfolio_state}")
         except Exception as e:
@@ -184,6 +297,11 @@ class SignalExecutionManager:
         """
         logger.info("=== SignalExecutionManager.run() ===")
         
+        # Single timestamp for every status, trade and snapshot written by this run
+        self._run_started_at = datetime.now()
+        self._run_started_iso = self._run_started_at.isoformat()
+        self._run_started_utc = pd.Timestamp.now(tz='UTC')
+        
         # Load active signals
         signals = self._load_active_signals()
         
@@ -193,142 +311,272 @@ class SignalExecutionManager:
         
         logger.info(f"Processing {len(signals)} active signals")
         
+        # Risk settings and daily PnL/current risk only depend on the exchange
+        self._risk_ctx = self._build_risk_contexts()
+        self._risk_state = self._load_risk_state()
+        
+        # Validate all signals at once; only the survivors reach the brokers
+        checked = self._validate_signals(signals)
+        is_valid = (checked['reject_reason'] == 'valid').to_numpy()
+        
+        # Status updates are collected as (signal_id, status, details) and
+        # written in one statement per phase
+        rejected = checked[~is_valid]
+        status_updates = list(zip(rejected['id'], repeat('rejected'), rejected['reject_reason']))
+        for symbol, reason in zip(rejected['symbol'], rejected['reject_reason']):
+            logger.info(f"Signal rejected: {symbol} - {reason}")
+        
         executed_count = 0
-        rejected_count = 0
+        rejected_count = len(rejected)
+        
+        # Kelly sizing for all valid signals at once
+        valid = checked[is_valid]
+        kelly_pct, position_sizes = self._calculate_position_sizes(valid)
+        
+        orders = []
+        for signal, kelly, position_size in zip(valid.to_dict('records'), kelly_pct, position_sizes):
+            logger.info(
+                f"Position size for {signal['symbol']}: "
+                f"Kelly={kelly*100:.2f}%, "
+                f"Value=${position_size * signal['price']:.2f}, "
+                f"Size={position_size:.6f}"
+            )
+            
+            if position_size <= 0:
+                logger.info(f"Signal rejected: {signal['symbol']} - position size too small")
+                status_updates.append((signal['id'], 'rejected', 'position_size_too_small'))
+                rejected_count += 1
+                continue
+            
+            # Orders accepted earlier in this batch count towards the risk limit
+            exchange = signal['exchange']
+            risk_state = self._risk_state[exchange]
+            max_risk = self._risk_ctx[exchange].max_portfolio_risk_pct
+            if risk_state['current_risk'] >= max_risk:
+                reason = f"max_risk_exceeded_{risk_state['current_risk']:.1f}%"
+                logger.info(f"Signal rejected: {signal['symbol']} - {reason}")
+                status_updates.append((signal['id'], 'rejected', reason))
+                rejected_count += 1
+                continue
+            
+            risk_state['current_risk'] += self._order_risk_pct(exchange, position_size, signal['price'])
+            orders.append((signal, position_size))
+        
+        # Rejections are written on a background thread while the orders are
+        # in flight; the order threads never touch the database
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            rejected_write = writer.submit(self._update_signal_statuses, status_updates)
+            results = self._submit_orders(orders)
+            try:
+                rejected_write.result()
+            except Exception as e:
+                # Those signals stay active and are re-validated next run
+                logger.error(f"Error saving rejected signal statuses: {e}")
+        
+        status_updates = []
+        executed_trades = []
         
-        for _, signal in signals.iterrows():
+        for (signal, position_size), result in zip(orders, results):
             try:
-                # Validate signal
-                is_valid, reason = self._validate_signal(signal)
-                
-                if not is_valid:
-                    logger.info(f"Signal rejected: {signal['symbol']} - {reason}")
-                    self._update_signal_status(signal['id'], 'rejected', reason)
-                    rejected_count += 1
-                    continue
-                
-                # Calculate position size
-                position_size = self._calculate_position_size(signal)
-                
-                if position_size <= 0:
-                    logger.info(f"Signal rejected: {signal['symbol']} - position size too small")
-                    self._update_signal_status(signal['id'], 'rejected', 'position_size_too_small')
-                    rejected_count += 1
-                    continue
-                
-                # Execute order
-                success, order_info = self._execute_signal(signal, position_size)
+                success, order_info = result.result()
                 
                 if success:
                     logger.info(f"Signal executed: {signal['symbol']} - {order_info}")
-                    self._update_signal_status(signal['id'], 'executed', json.dumps(order_info))
-                    self._record_paper_trade(signal, position_size, order_info)
+                    status_updates.append((signal['id'], 'executed', json.dumps(order_info)))
+                    executed_trades.append((signal, position_size))
                     executed_count += 1
                 else:
                     logger.warning(f"Signal execution failed: {signal['symbol']} - {order_info}")
-                    self._update_signal_status(signal['id'], 'failed', str(order_info))
+                    status_updates.append((signal['id'], 'failed', str(order_info)))
                     rejected_count += 1
                     
             except Exception as e:
                 logger.error(f"Error processing signal {signal['id']}: {e}")
-                self._update_signal_status(signal['id'], 'error', str(e))
+                status_updates.append((signal['id'], 'error', str(e)))
                 rejected_count += 1
         
+        self._update_signal_statuses(status_updates)
+        self._record_paper_trades(executed_trades)
+        
         # Update portfolio state
         self._update_portfolio_state()
         
         logger.info(f"Execution complete: {executed_count} executed, {rejected_count} rejected")
     
     def _load_active_signals(self) -> pd.DataFrame:
-        """Load signals with status='active' from realtime_alerts"""
+        """
+        Load signals with status='active' from realtime_alerts.
+        
+        Only the columns used by validation, sizing and paper trades are
+        selected, so DuckDB never materializes the rest.
+        """
         query = """
         SELECT 
             id,
             symbol,
             signal_type,
-            signal_strength,
             sentiment_score,
             confidence,
             price,
-            timestamp,
-            news_ids
+            timestamp
         FROM realtime_alerts
         WHERE status = 'active'
         ORDER BY timestamp DESC
         """
         
-        return self.db.query(query)
+        df = self.db.query(query)
+        
+        # Parse once for the whole column (naive values are taken as UTC)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', utc=True)
+        
+        # Few distinct values: int codes make comparisons and isin cheap
+        df['symbol'] = df['symbol'].astype('category')
+        df['signal_type'] = df['signal_type'].astype('category')
+        
+        return df
     
-    def _validate_signal(self, signal: pd.Series) -> Tuple[bool, str]:
+    def _validate_signals(self, signals: pd.DataFrame) -> pd.DataFrame:
         """
-        Validate trading signal against risk rules.
+        Validate all trading signals against risk rules with column masks.
+        
+        Rules are checked in order and a signal is rejected with the reason
+        of the first rule it fails. Per-exchange values (limits, current
+        risk, daily PnL) are computed once per exchange, not per signal.
         
         Returns:
-            (is_valid, reason)
+            Copy of signals with 'exchange' and 'reject_reason' columns
+            ('valid' when every rule passed)
         """
-        # Determine exchange/asset type
-        symbol = signal['symbol']
-        is_crypto = self._is_crypto(symbol)
-        exchange = 'binance' if is_crypto else 'alpaca'
-        risk_cfg = self.config[exchange]['risk_settings']
-        
-        # Check 1: Confidence threshold
-        if signal['confidence'] < risk_cfg['min_confidence']:
-            return False, f"confidence_too_low_{signal['confidence']:.2f}"
-        
-        # Check 2: Signal age (não executar sinais muito antigos)
-        signal_age = datetime.now() - pd.to_datetime(signal['timestamp'])
-        max_age = timedelta(minutes=30)  # Sinais expiram em 30 minutos
-        if signal_age > max_age:
-            return False, f"signal_expired_{signal_age.total_seconds()/60:.0f}min"
-        
-        # Check 3: Trading hours (Alpaca only)
-        if not is_crypto:
+        symbols = signals['symbol'].astype('category')
+        
+        # Determine exchange/asset type once per distinct symbol, then map
+        # through the category codes (code -1, a missing symbol, hits the
+        # trailing False)
+        categories = symbols.cat.categories.astype(str)
+        crypto_by_category = categories.isin(self._crypto_pairs) | categories.str.endswith('USDT')
+        is_crypto = np.append(crypto_by_category, False)[symbols.cat.codes.to_numpy()]
+        exchange = np.where(is_crypto, 'binance', 'alpaca')
+        
+        limits = pd.DataFrame(
+            {ex: self._exchange_limits(ex) for ex in np.unique(exchange)}
+        ).T.reindex(exchange)
+        
+        confidence = signals['confidence'].to_numpy(dtype=np.float64)
+        
+        # Sinais expiram em 30 minutos (timestamps are UTC, see _load_active_signals)
+        signal_age = self._run_started_utc - signals['timestamp']
+        age_minutes = (signal_age.dt.total_seconds() / 60).to_numpy()
+        
+        # Trading hours only matter for Alpaca, checked once per run
+        market_closed = np.zeros(len(signals), dtype=bool)
+        if not is_crypto.all():
             trading_hours = self.config['alpaca']['trading_hours']
-            if not self._is_market_open(trading_hours):
-                return False, "market_closed"
+            market_closed = ~is_crypto & (not self._is_market_open(trading_hours))
         
-        # Check 4: Portfolio risk limit
-        current_risk = self._calculate_current_risk(exchange)
-        if current_risk >= risk_cfg['max_portfolio_risk_pct']:
-            return False, f"max_risk_exceeded_{current_risk:.1f}%"
+        has_position = (
+            (is_crypto & symbols.isin(self.portfolio_state['binance']['positions'].keys()).to_numpy()) |
+            (~is_crypto & symbols.isin(self.portfolio_state['alpaca']['positions'].keys()).to_numpy())
+        )
         
-        # Check 5: Duplicate position check
-        if symbol in self.portfolio_state[exchange]['positions']:
-            return False, "position_already_exists"
+        current_risk = limits['current_risk'].to_numpy(dtype=np.float64)
+        daily_loss = limits['daily_loss_pct'].to_numpy(dtype=np.float64)
+        max_daily_loss = self.config['risk_management']['max_daily_loss_pct']
+        
+        def _fmt(values, pattern):
+            return pd.Series(values).map(pattern.format).to_numpy(dtype=object)
+        
+        reasons = np.select(
+            [
+                confidence < limits['min_confidence'].to_numpy(dtype=np.float64),
+                age_minutes > 30,
+                market_closed,
+                current_risk >= limits['max_portfolio_risk_pct'].to_numpy(dtype=np.float64),
+                has_position,
+                daily_loss > max_daily_loss,
+            ],
+            [
+                'confidence_too_low_' + _fmt(confidence, '{:.2f}'),
+                'signal_expired_' + _fmt(age_minutes, '{:.0f}min'),
+                'market_closed',
+                'max_risk_exceeded_' + _fmt(current_risk, '{:.1f}%'),
+                'position_already_exists',
+                'daily_loss_limit_hit_' + _fmt(daily_loss, '{:.1f}%'),
+            ],
+            default='valid'
+        )
         
-        # Check 6: Circuit breaker (daily loss limit)
-        daily_pnl = self._calculate_daily_pnl(exchange)
-        max_daily_loss = self.config['signal_execution']['circuit_breaker']['max_daily_loss_pct']
+        return signals.assign(
+            exchange=pd.Categorical.from_codes(is_crypto.astype(np.int8), categories=['alpaca', 'binance']),
+            reject_reason=reasons
+        )
+    
+    def _exchange_limits(self, exchange: str) -> Dict[str, float]:
+        """Risk limits and current risk/daily loss for one exchange"""
+        ctx = self._risk_ctx[exchange]
+        
+        # Circuit breaker (daily loss limit) relative to portfolio value
+        daily_pnl = self._risk_state[exchange]['daily_pnl']
         initial_cash = self.portfolio_state[exchange]['total_value'] or self.portfolio_state[exchange]['cash']
+        daily_loss_pct = abs(daily_pnl / initial_cash * 100) if daily_pnl < 0 and initial_cash else 0.0
         
-        if daily_pnl < 0 and abs(daily_pnl / initial_cash * 100) > max_daily_loss:
-            return False, f"daily_loss_limit_hit_{abs(daily_pnl/initial_cash*100):.1f}%"
+        return {
+            'min_confidence': ctx.min_confidence,
+            'max_portfolio_risk_pct': ctx.max_portfolio_risk_pct,
+            'current_risk': self._risk_state[exchange]['current_risk'],
+            'daily_loss_pct': daily_loss_pct,
+        }
+    
+    def _build_risk_contexts(self) -> Dict[str, RiskContext]:
+        """Flatten each exchange's risk_settings into a RiskContext, once per run"""
+        return {
+            exchange: RiskContext.from_settings(self.config[exchange]['risk_settings'])
+            for exchange in ('alpaca', 'binance')
+        }
+    
+    def _load_risk_state(self) -> Dict[str, Dict[str, float]]:
+        """Daily PnL and current risk per exchange, computed once per run"""
+        return {
+            exchange: {
+                'daily_pnl': self._calculate_daily_pnl(exchange),
+                'current_risk': self._calculate_current_risk(exchange),
+            }
+            for exchange in ('alpaca', 'binance')
+        }
+    
+    def _order_risk_pct(self, exchange: str, position_size: float, price: float) -> float:
+        """Portfolio risk percentage added by one order (as in _calculate_current_risk)"""
+        total_value = self.portfolio_state[exchange]['total_value']
+        if total_value == 0:
+            return 0.0
         
-        return True, "valid"
+        return abs(position_size * price) / total_value * 100
     
     def _is_crypto(self, symbol: str) -> bool:
         """Check if symbol is cryptocurrency"""
-        crypto_pairs = self.config['binance']['trading_pairs']
-        return symbol in crypto_pairs or symbol.endswith('USDT')
+        return symbol in self._crypto_pairs or symbol.endswith('USDT')
     
-    def _is_market_open(self, trading_hours: Dict) -> bool:
-        """Check if US market is open (for Alpaca)"""
-        # TODO: Implementar corretamente com trading_calendars
-        # Por enquanto, apenas verifica horário
-        from datetime import time
-        now = datetime.now()
+    def _is_market_open(self, trading_hours: Dict, now: Optional[pd.Timestamp] = None) -> bool:
+        """
+        Check if US market is open (for Alpaca).
         
-        start = time(9, 30)  # 09:30 EST
-        end = time(16, 0)    # 16:00 EST
+        Uses the XNYS calendar from exchange_calendars when installed
+        (holidays, early closes). Otherwise checks weekday and the
+        configured hours in the configured timezone, so DST is handled.
+        """
+        if now is None:
+            now = pd.Timestamp.now(tz=trading_hours.get('timezone', 'America/New_York'))
         
-        current_time = now.time()
+        if self._nyse is not None:
+            return bool(self._nyse.is_open_on_minute(now))
         
         # Check weekday (0=Monday, 4=Friday)
         if now.weekday() > 4:
             return False
         
-        return start <= current_time <= end
+        start = time.fromisoformat(trading_hours.get('start', '09:30'))
+        end = time.fromisoformat(trading_hours.get('end', '16:00'))
+        
+        return start <= now.time() <= end
     
     def _calculate_current_risk(self, exchange: str) -> float:
         """Calculate current portfolio risk percentage"""
@@ -348,23 +596,15 @@ class SignalExecutionManager:
     
     def _calculate_daily_pnl(self, exchange: str) -> float:
         """Calculate today's PnL for exchange"""
-        query = f"""
-        SELECT SUM(pnl) as daily_pnl
-        FROM paper_trades
-        WHERE exchange = '{exchange}'
-        AND DATE(exit_time) = DATE('now')
-        AND status = 'closed'
-        """
-        
-        result = self.db.query(query)
-        if result.empty:
+        result = self.db.query(DAILY_PNL_QUERY, [exchange])
+        if result.empty or pd.isna(result.iloc[0]['daily_pnl']):
             return 0.0
         
-        return result.iloc[0]['daily_pnl'] or 0.0
+        return float(result.iloc[0]['daily_pnl'])
     
-    def _calculate_position_size(self, signal: pd.Series) -> float:
+    def _calculate_position_sizes(self, signals: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Calculate position size using Kelly Criterion.
+        Calculate position sizes using Kelly Criterion for all signals.
         
         Kelly Formula: f* = (bp - q) / b
         onde:
@@ -373,68 +613,62 @@ class SignalExecutionManager:
         - q = lose probability (1 - p)
         
         Kelly Fraction: Use apenas uma fração do Kelly (ex: 25%)
+        
+        Args:
+            signals: Validated signals with an 'exchange' column
+        
+        Returns:
+            (kelly_pct, position_size) arrays aligned with signals; size is 0
+            when the price is not positive
         """
-        symbol = signal['symbol']
-        is_crypto = self._is_crypto(symbol)
-        exchange = 'binance' if is_crypto else 'alpaca'
+        is_crypto = (signals['exchange'] == 'binance').to_numpy()
         
-        risk_cfg = self.config[exchange]['risk_settings']
-        kelly_fraction = risk_cfg['kelly_fraction']
+        def per_exchange(key):
+            return np.where(
+                is_crypto,
+                getattr(self._risk_ctx['binance'], key),
+                getattr(self._risk_ctx['alpaca'], key)
+            )
         
         # Parâmetros
-        p = signal['confidence']  # Win probability
-        q = 1 - p                 # Lose probability
+        p = signals['confidence'].to_numpy(dtype=np.float64)  # Win probability
         
-        stop_loss_pct = risk_cfg['default_stop_loss_pct'] / 100
-        take_profit_pct = risk_cfg['default_take_profit_pct'] / 100
+        stop_loss_pct = per_exchange('default_stop_loss_pct') / 100
+        take_profit_pct = per_exchange('default_take_profit_pct') / 100
         
         b = take_profit_pct / stop_loss_pct  # Odds
         
-        # Kelly Criterion
-        kelly_pct = (b * p - q) / b
-        
-        # Apply Kelly fraction
-        kelly_pct = max(0, kelly_pct * kelly_fraction)
-        
-        # Apply max position size limit
-        max_position_pct = risk_cfg['max_position_size_pct'] / 100
-        kelly_pct = min(kelly_pct, max_position_pct)
-        
-        # Calculate position value
-        available_cash = self.portfolio_state[exchange]['cash']
-        position_value = available_cash * kelly_pct
-        
-        # Calculate position size (shares/coins)
-        current_price = signal['price']
-        position_size = position_value / current_price
-        
-        logger.info(
-            f"Position size for {symbol}: "
-            f"Kelly={kelly_pct*100:.2f}%, "
-            f"Value=${position_value:.2f}, "
-            f"Size={position_size:.6f}"
+        # Calculate position value and size (shares/coins)
+        available_cash = np.where(
+            is_crypto,
+            self.portfolio_state['binance']['cash'],
+            self.portfolio_state['alpaca']['cash']
         )
         
-        return position_size
+        return _kelly_sizes(
+            p,
+            np.ascontiguousarray(b, dtype=np.float64),
+            per_exchange('kelly_fraction').astype(np.float64),
+            (per_exchange('max_position_size_pct') / 100).astype(np.float64),
+            available_cash.astype(np.float64),
+            signals['price'].to_numpy(dtype=np.float64)
+        )
     
     def _execute_signal(self, signal: pd.Series, position_size: float) -> Tuple[bool, Dict]:
         """
         Execute trading signal via appropriate broker.
         
+        The signal's 'exchange' was set during validation.
+        
         Returns:
             (success, order_info_dict)
         """
         symbol = signal['symbol']
-        is_crypto = self._is_crypto(symbol)
+        exchange = signal['exchange']
         signal_type = signal['signal_type']  # 'buy' or 'sell'
         
         # Select broker
-        if is_crypto:
-            broker = self.ccxt_broker
-            exchange = 'binance'
-        else:
-            broker = self.alpaca_broker
-            exchange = 'alpaca'
+        broker = self.ccxt_broker if exchange == 'binance' else self.alpaca_broker
         
         if broker is None:
             return False, {'error': f'{exchange}_broker_not_initialized'}
@@ -470,7 +704,7 @@ class SignalExecutionManager:
                 'size': position_size,
                 'price': signal['price'],
                 'order_ref': order.ref,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': self._run_started_iso
             }
             
             return True, order_info
@@ -479,6 +713,48 @@ class SignalExecutionManager:
             logger.error(f"Order execution error: {e}")
             return False, {'error': str(e)}
     
+    def _submit_orders(self, orders: List[Tuple[Dict, float]]) -> List[Future]:
+        """
+        Submit orders to the brokers concurrently so round-trips overlap.
+        
+        Each order is a blocking REST call, so a small thread pool overlaps
+        the round-trips. Binance throttling is left to CCXT's built-in rate
+        limiter (enableRateLimit).
+        
+        Returns:
+            One finished future per order, in input order, resolving to
+            _execute_signal's (success, order_info)
+        """
+        if not orders:
+            return []
+        
+        max_workers = self.config['signal_execution'].get('max_concurrent_orders', 4)
+        self._configure_http_pools(max_workers)
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(orders))) as pool:
+            return [pool.submit(self._execute_signal, signal, size) for signal, size in orders]
+    
+    def _configure_http_pools(self, pool_maxsize: int):
+        """
+        Size the brokers' keep-alive HTTP pools for concurrent submissions.
+        
+        CCXT and alpaca-py each hold a requests.Session once their store is
+        started. Without enough pooled connections, concurrent orders open
+        new TCP+TLS connections and the extras are discarded afterwards.
+        """
+        sessions = []
+        exchange = getattr(self.ccxt_store, '_exchange', None)
+        if getattr(exchange, 'session', None) is not None:
+            sessions.append(exchange.session)
+        trading_client = getattr(self.alpaca_store, '_trading_client', None)
+        if getattr(trading_client, '_session', None) is not None:
+            sessions.append(trading_client._session)
+        
+        for session in sessions:
+            adapter = session.get_adapter('https://')
+            if getattr(adapter, '_pool_maxsize', 0) < pool_maxsize:
+                session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize))
+    
     def _create_mock_data(self, symbol: str):
         """Create mock data object for backtrader (temporary)"""
         # TODO: Replace with proper data feed
@@ -487,95 +763,92 @@ class SignalExecutionManager:
         
         return MockData()
     
-    def _update_signal_status(self, signal_id: str, status: str, details: str):
-        """Update realtime_alerts status"""
-        update_query = f"""
-        UPDATE realtime_alerts
-        SET status = '{status}',
-            execution_details = '{details}',
-            execution_time = '{datetime.now().isoformat()}'
-        WHERE id = '{signal_id}'
+    def _update_signal_statuses(self, updates: List[Tuple[str, str, str]]):
+        """
+        Update realtime_alerts status for many signals in one statement.
+        
+        Values are bound as list parameters, so ids and details are never
+        interpolated into the SQL.
+        
+        Args:
+            updates: (signal_id, status, details) tuples
         """
+        if not updates:
+            return
+        
+        signal_ids, statuses, details = (list(column) for column in zip(*updates))
         
-        self.db.execute(update_query)
+        self.db.execute(UPDATE_STATUS_QUERY, [signal_ids, statuses, details, self._run_started_iso])
     
-    def _record_paper_trade(self, signal: pd.Series, position_size: float, order_info: Dict):
-        """Record trade in paper_trades table"""
-        is_crypto = self._is_crypto(signal['symbol'])
-        exchange = 'binance' if is_crypto else 'alpaca'
-        risk_cfg = self.config[exchange]['risk_settings']
-        
-        # Calculate stop-loss and take-profit prices
-        entry_price = signal['price']
-        
-        if signal['signal_type'] == 'buy':
-            stop_loss = entry_price * (1 - risk_cfg['default_stop_loss_pct']/100)
-            take_profit = entry_price * (1 + risk_cfg['default_take_profit_pct']/100)
-        else:  # sell/short
-            stop_loss = entry_price * (1 + risk_cfg['default_stop_loss_pct']/100)
-            take_profit = entry_price * (1 - risk_cfg['default_take_profit_pct']/100)
-        
-        trade_data = {
-            'id': f"{exchange}_{signal['symbol']}_{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            'exchange': exchange,
-            'symbol': signal['symbol'],
-            'side': signal['signal_type'],
+    def _record_paper_trades(self, trades: List[Tuple[Dict, float]]):
+        """
+        Record executed trades in paper_trades table with one insert.
+        
+        Args:
+            trades: (signal, position_size) pairs for executed orders
+        """
+        if not trades:
+            return
+        
+        signals = pd.DataFrame.from_records([signal for signal, _ in trades])
+        position_size = np.array([size for _, size in trades], dtype=np.float64)
+        
+        exchange = signals['exchange'].astype(str)
+        is_crypto = (exchange == 'binance').to_numpy()
+        alpaca, binance = self._risk_ctx['alpaca'], self._risk_ctx['binance']
+        stop_loss_pct = np.where(is_crypto, binance.default_stop_loss_pct, alpaca.default_stop_loss_pct) / 100
+        take_profit_pct = np.where(is_crypto, binance.default_take_profit_pct, alpaca.default_take_profit_pct) / 100
+        
+        # Calculate stop-loss and take-profit prices: below/above entry for
+        # buys, mirrored for sell/short
+        entry_price = signals['price'].to_numpy(dtype=np.float64)
+        sign = np.where(signals['signal_type'].astype(str).to_numpy() == 'buy', -1.0, 1.0)
+        
+        # Index suffix keeps ids unique within a run
+        run_stamp = self._run_started_at.strftime('%Y%m%d%H%M%S')
+        trade_ids = (exchange + '_' + signals['symbol'].astype(str) + f"_{run_stamp}_"
+                     + [str(i) for i in range(len(signals))])
+        
+        df = pd.DataFrame({
+            'id': trade_ids.to_numpy(),
+            'exchange': exchange.to_numpy(),
+            'symbol': signals['symbol'].astype(str).to_numpy(),
+            'side': signals['signal_type'].astype(str).to_numpy(),
             'entry_price': entry_price,
             'position_size': position_size,
-            'stop_loss': stop_loss,
-            'take_profit': take_profit,
-            'entry_time': datetime.now().isoformat(),
+            'stop_loss': entry_price * (1 + sign * stop_loss_pct),
+            'take_profit': entry_price * (1 - sign * take_profit_pct),
+            'entry_time': self._run_started_iso,
             'status': 'open',
-            'sentiment_score': signal['sentiment_score'],
-            'confidence': signal['confidence'],
-            'signal_id': signal['id']
-        }
+            'sentiment_score': signals['sentiment_score'].to_numpy(),
+            'confidence': signals['confidence'].to_numpy(),
+            'signal_id': signals['id'].to_numpy()
+        })
         
         # Insert into database
-        df = pd.DataFrame([trade_data])
-        self.db.save_dataframe(df, 'paper_trades', mode='append')
+        self.db.bulk_insert(df, 'paper_trades')
         
-        logger.info(f"Recorded paper trade: {trade_data['id']}")
+        logger.info(f"Recorded {len(df)} paper trades")
     
     def _update_portfolio_state(self):
-        """Update portfolio_state table with current positions"""
-        timestamp = datetime.now().isoformat()
+        """Update portfolio_state table with current positions (one append for both exchanges)"""
+        timestamp = self._run_started_iso
+        rows = []
         
         for exchange in ['alpaca', 'binance']:
             state = self.portfolio_state[exchange]
             
             # Record overall portfolio
-            portfolio_row = {
-                'timestamp': timestamp,
-                'exchange': exchange,
-                'symbol': 'TOTAL',
-                'position_size': 0,
-                'avg_entry_price': 0,
-                'current_price': 0,
-                'unrealized_pnl': 0,
-                'total_cash': state['cash'],
-                'total_value': state['total_value']
-            }
-            
-            rows = [portfolio_row]
+            rows.append((timestamp, exchange, 'TOTAL', 0.0, 0.0, 0.0, 0.0,
+                         state['cash'], state['total_value']))
             
             # Record each position
             for symbol, pos in state['positions'].items():
-                position_row = {
-                    'timestamp': timestamp,
-                    'exchange': exchange,
-                    'symbol': symbol,
-                    'position_size': pos['size'],
-                    'avg_entry_price': pos['avg_price'],
-                    'current_price': pos['current_price'],
-                    'unrealized_pnl': pos['pnl'],
-                    'total_cash': state['cash'],
-                    'total_value': state['total_value']
-                }
-                rows.append(position_row)
-            
-            df = pd.DataFrame(rows)
-            self.db.save_dataframe(df, 'portfolio_state', mode='append')
+                rows.append((timestamp, exchange, symbol, pos['size'], pos['avg_price'],
+                             pos['current_price'], pos['pnl'], state['cash'], state['total_value']))
+        
+        df = pd.DataFrame.from_records(rows, columns=list(PORTFOLIO_SCHEMA)).astype(PORTFOLIO_SCHEMA)
+        self.db.bulk_insert(df, 'portfolio_state')
         
         logger.info("Portfolio state updated")
 
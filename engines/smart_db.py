@@ -3,14 +3,58 @@ Smart Database Manager
 Handles different data types with intelligent partitioning, deduplication, and organization
 """
 import duckdb
+import numpy as np
+import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 from pathlib import Path
-from typing import Optional, Union, List, Dict, Any
+from typing import Optional, Union, List, Dict, Any, Tuple
 import json
+import uuid
 from datetime import datetime, timedelta, timezone
-import hashlib
 import glob
 
+from engines._fasthash import row_hash_u64
+
+# Hive-style layouts: partition keys live in the directory names, so filters
+# on them prune whole directories before any file is opened. News directories
+# use src= for the store's feed name, which may differ from the rows' source
+# column (Reuters rows stored as Reuters_business)
+MARKET_GLOB = "data/market/source=*/symbol=*/interval=*/*.parquet"
+NEWS_GLOB = "data/news/src=*/year=*/month=*/*.parquet"
+HIVE_OPTIONS = "hive_partitioning=1, hive_types_autocast=0, union_by_name=true"
+
+# Characters that would split or corrupt a key=value path segment (ccxt symbols
+# such as 'BTC/USDT'); DuckDB URL-decodes hive partition values on read
+PARTITION_ESCAPES = str.maketrans({'%': '%25', '/': '%2F', '\\': '%5C', '=': '%3D', "'": '%27'})
+
+
+def encode_partition_value(value: Any) -> str:
+    """Path segment for a partition value, e.g. 'BTC/USDT' -> 'BTC%2FUSDT'"""
+    return str(value).translate(PARTITION_ESCAPES)
+
+
+def sql_string(value: Any) -> str:
+    """SQL string literal for statements that cannot bind parameters (COPY targets, views)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+# One stable view per data type; DuckDB re-expands the glob at query time
+UNIFIED_VIEWS = {
+    'market_data': ('market_all', f"SELECT * FROM read_parquet('{MARKET_GLOB}', {HIVE_OPTIONS})"),
+    'news_data': ('news_all', f"SELECT * EXCLUDE (src, year, month) FROM read_parquet('{NEWS_GLOB}', {HIVE_OPTIONS})"),
+    'analysis_data': ('analysis_all', "SELECT * FROM read_parquet('data/analysis/**/*.parquet', union_by_name=true)"),
+}
+
+# In-memory native copies built by materialize(); query_*_data reads them
+# instead of decoding parquet until the next store of that data type
+HOT_TABLES = {data_type: view.replace('_all', '_hot') for data_type, (view, _) in UNIFIED_VIEWS.items()}
+
+# Rows per parquet row group: small enough for min/max statistics to skip
+# groups on timestamp filters, large enough to keep per-group overhead low
+ROW_GROUP_SIZE = 131072
+
 
 class SmartDatabaseManager:
     """
@@ -38,7 +82,20 @@ class SmartDatabaseManager:
         self.data_structure = self.config.get("data_structure", {})
         self.schemas = self.config.get("schemas", {})
         
+        # Parsed once: store_* calls look these up on every batch
+        dedup_enabled = self.config.get("settings", {}).get("deduplication_enabled", True)
+        self._dedup_keys: Dict[str, List[str]] = {
+            data_type: [col.strip() for col in structure.get("deduplication", "").split(",") if col.strip()]
+            if dedup_enabled else []
+            for data_type, structure in self.data_structure.items()
+        }
+        self._created_dirs: set = set()
+        self._hot_tables: set = set()
+        # Append-only part files per directory before a store folds them back
+        self._max_parts = self.config.get("settings", {}).get("max_part_files", 32)
+        
         self._apply_settings()
+        self._configure_parquet()
         self._create_virtual_tables()
     
     def _load_config(self, config_path: str) -> Dict[str, Any]:
@@ -61,6 +118,20 @@ class SmartDatabaseManager:
         if settings.get("enable_object_cache", True):
             self.conn.execute("SET enable_object_cache=true")
     
+    def _configure_parquet(self):
+        """Build parquet write options (DuckDB COPY and pandas) from the config"""
+        codec = self.config.get("database", {}).get("compression", "zstd").lower()
+        level = self.config.get("settings", {}).get("compression_level", 1)
+        
+        self._copy_options = f"FORMAT PARQUET, COMPRESSION {codec.upper()}, ROW_GROUP_SIZE {ROW_GROUP_SIZE}"
+        self._parquet_kwargs = {'engine': 'pyarrow', 'compression': codec,
+                                'row_group_size': ROW_GROUP_SIZE, 'index': False}
+        self._arrow_write_options = {'compression': codec}
+        if codec == 'zstd':
+            self._copy_options += f", COMPRESSION_LEVEL {level}"
+            self._parquet_kwargs['compression_level'] = level
+            self._arrow_write_options['compression_level'] = level
+    
     def _create_virtual_tables(self):
         """Create virtual tables that query parquet files directly"""
         for data_type, structure in self.data_structure.items():
@@ -70,13 +141,31 @@ class SmartDatabaseManager:
                 self.conn.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
             except:
                 pass
+        
+        self._unified_views: set = set()
+        for data_type in UNIFIED_VIEWS:
+            self._ensure_unified_view(data_type)
+    
+    def _ensure_unified_view(self, data_type: str):
+        """Create the data type's *_all view once its first file exists"""
+        if data_type in self._unified_views:
+            return
+        view_name, select = UNIFIED_VIEWS[data_type]
+        try:
+            # DuckDB binds the view's schema at creation, so this fails until
+            # the glob matches a file
+            self.conn.execute(f"CREATE OR REPLACE VIEW {view_name} AS {select}")
+        except (duckdb.IOException, duckdb.BinderException):
+            return
+        self._unified_views.add(data_type)
     
-    def _get_data_path(self, data_type: str, **kwargs) -> Path:
+    def _get_data_path(self, data_type: str, now: Optional[datetime] = None, **kwargs) -> Path:
         """
         Generate file path based on data type and parameters
         
         Args:
             data_type: Type of data (market_data, news_data, etc.)
+            now: Time used for {year}/{month}/{timestamp} not given in kwargs
             **kwargs: Parameters for path generation (symbol, source, year, etc.)
         """
         structure = self.data_structure.get(data_type, {})
@@ -85,36 +174,64 @@ class SmartDatabaseManager:
         # Replace placeholders
         path_str = path_pattern
         for key, value in kwargs.items():
-            path_str = path_str.replace(f"{{{key}}}", str(value))
+            path_str = path_str.replace(f"{{{key}}}", encode_partition_value(value))
+        
+        if '{' in path_str:
+            now = now or datetime.now()
         
         # Handle date-based partitioning
         if '{year}' in path_str or '{month}' in path_str:
-            now = datetime.now()
             path_str = path_str.replace('{year}', str(now.year))
             path_str = path_str.replace('{month}', f"{now.month:02d}")
         
         # Handle timestamp in filename
         if '{timestamp}' in path_str:
-            path_str = path_str.replace('{timestamp}', datetime.now().strftime('%Y%m%d_%H%M%S'))
+            path_str = path_str.replace('{timestamp}', now.strftime('%Y%m%d_%H%M%S'))
         
         path = Path(path_str)
-        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.parent not in self._created_dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._created_dirs.add(path.parent)
         
         return path
     
     def _calculate_hash(self, df: pd.DataFrame, columns: List[str]) -> pd.Series:
-        """Calculate hash for deduplication"""
-        hash_data = df[columns].astype(str).apply(lambda x: '|'.join(x), axis=1)
-        return hash_data.apply(lambda x: hashlib.md5(x.encode()).hexdigest())
+        """
+        Calculate hash for deduplication
+        
+        Columns are hashed vectorized by pandas and folded into one 64-bit
+        value per row (numba-parallel on large frames), returned as its decimal
+        string (VARCHAR in the schema).
+        """
+        return pd.Series(row_hash_u64(df, columns), index=df.index).astype(str)
+    
+    def _with_defaults(self, df: pd.DataFrame, **defaults: Any) -> pd.DataFrame:
+        """
+        Add metadata columns the caller's frame is missing
+        
+        Works on a shallow copy: new and reassigned columns never touch the
+        caller's frame, and existing column data is not duplicated. Constant
+        string columns are categoricals (one byte per row); DuckDB scans them
+        as ENUMs and writes plain dictionary-encoded strings to parquet.
+        """
+        df = df.copy(deep=False)
+        for column, value in defaults.items():
+            if column in df.columns:
+                continue
+            if isinstance(value, str):
+                codes = np.zeros(len(df), dtype=np.int8)
+                df[column] = pd.Categorical.from_codes(codes, categories=[value])
+            else:
+                df[column] = value
+        return df
+    
+    def _dedup_columns(self, data_type: str) -> List[str]:
+        """Return the configured deduplication columns for a data type"""
+        return self._dedup_keys.get(data_type, [])
     
     def _deduplicate(self, df: pd.DataFrame, data_type: str) -> pd.DataFrame:
         """Remove duplicates based on data type configuration"""
-        if not self.config.get("settings", {}).get("deduplication_enabled", True):
-            return df
-        
-        structure = self.data_structure.get(data_type, {})
-        dedup_columns = structure.get("deduplication", "").split(",")
-        dedup_columns = [col.strip() for col in dedup_columns if col.strip()]
+        dedup_columns = self._dedup_columns(data_type)
         
         if dedup_columns:
             # Check which columns exist in the dataframe
@@ -125,6 +242,130 @@ class SmartDatabaseManager:
         
         return df
     
+    def _write_merged(self, df: pd.DataFrame, file_path: Path, key_columns: List[str],
+                      order_by: Optional[str] = 'timestamp', append: bool = False) -> int:
+        """
+        Merge new rows into a parquet file entirely inside DuckDB
+        
+        The existing file and the new frame are unioned by name, deduplicated
+        on key_columns (new rows win), sorted and written with a single COPY
+        to a temporary file that atomically replaces the target.
+        
+        With append=True the file's directory is the logical table: when every
+        new row sorts after the stored ones (so no dedup key can collide), the
+        rows are written to a new part file and nothing is rewritten. Otherwise,
+        or once the directory holds max_part_files files, all parts are merged
+        back into file_path.
+        
+        Returns:
+            Number of rows written
+        """
+        # DuckDB scans the frame in parallel, so "last row wins" inside the new
+        # batch is resolved in pandas before the merge
+        batch_keys = [col for col in key_columns if col in df.columns]
+        if batch_keys:
+            df = df.drop_duplicates(subset=batch_keys, keep='last')
+        
+        if append:
+            existing_files = sorted(file_path.parent.glob('*.parquet'))
+        else:
+            existing_files = [file_path] if file_path.exists() else []
+        
+        view_name = "_store_new"
+        self.conn.register(view_name, df)
+        try:
+            new_types = dict(
+                row[:2] for row in self.conn.execute(f"DESCRIBE {view_name}").fetchall()
+            )
+            sources = [f"SELECT *, 1 AS _store_rank FROM {view_name}"]
+            keys = [col for col in key_columns if col in new_types]
+            sort_col = order_by if order_by in new_types else None
+            
+            scan_params: Dict[str, Any] = {}
+            if existing_files:
+                # File names are bound, not pasted: sources may contain quotes
+                scan_params['files'] = [str(path) for path in existing_files]
+                # Partition keys come from the path; keep them out of the data files
+                existing_scan = "read_parquet($files, hive_partitioning=false, union_by_name=true)"
+                existing_types = dict(
+                    row[:2] for row in self.conn.execute(
+                        f"DESCRIBE SELECT * FROM {existing_scan}", scan_params
+                    ).fetchall()
+                )
+                keys = [col for col in keys if col in existing_types]
+                # Align naive/UTC timestamps with the incoming frame (as UTC wall time)
+                replacements = [
+                    f'timezone(\'UTC\', "{col}") AS "{col}"'
+                    for col, col_type in existing_types.items()
+                    if col in new_types and col_type != new_types[col]
+                    and {col_type, new_types[col]} <= {'TIMESTAMP', 'TIMESTAMP WITH TIME ZONE'}
+                ]
+                replace = f" REPLACE ({', '.join(replacements)})" if replacements else ""
+                existing_select = f"SELECT *{replace} FROM {existing_scan}"
+                
+                if append and sort_col in keys and len(existing_files) < self._max_parts:
+                    # Only rows at or after the first new timestamp could collide
+                    newer = self.conn.execute(
+                        f'SELECT (SELECT min("{sort_col}") FROM {view_name}) > '
+                        f'(SELECT max("{sort_col}") FROM ({existing_select}))',
+                        scan_params
+                    ).fetchone()[0]
+                    if newer:
+                        part_path = file_path.with_name(
+                            f"part-{uuid.uuid4().hex}.parquet"
+                        )
+                        return self.conn.execute(
+                            f'COPY (SELECT * FROM {view_name} ORDER BY "{sort_col}") '
+                            f"TO {sql_string(part_path)} ({self._copy_options})"
+                        ).fetchone()[0]
+                
+                sources.insert(0, f"SELECT *, 0 AS _store_rank FROM ({existing_select})")
+            
+            query = f"SELECT * FROM ({' UNION ALL BY NAME '.join(sources)})"
+            if keys:
+                partition = ', '.join(f'"{col}"' for col in keys)
+                query += (
+                    f" QUALIFY row_number() OVER (PARTITION BY {partition} "
+                    f"ORDER BY _store_rank DESC) = 1"
+                )
+            if sort_col:
+                query += f' ORDER BY "{sort_col}"'
+            
+            tmp_path = file_path.with_name(file_path.name + '.tmp')
+            rows = self.conn.execute(
+                f"COPY (SELECT * EXCLUDE (_store_rank) FROM ({query})) "
+                f"TO {sql_string(tmp_path)} ({self._copy_options})",
+                scan_params
+            ).fetchone()[0]
+        finally:
+            self.conn.unregister(view_name)
+        
+        os.replace(tmp_path, file_path)
+        # The merged file now holds every part
+        for path in existing_files:
+            if path != file_path:
+                path.unlink()
+        return rows
+    
+    def _select_all(self, data_type: str) -> str:
+        """SELECT over a data type's rows: its hot table if materialized, else parquet"""
+        if data_type in self._hot_tables:
+            return f"SELECT * FROM {HOT_TABLES[data_type]}"
+        return UNIFIED_VIEWS[data_type][1]
+    
+    def _project(self, data_type: str, columns: Optional[List[str]] = None) -> str:
+        """_select_all narrowed to the given columns (DuckDB pushes the projection into the scan)"""
+        if not columns:
+            return self._select_all(data_type)
+        column_list = ", ".join('"' + column.replace('"', '""') + '"' for column in columns)
+        return f"SELECT {column_list} FROM ({self._select_all(data_type)})"
+    
+    def _invalidate_hot(self, data_type: str):
+        """Drop a materialized copy that a store has made stale"""
+        if data_type in self._hot_tables:
+            self.conn.execute(f"DROP TABLE IF EXISTS {HOT_TABLES[data_type]}")
+            self._hot_tables.discard(data_type)
+    
     # ============ MARKET DATA METHODS ============
     
     def store_market_data(self, df: pd.DataFrame, source: str, symbol: str, interval: str):
@@ -133,17 +374,11 @@ class SmartDatabaseManager:
         Ensures uniqueness: symbol + timestamp + source + interval
         """
         # Add metadata
-        df = df.copy()
-        if 'source' not in df.columns:
-            df['source'] = source
-        if 'symbol' not in df.columns:
-            df['symbol'] = symbol
-        if 'interval' not in df.columns:
-            df['interval'] = interval
-        if 'created_at' not in df.columns:
-            df['created_at'] = datetime.now()
-        
-        # Normalize timestamp to timezone-naive for consistency
+        df = self._with_defaults(df, source=source, symbol=symbol, interval=interval,
+                                 created_at=datetime.now())
+        
+        # Normalize timestamp to timezone-naive for consistency (stored rows
+        # are not re-normalized: the merge only casts when the types differ)
         if 'timestamp' in df.columns:
             if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
                 df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -158,70 +393,63 @@ class SmartDatabaseManager:
         if existing_hash_cols:
             df['data_hash'] = self._calculate_hash(df, existing_hash_cols)
         
-        # Deduplicate
-        df = self._deduplicate(df, 'market_data')
-        
         # Get file path
         file_path = self._get_data_path('market_data', source=source, symbol=symbol, interval=interval)
         
-        # Merge with existing data if file exists
-        if file_path.exists():
-            existing_df = pd.read_parquet(file_path)
-            # Normalize existing timestamps too
-            if 'timestamp' in existing_df.columns and hasattr(existing_df['timestamp'].dtype, 'tz') and existing_df['timestamp'].dtype.tz is not None:
-                existing_df['timestamp'] = existing_df['timestamp'].dt.tz_localize(None)
-            
-            df = pd.concat([existing_df, df], ignore_index=True)
-            df = self._deduplicate(df, 'market_data')
-            df = df.sort_values('timestamp')
-        
-        # Save to parquet
-        df.to_parquet(file_path, engine='pyarrow', compression='snappy', index=False)
-        
-        # Create/update virtual table
-        table_name = f"market_{source}_{symbol}_{interval}".replace('/', '_').replace('-', '_')
-        self.conn.execute(f"CREATE OR REPLACE VIEW {table_name} AS SELECT * FROM read_parquet('{file_path}')")
+        # Merge with existing data, deduplicate, sort and save in one DuckDB pass
+        rows = self._write_merged(df, file_path, self._dedup_columns('market_data'), append=True)
+        self._invalidate_hot('market_data')
+        self._ensure_unified_view('market_data')
         
-        print(f"✓ Stored {len(df)} market data rows: {symbol} ({source}/{interval})")
+        print(f"✓ Stored {rows} market data rows: {symbol} ({source}/{interval})")
         return file_path
     
     def query_market_data(self, symbol: Optional[str] = None, source: Optional[str] = None,
                          start_date: Optional[str] = None, end_date: Optional[str] = None,
-                         interval: Optional[str] = None) -> pd.DataFrame:
-        """Query market data across all sources with filters"""
-        # Check if any parquet files exist before attempting query
-        market_dir = Path("data/market")
-        if not market_dir.exists() or not any(market_dir.rglob("*.parquet")):
-            print(f"[SmartDB] No parquet files found in data/market")
-            return pd.DataFrame()
-        
-        pattern = "data/market/**/*.parquet"
+                         interval: Optional[str] = None,
+                         columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Query market data across all sources with filters
         
-        query = f"SELECT * FROM read_parquet('{pattern}')"
+        columns limits the result (and the parquet columns decoded) to the
+        given names; filters may still use columns outside it.
+        """
+        query = self._project('market_data', columns)
         conditions = []
+        params = []
         
         if symbol:
-            conditions.append(f"symbol = '{symbol}'")
+            conditions.append("symbol = ?")
+            params.append(symbol)
         if source:
-            conditions.append(f"source = '{source}'")
+            conditions.append("source = ?")
+            params.append(source)
         if interval:
-            conditions.append(f"interval = '{interval}'")
+            conditions.append("interval = ?")
+            params.append(interval)
         if start_date:
-            conditions.append(f"timestamp >= '{start_date}'")
+            conditions.append("timestamp >= CAST(? AS TIMESTAMP)")
+            params.append(start_date)
         if end_date:
-            conditions.append(f"timestamp <= '{end_date}'")
+            conditions.append("timestamp <= CAST(? AS TIMESTAMP)")
+            params.append(end_date)
         
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
         
         query += " ORDER BY timestamp"
         
-        print(f"[SmartDB] Executing query: {query}")
+        print(f"[SmartDB] Executing query: {query} {params}")
         
+        # No up-front directory walk: DuckDB expands the glob itself and
+        # raises IOException when nothing matches
         try:
-            result = self.conn.execute(query).df()
+            result = self.conn.execute(query, params).df()
             print(f"[SmartDB] Query successful: {len(result)} rows")
             return result
+        except duckdb.IOException:
+            print(f"[SmartDB] No parquet files found in data/market")
+            return pd.DataFrame()
         except Exception as e:
             print(f"[SmartDB] Query error: {e}")
             return pd.DataFrame()
@@ -233,95 +461,117 @@ class SmartDatabaseManager:
         Store news/RSS data partitioned by date OF THE DATA (not current date)
         Ensures uniqueness: link + timestamp
         """
-        df = df.copy()
-        if 'source' not in df.columns:
-            df['source'] = source
-        if 'created_at' not in df.columns:
-            df['created_at'] = datetime.now(timezone.utc)
+        df = self._with_defaults(df, source=source, created_at=datetime.now(timezone.utc))
         
-        # Ensure timestamp is datetime
+        # Ensure timestamp is UTC datetime (frames from the collectors usually
+        # already are, so skip the conversion then)
         if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+            tz = getattr(df['timestamp'].dtype, 'tz', None)
+            if tz is None:
+                df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+            elif str(tz) != 'UTC':
+                df['timestamp'] = df['timestamp'].dt.tz_convert('UTC')
         
         # Calculate hash for deduplication
         if 'link' in df.columns and 'timestamp' in df.columns:
             df['content_hash'] = self._calculate_hash(df, ['link', 'timestamp'])
         
-        # Deduplicate
-        df = self._deduplicate(df, 'news_data')
-        
         # Partition by year/month of the DATA timestamp (not current date)
         df['_year'] = df['timestamp'].dt.year
         df['_month'] = df['timestamp'].dt.month
         
         saved_files = []
         total_saved = 0
+        dedup_keys = self._dedup_columns('news_data')
+        fresh_partitions = []
         
-        # Process each partition separately
+        # Partitions already on disk are merged one by one
         for (year, month), group_df in df.groupby(['_year', '_month']):
-            # Remove auxiliary columns
-            group_df = group_df.drop(columns=['_year', '_month'])
-            
             # Get file path based on data timestamp
             file_path = self._get_data_path('news_data', source=source, year=int(year), month=int(month))
+            if not any(file_path.parent.glob('*.parquet')):
+                fresh_partitions.append((year, month))
+                continue
             
-            # Merge with existing data
-            if file_path.exists():
-                existing_df = pd.read_parquet(file_path)
-                
-                # Normalize timestamps to timezone-aware UTC
-                if 'timestamp' in existing_df.columns:
-                    existing_df['timestamp'] = pd.to_datetime(existing_df['timestamp'], utc=True)
-                if 'created_at' in existing_df.columns:
-                    existing_df['created_at'] = pd.to_datetime(existing_df['created_at'], utc=True)
-                
-                group_df = pd.concat([existing_df, group_df], ignore_index=True)
-                group_df = self._deduplicate(group_df, 'news_data')
-                group_df = group_df.sort_values('timestamp')
-            
-            # Save to parquet
-            group_df.to_parquet(file_path, engine='pyarrow', compression='snappy', index=False)
+            # Merge with existing data (duplicates share a partition, as the
+            # dedup key includes the timestamp)
+            group_df = group_df.drop(columns=['_year', '_month'])
+            total_saved += self._write_merged(group_df, file_path, dedup_keys, append=True)
             saved_files.append(file_path)
-            total_saved += len(group_df)
-            
-            # Create/update virtual table (sanitize source name for SQL)
-            clean_source = source.replace('/', '_').replace('-', '_').replace(' ', '_').replace('.', '_')
-            table_name = f"news_{clean_source}_{year}_{month:02d}"
-            self.conn.execute(f"CREATE OR REPLACE VIEW {table_name} AS SELECT * FROM read_parquet('{file_path}')")
-        
-        # Create unified view for the source
-        clean_source = source.replace('/', '_').replace('-', '_').replace(' ', '_').replace('.', '_')
-        news_dir = Path("data/news") / source
-        if news_dir.exists():
-            pattern = str(news_dir / "**/*.parquet")
-            self.conn.execute(f"CREATE OR REPLACE VIEW news_{clean_source} AS SELECT * FROM read_parquet('{pattern}')")
+        
+        # New partitions (e.g. a backfill) are written in a single pass
+        if fresh_partitions:
+            partition_index = pd.MultiIndex.from_arrays([df['_year'], df['_month']])
+            fresh_df = df[partition_index.isin(fresh_partitions)]
+            rows, written = self._write_news_partitions(fresh_df, file_path.parents[2], dedup_keys)
+            total_saved += rows
+            saved_files.extend(written)
+        
+        self._ensure_unified_view('news_data')
+        self._invalidate_hot('news_data')
         
         print(f"✓ Stored {total_saved} news entries in {len(saved_files)} file(s): {source}")
-        return saved_files
+        return sorted(saved_files)
     
-    def query_news_data(self, source: Optional[str] = None, category: Optional[str] = None,
-                       start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
-        """Query news data across all sources with filters"""
-        # Check if any parquet files exist
-        news_dir = Path("data/news")
-        if not news_dir.exists() or not any(news_dir.rglob("*.parquet")):
-            print(f"[SmartDB] No parquet files found in data/news")
-            return pd.DataFrame()
+    def _write_news_partitions(self, df: pd.DataFrame, source_dir: Path,
+                               dedup_keys: List[str]) -> Tuple[int, List[Path]]:
+        """
+        Write news rows for partitions that have no files yet
+        
+        Deduplicates once over the whole frame, then pyarrow writes every
+        year=/month= directory under source_dir in one multithreaded pass.
         
-        pattern = "data/news/**/*.parquet"
+        Returns:
+            Rows written and the files created
+        """
+        keys = [col for col in dedup_keys if col in df.columns]
+        if keys:
+            df = df.drop_duplicates(subset=keys, keep='last')
+        df = df.rename(columns={'_year': 'year', '_month': 'month'})
+        if 'timestamp' in df.columns:
+            df = df.sort_values('timestamp')
         
-        # Use union_by_name to handle schema differences
-        query = f"SELECT * FROM read_parquet('{pattern}', union_by_name=true)"
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        file_format = ds.ParquetFileFormat()
+        written: List[Path] = []
+        ds.write_dataset(
+            table, source_dir, format=file_format,
+            file_options=file_format.make_write_options(**self._arrow_write_options),
+            partitioning=['year', 'month'], partitioning_flavor='hive',
+            basename_template='data{i}.parquet',
+            existing_data_behavior='overwrite_or_ignore',
+            max_rows_per_group=ROW_GROUP_SIZE,
+            file_visitor=lambda written_file: written.append(Path(written_file.path)),
+        )
+        return len(df), written
+    
+    def query_news_data(self, source: Optional[str] = None, category: Optional[str] = None,
+                       start_date: Optional[str] = None, end_date: Optional[str] = None,
+                       columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Query news data across all sources with filters
+        
+        columns limits the result (and the parquet columns decoded) to the
+        given names; filters may still use columns outside it.
+        """
+        # src/year/month are directory keys only; the rows carry their own
+        # source and the full timestamp
+        query = self._project('news_data', columns)
         conditions = []
+        params = []
         
         if source:
-            conditions.append(f"source = '{source}'")
+            conditions.append("source = ?")
+            params.append(source)
         if category:
-            conditions.append(f"category = '{category}'")
+            conditions.append("category = ?")
+            params.append(category)
         if start_date:
-            conditions.append(f"timestamp >= '{start_date}'")
+            conditions.append("timestamp >= CAST(? AS TIMESTAMPTZ)")
+            params.append(start_date)
         if end_date:
-            conditions.append(f"timestamp <= '{end_date}'")
+            conditions.append("timestamp <= CAST(? AS TIMESTAMPTZ)")
+            params.append(end_date)
         
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
@@ -329,7 +579,10 @@ class SmartDatabaseManager:
         query += " ORDER BY timestamp DESC"
         
         try:
-            return self.conn.execute(query).df()
+            return self.conn.execute(query, params).df()
+        except duckdb.IOException:
+            print(f"[SmartDB] No parquet files found in data/news")
+            return pd.DataFrame()
         except Exception as e:
             print(f"Query error: {e}")
             return pd.DataFrame()
@@ -341,29 +594,27 @@ class SmartDatabaseManager:
         Store reference data (symbols, exchanges, etc.)
         Single file per entity type, updated on merge
         """
-        df = df.copy()
-        if 'last_updated' not in df.columns:
-            df['last_updated'] = datetime.now()
-        
-        file_path = self._get_data_path('reference_data', entity_type=entity_type)
-        
-        # Merge with existing data
-        if file_path.exists():
-            existing_df = pd.read_parquet(file_path)
-            
-            # Determine key column
-            key_col = 'symbol' if entity_type == 'symbols' else f"{entity_type}_id"
-            if key_col in df.columns and key_col in existing_df.columns:
-                # Update existing records, add new ones
-                existing_df = existing_df[~existing_df[key_col].isin(df[key_col])]
-                df = pd.concat([existing_df, df], ignore_index=True)
-        
-        df.to_parquet(file_path, engine='pyarrow', compression='snappy', index=False)
+        now = datetime.now()
+        df = self._with_defaults(df, last_updated=now)
+        
+        file_path = self._get_data_path('reference_data', now=now, entity_type=entity_type)
+        
+        # Merge with existing data: update existing records, add new ones
+        key_col = 'symbol' if entity_type == 'symbols' else f"{entity_type}_id"
+        mergeable = key_col in df.columns and (
+            not file_path.exists() or key_col in ds.dataset(file_path).schema.names
+        )
+        if mergeable:
+            rows = self._write_merged(df, file_path, [key_col], order_by=None)
+        else:
+            # Nothing to match records on: the new frame replaces the file
+            df.to_parquet(file_path, **self._parquet_kwargs)
+            rows = len(df)
         
         table_name = f"ref_{entity_type}"
-        self.conn.execute(f"CREATE OR REPLACE VIEW {table_name} AS SELECT * FROM read_parquet('{file_path}')")
+        self.conn.execute(f"CREATE OR REPLACE VIEW {table_name} AS SELECT * FROM read_parquet({sql_string(file_path)})")
         
-        print(f"✓ Stored {len(df)} reference records: {entity_type}")
+        print(f"✓ Stored {rows} reference records: {entity_type}")
         return file_path
     
     # ============ ANALYSIS DATA METHODS ============
@@ -373,25 +624,20 @@ class SmartDatabaseManager:
         Store analysis/ML predictions partitioned by analysis type and symbol
         Ensures uniqueness: symbol + timestamp + analysis_type + model_version
         """
-        df = df.copy()
-        if 'analysis_type' not in df.columns:
-            df['analysis_type'] = analysis_type
-        if 'symbol' not in df.columns:
-            df['symbol'] = symbol
-        if 'created_at' not in df.columns:
-            df['created_at'] = datetime.now()
+        now = datetime.now()
+        df = self._with_defaults(df, analysis_type=analysis_type, symbol=symbol, created_at=now)
         
         # Deduplicate
         df = self._deduplicate(df, 'analysis_data')
         
         # Get file path with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        file_path = self._get_data_path('analysis_data', 
+        file_path = self._get_data_path('analysis_data', now=now,
                                        analysis_type=analysis_type,
-                                       symbol=symbol,
-                                       timestamp=timestamp)
+                                       symbol=symbol)
         
-        df.to_parquet(file_path, engine='pyarrow', compression='snappy', index=False)
+        df.to_parquet(file_path, **self._parquet_kwargs)
+        self._ensure_unified_view('analysis_data')
+        self._invalidate_hot('analysis_data')
         
         print(f"✓ Stored {len(df)} analysis records: {analysis_type}/{symbol}")
         return file_path
@@ -399,18 +645,25 @@ class SmartDatabaseManager:
     def query_analysis_data(self, analysis_type: Optional[str] = None, 
                            symbol: Optional[str] = None) -> pd.DataFrame:
         """Query analysis data"""
+        if 'analysis_data' in self._hot_tables:
+            df = self.conn.execute(self._select_all('analysis_data')).df()
+            return self._filter_analysis(df, analysis_type, symbol)
+        
         base_dir = Path("data/analysis")
         if not base_dir.exists():
             print("[SmartDB] No analysis directory found")
             return pd.DataFrame()
 
         # Build a scoped glob pattern to avoid mixing schemas lacking analysis_type
+        # (directory names hold the encoded values, as written by _get_data_path)
+        analysis_dir = encode_partition_value(analysis_type) if analysis_type else None
+        symbol_dir = encode_partition_value(symbol) if symbol else None
         if analysis_type and symbol:
-            pattern = f"data/analysis/{analysis_type}/{symbol}/**/*.parquet"
+            pattern = f"data/analysis/{analysis_dir}/{symbol_dir}/**/*.parquet"
         elif analysis_type:
-            pattern = f"data/analysis/{analysis_type}/**/*.parquet"
+            pattern = f"data/analysis/{analysis_dir}/**/*.parquet"
         elif symbol:
-            pattern = f"data/analysis/*/{symbol}/**/*.parquet"
+            pattern = f"data/analysis/*/{symbol_dir}/**/*.parquet"
         else:
             pattern = "data/analysis/**/*.parquet"
 
@@ -419,7 +672,7 @@ class SmartDatabaseManager:
             print(f"[SmartDB] No analysis parquet files for pattern: {pattern}")
             return pd.DataFrame()
 
-        query = f"SELECT * FROM read_parquet('{pattern}')"
+        query = f"SELECT * FROM read_parquet({sql_string(pattern)})"
 
         try:
             df = self.conn.execute(query).df()
@@ -433,6 +686,11 @@ class SmartDatabaseManager:
                     print(f"  Skipping unreadable file {file_path}: {read_exc}")
             df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
+        return self._filter_analysis(df, analysis_type, symbol)
+    
+    def _filter_analysis(self, df: pd.DataFrame, analysis_type: Optional[str],
+                         symbol: Optional[str]) -> pd.DataFrame:
+        """Apply query_analysis_data's filters and ordering to loaded rows"""
         if df.empty:
             return df
 
@@ -460,30 +718,77 @@ class SmartDatabaseManager:
         Store calculated metrics partitioned by metric type
         Ensures uniqueness: symbol + timestamp + metric_type
         """
-        df = df.copy()
-        if 'metric_type' not in df.columns:
-            df['metric_type'] = metric_type
-        if 'symbol' not in df.columns:
-            df['symbol'] = symbol
-        if 'created_at' not in df.columns:
-            df['created_at'] = datetime.now()
-        
-        df = self._deduplicate(df, 'metrics_data')
+        df = self._with_defaults(df, metric_type=metric_type, symbol=symbol,
+                                 created_at=datetime.now())
         
         file_path = self._get_data_path('metrics_data', metric_type=metric_type, symbol=symbol)
         
         # Merge with existing
-        if file_path.exists():
-            existing_df = pd.read_parquet(file_path)
-            df = pd.concat([existing_df, df], ignore_index=True)
-            df = self._deduplicate(df, 'metrics_data')
-            df = df.sort_values('timestamp')
-        
-        df.to_parquet(file_path, engine='pyarrow', compression='snappy', index=False)
+        rows = self._write_merged(df, file_path, self._dedup_columns('metrics_data'))
         
-        print(f"✓ Stored {len(df)} metrics: {metric_type}/{symbol}")
+        print(f"✓ Stored {rows} metrics: {metric_type}/{symbol}")
         return file_path
     
+    # ============ TABLE METHODS ============
+    
+    def query(self, sql: str, params: Optional[List[Any]] = None) -> pd.DataFrame:
+        """
+        Execute a SQL query and return results as DataFrame
+        
+        Args:
+            sql: SQL query string, with ? or $n placeholders for params
+            params: Values bound to the placeholders
+        
+        Returns:
+            Query results as DataFrame
+        """
+        return self.conn.execute(sql, params).df()
+    
+    def execute(self, sql: str, params: Optional[List[Any]] = None):
+        """
+        Execute a SQL statement with bound parameters (no result expected)
+        
+        Args:
+            sql: SQL statement, with ? or $n placeholders for params
+            params: Values bound to the placeholders
+        """
+        self.conn.execute(sql, params)
+    
+    def bulk_insert(self, df: pd.DataFrame, table_name: str) -> int:
+        """
+        Append a DataFrame to a DuckDB table in one vectorized statement
+        
+        DuckDB scans the DataFrame directly (no per-row INSERTs). The table
+        is created from the frame's schema on first use, new columns are
+        added to it, and columns are matched by name afterwards.
+        
+        Returns:
+            Number of rows inserted
+        """
+        if df.empty:
+            return 0
+        
+        view_name = f"_bulk_{table_name}"
+        self.conn.register(view_name, df)
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table_name} AS SELECT * FROM {view_name} LIMIT 0"
+            )
+            existing = {row[0] for row in self.conn.execute(f"DESCRIBE {table_name}").fetchall()}
+            for column, column_type, *_ in self.conn.execute(f"DESCRIBE {view_name}").fetchall():
+                if column not in existing:
+                    self.conn.execute(f'ALTER TABLE {table_name} ADD COLUMN "{column}" {column_type}')
+            self.conn.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM {view_name}")
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        finally:
+            self.conn.unregister(view_name)
+        
+        return len(df)
+    
     # ============ UTILITY METHODS ============
     
     def get_navigation_map(self) -> Dict[str, Any]:
@@ -533,13 +838,20 @@ class SmartDatabaseManager:
             try:
                 pattern = self.data_structure[data_type]['path_pattern']
                 # Count files matching pattern
-                base_path = Path(pattern.split('{')[0])
+                base_path = Path(os.path.dirname(pattern.split('{')[0]))
                 if base_path.exists():
-                    files = list(base_path.rglob('*.parquet'))
-                    total_size = sum(f.stat().st_size for f in files) / (1024**2)  # MB
+                    # One scan over the parquet footers instead of a stat() per file
+                    try:
+                        files, size, rows = self.conn.execute(
+                            "SELECT count(*), sum(file_size_bytes), sum(num_rows) FROM parquet_file_metadata(?)",
+                            [f"{base_path.as_posix()}/**/*.parquet"]
+                        ).fetchone()
+                    except duckdb.IOException:
+                        files, size, rows = 0, 0, 0  # no parquet files yet
                     summary[data_type] = {
-                        'files': len(files),
-                        'size_mb': round(total_size, 2)
+                        'files': files,
+                        'size_mb': round((size or 0) / (1024**2), 2),
+                        'rows': int(rows or 0)
                     }
             except:
                 pass
@@ -586,6 +898,61 @@ class SmartDatabaseManager:
             # Implementation depends on partition strategy
             # This is a placeholder for the actual cleanup logic
     
+    def materialize(self, data_type: str = 'market_data') -> int:
+        """
+        Copy a data type's parquet rows into an in-memory DuckDB table
+        
+        Repeated query_*_data calls (dashboards) then scan native storage and
+        skip parquet decoding. The copy lives for this connection and is
+        dropped by the next store_* call for the same data type.
+        
+        Args:
+            data_type: market_data, news_data or analysis_data
+        
+        Returns:
+            Number of rows materialized
+        """
+        table_name = HOT_TABLES[data_type]
+        self.conn.execute(
+            f"CREATE OR REPLACE TEMP TABLE {table_name} AS {UNIFIED_VIEWS[data_type][1]}"
+        )
+        self._hot_tables.add(data_type)
+        rows = self.conn.execute(f"SELECT count(*) FROM {table_name}").fetchone()[0]
+        print(f"✓ Materialized {rows} {data_type} rows into {table_name}")
+        return rows
+    
+    def compact(self, data_type: str = 'market_data', threshold: int = 1) -> int:
+        """
+        Merge the part files of every series/partition directory into data.parquet
+        
+        Args:
+            data_type: market_data or news_data (the append-only layouts)
+            threshold: Only compact directories holding more files than this
+        
+        Returns:
+            Number of directories compacted
+        """
+        pattern = {'market_data': MARKET_GLOB, 'news_data': NEWS_GLOB}[data_type]
+        directories: Dict[Path, List[str]] = {}
+        for file_name in glob.glob(pattern):
+            directories.setdefault(Path(file_name).parent, []).append(file_name)
+        
+        compacted = 0
+        for directory, files in directories.items():
+            if len(files) <= threshold:
+                continue
+            # An empty batch with the stored schema makes _write_merged fold
+            # every part into data.parquet
+            empty = self.conn.execute(
+                "SELECT * FROM read_parquet(?, hive_partitioning=false, union_by_name=true) LIMIT 0",
+                [files]
+            ).df()
+            self._write_merged(empty, directory / 'data.parquet', self._dedup_columns(data_type), append=True)
+            compacted += 1
+        
+        print(f"✓ Compacted {compacted} {data_type} director{'y' if compacted == 1 else 'ies'}")
+        return compacted
+    
     def vacuum(self):
         """Optimize database"""
         print("Running VACUUM...")
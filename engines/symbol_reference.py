@@ -3,24 +3,113 @@
 Symbol Reference Engine
 Maintains official lists of stock and crypto symbols
 """
+import csv
 import sys
 import os
+import re
 from pathlib import Path
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import json
+import mmap
 import logging
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Set, Optional
+from typing import BinaryIO, Dict, FrozenSet, List, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from time import sleep
 
 sys.path.insert(0, os.path.abspath('.'))
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 from engines.smart_db import SmartDatabaseManager
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Schema metadata key holding the non-tabular cache fields (updated_at, ETags)
+CACHE_METADATA_KEY = b'symbol_reference'
+
+# Caches smaller than this are read normally; mmap setup is not worth it
+MMAP_MIN_BYTES = 64 * 1024
+
+# Ticker patterns used by match_text_to_symbols, compiled once at import
+_DOLLAR_RE = re.compile(r'\$([A-Z]{1,10})\b')           # $SYMBOL
+_PAREN_RE = re.compile(r'\(([A-Z]{2,10})\)')            # Apple (AAPL)
+_CRYPTO_PAIR_RE = re.compile(r'\b([A-Z]{2,6})USDT\b')   # BTCUSDT
+_WORD_RE = re.compile(r'\b([A-Z]{2,5})\b')              # standalone tickers
+_HAS_CAPS_RE = re.compile(r'\$[A-Z]|[A-Z]{2}')          # any pattern 1/2/4 candidate
+
+# Common company/crypto names mapped to their symbols (only major ones)
+_NAME_TO_SYMBOL = {
+    'BITCOIN': 'BTCUSDT',
+    'ETHEREUM': 'ETHUSDT',
+    'APPLE': 'AAPL',
+    'MICROSOFT': 'MSFT',
+    'GOOGLE': 'GOOGL',
+    'AMAZON': 'AMZN',
+    'TESLA': 'TSLA',
+    'META': 'META',
+    'FACEBOOK': 'META',
+    'NVIDIA': 'NVDA',
+}
+
+
+def _build_name_finder():
+    """
+    Return a function that finds every name of _NAME_TO_SYMBOL in an
+    uppercased text in a single pass, yielding (position, symbol) pairs.
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, otherwise
+    one alternation regex inside a lookahead so overlapping names are still
+    all reported.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for name, symbol in _NAME_TO_SYMBOL.items():
+            automaton.add_word(name, symbol)
+        automaton.make_automaton()
+        return automaton.iter
+    
+    names = sorted(_NAME_TO_SYMBOL, key=len, reverse=True)
+    pattern = re.compile('(?=(' + '|'.join(map(re.escape, names)) + '))')
+    return lambda text: ((m.start(), _NAME_TO_SYMBOL[m.group(1)]) for m in pattern.finditer(text))
+
+
+_find_names = _build_name_finder()
+
+# Joins texts in match_texts_to_symbols; no ticker pattern or name contains it
+_TEXT_SEP = '\x1f'
+
+# Substrings that mark a database symbol as a crypto pair
+_CRYPTO_MARKERS_RE = re.compile('USDT|USD|BTC|ETH')
+
+# Coins that also get a plain USD pair in the CoinGecko list
+_USD_PAIR_BASES = frozenset({'BTC', 'ETH', 'BNB'})
+
+# Uppercase words that look like tickers but are not
+_STOPWORDS = frozenset({
+    'THE', 'AND', 'FOR', 'ARE', 'BUT', 'NOT', 'YOU', 'ALL',
+    'CAN', 'WAS', 'ONE', 'OUR', 'OUT', 'DAY', 'GET', 'HAS',
+    'NEW', 'NOW', 'OLD', 'SEE', 'TWO', 'WAY', 'WHO', 'WHY',
+    'USA', 'CEO', 'CFO', 'CTO', 'SEC', 'FDA', 'FBI', 'CIA',
+    'NYSE', 'IPO', 'API', 'USD', 'EUR', 'GBP', 'JPY', 'ATH',
+    'ETF', 'IRS', 'LLC', 'INC', 'LTD', 'CORP', 'CO', 'GROUP',
+})
+
 
 class SymbolReferenceEngine:
     """Engine to manage and validate financial symbols"""
@@ -30,40 +119,122 @@ class SymbolReferenceEngine:
         self.cache_file = Path(cache_file)
         self.smart_db = SmartDatabaseManager()
         self.symbols_data = self._load_cache()
+        self._all_symbols: Optional[FrozenSet[str]] = None
+        self._session = self._create_session()
+    
+    def _create_session(self) -> requests.Session:
+        """Create a pooled requests session that backs off on rate limits"""
+        session = requests.Session()
+        
+        # CoinGecko answers 429 when throttled; honour its Retry-After
+        retry_strategy = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=["HEAD", "GET", "OPTIONS"],
+            respect_retry_after_header=True
+        )
+        
+        adapter = HTTPAdapter(max_retries=retry_strategy)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        
+        return session
+    
+    @property
+    def parquet_cache_file(self) -> Path:
+        """Parquet cache written next to the legacy JSON cache"""
+        return self.cache_file.with_suffix('.parquet')
     
     def _load_cache(self) -> Dict:
-        """Load cached symbol data"""
-        if self.cache_file.exists():
+        """Load cached symbol data (Parquet first, legacy JSON as fallback)"""
+        for path, loader in ((self.parquet_cache_file, self._read_parquet_cache),
+                             (self.cache_file, self._read_json_cache)):
+            if not path.exists():
+                continue
             try:
-                with open(self.cache_file, 'r') as f:
-                    data = json.load(f)
+                data = loader(path)
                 logger.info(f"Loaded {len(data.get('stocks', {}))} stocks, {len(data.get('cryptos', {}))} cryptos from cache")
                 return data
             except Exception as e:
-                logger.error(f"Error loading cache: {e}")
+                logger.error(f"Error loading cache {path}: {e}")
         
         return {'stocks': {}, 'cryptos': {}, 'updated_at': None}
     
+    @staticmethod
+    def _read_parquet_cache(path: Path) -> Dict:
+        """Rebuild the stocks/cryptos dicts from the (kind, symbol, name) table"""
+        table = pq.read_table(path)
+        metadata = table.schema.metadata or {}
+        data = json.loads(metadata.get(CACHE_METADATA_KEY, b'{}'))
+        
+        for kind in ('stocks', 'cryptos'):
+            rows = table.filter(pc.equal(table['kind'], kind))
+            data[kind] = dict(zip(rows['symbol'].to_pylist(), rows['name'].to_pylist()))
+        return data
+    
+    @staticmethod
+    def _read_json_cache(path: Path) -> Dict:
+        """Read the legacy JSON cache"""
+        if orjson is not None and path.stat().st_size >= MMAP_MIN_BYTES:
+            # Parse straight from the page cache, skipping the read copy
+            with open(path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    return orjson.loads(view)
+                finally:
+                    view.release()
+        if orjson is not None:
+            return orjson.loads(path.read_bytes())
+        with open(path, 'r') as f:
+            return json.load(f)
+    
     def _save_cache(self):
-        """Save symbol data to cache"""
+        """Save symbol data to the Parquet cache"""
         self.cache_file.parent.mkdir(parents=True, exist_ok=True)
         self.symbols_data['updated_at'] = datetime.now().isoformat()
         
-        with open(self.cache_file, 'w') as f:
-            json.dump(self.symbols_data, f, indent=2)
+        stocks = self.symbols_data['stocks']
+        cryptos = self.symbols_data['cryptos']
+        table = pa.table({
+            'kind': ['stocks'] * len(stocks) + ['cryptos'] * len(cryptos),
+            'symbol': list(stocks) + list(cryptos),
+            'name': list(stocks.values()) + list(cryptos.values()),
+        })
+        # updated_at, ETags and any other scalar fields ride in the schema metadata
+        metadata = {k: v for k, v in self.symbols_data.items() if k not in ('stocks', 'cryptos')}
+        table = table.replace_schema_metadata({CACHE_METADATA_KEY: json.dumps(metadata)})
+        pq.write_table(table, self.parquet_cache_file, compression='zstd')
         
-        logger.info(f"Cache saved: {len(self.symbols_data['stocks'])} stocks, {len(self.symbols_data['cryptos'])} cryptos")
+        logger.info(f"Cache saved: {len(stocks)} stocks, {len(cryptos)} cryptos")
     
     def fetch_coingecko_list(self) -> Dict[str, str]:
-        """Fetch crypto list from CoinGecko"""
+        """
+        Fetch crypto list from CoinGecko
+        
+        Sends the ETag/Last-Modified of the previous download as a conditional
+        GET; on 304 Not Modified the cached crypto list is returned unparsed.
+        """
         logger.info("Fetching crypto list from CoinGecko...")
         
         try:
             url = "https://api.coingecko.com/api/v3/coins/list"
-            response = requests.get(url, timeout=30)
+            
+            headers = {}
+            if self.symbols_data.get('cryptos'):
+                if self.symbols_data.get('coingecko_etag'):
+                    headers['If-None-Match'] = self.symbols_data['coingecko_etag']
+                if self.symbols_data.get('coingecko_last_modified'):
+                    headers['If-Modified-Since'] = self.symbols_data['coingecko_last_modified']
+            
+            response = self._session.get(url, headers=headers, timeout=30)
+            if response.status_code == 304:
+                logger.info("CoinGecko list unchanged, reusing cached cryptos")
+                return dict(self.symbols_data['cryptos'])
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content) if orjson is not None else response.json()
             
             # Map symbol to name and common trading pairs
             cryptos = {}
@@ -78,9 +249,12 @@ class SymbolReferenceEngine:
                 cryptos[f"{symbol}USDT"] = f"{name} (USDT)"
                 
                 # Add common variations
-                if symbol in ['BTC', 'ETH', 'BNB']:
+                if symbol in _USD_PAIR_BASES:
                     cryptos[f"{symbol}USD"] = f"{name} (USD)"
             
+            self.symbols_data['coingecko_etag'] = response.headers.get('ETag')
+            self.symbols_data['coingecko_last_modified'] = response.headers.get('Last-Modified')
+            
             logger.info(f"Fetched {len(cryptos)} crypto symbols from CoinGecko")
             return cryptos
             
@@ -88,6 +262,25 @@ class SymbolReferenceEngine:
             logger.error(f"Error fetching CoinGecko data: {e}")
             return {}
     
+    @staticmethod
+    def _parse_symbol_directory(stream: BinaryIO) -> Dict[str, str]:
+        """
+        Parse a nasdaqtrader.com pipe-delimited symbol file into {symbol: name}
+        
+        The stream is read incrementally, so a urlopen response can be passed
+        directly without buffering the whole file first. The first two columns
+        are the symbol and security name; the trailing "File Creation Time"
+        row has no name and is dropped. NA filtering is off so tickers like
+        "NA" survive, and quoting is off because the files are never quoted
+        and a name starting with '"' would otherwise swallow the next field.
+        """
+        df = pd.read_csv(stream, sep='|', dtype=str, usecols=[0, 1], engine='c',
+                         quoting=csv.QUOTE_NONE, keep_default_na=False, encoding='utf-8')
+        symbols = df.iloc[:, 0].str.strip()
+        names = df.iloc[:, 1].str.strip()
+        keep = (symbols != '') & (names != '')
+        return dict(zip(symbols[keep], names[keep]))
+    
     def fetch_nasdaq_stocks(self) -> Dict[str, str]:
         """Fetch stock list from NASDAQ FTP"""
         logger.info("Fetching stock list from NASDAQ...")
@@ -98,18 +291,8 @@ class SymbolReferenceEngine:
             
             # Try downloading
             import urllib.request
-            response = urllib.request.urlopen(url, timeout=30)
-            content = response.read().decode('utf-8')
-            
-            stocks = {}
-            for line in content.split('\n')[1:]:  # Skip header
-                if '|' in line:
-                    parts = line.split('|')
-                    if len(parts) >= 2:
-                        symbol = parts[0].strip()
-                        name = parts[1].strip()
-                        if symbol and name and symbol != 'Symbol':
-                            stocks[symbol] = name
+            with urllib.request.urlopen(url, timeout=30) as response:
+                stocks = self._parse_symbol_directory(response)
             
             logger.info(f"Fetched {len(stocks)} NASDAQ stocks")
             return stocks
@@ -126,18 +309,8 @@ class SymbolReferenceEngine:
             url = "ftp://ftp.nasdaqtrader.com/symboldirectory/otherlisted.txt"
             
             import urllib.request
-            response = urllib.request.urlopen(url, timeout=30)
-            content = response.read().decode('utf-8')
-            
-            stocks = {}
-            for line in content.split('\n')[1:]:  # Skip header
-                if '|' in line:
-                    parts = line.split('|')
-                    if len(parts) >= 2:
-                        symbol = parts[0].strip()
-                        name = parts[1].strip()
-                        if symbol and name and symbol != 'ACT Symbol':
-                            stocks[symbol] = name
+            with urllib.request.urlopen(url, timeout=30) as response:
+                stocks = self._parse_symbol_directory(response)
             
             logger.info(f"Fetched {len(stocks)} NYSE stocks")
             return stocks
@@ -146,21 +319,32 @@ class SymbolReferenceEngine:
             logger.error(f"Error fetching NYSE data: {e}")
             return {}
     
+    def _fetch_exchange_stocks(self) -> Dict[str, str]:
+        """Fetch NASDAQ then NYSE listings (same host, so not in parallel)"""
+        stocks = self.fetch_nasdaq_stocks()
+        
+        sleep(1)  # Rate limit
+        
+        stocks.update(self.fetch_nyse_stocks())
+        return stocks
+    
     def get_symbols_from_database(self) -> Dict[str, List[str]]:
         """Get all symbols that actually exist in our database"""
         logger.info("Getting symbols from database...")
         
-        market_data = self.smart_db.query_market_data()
+        market_data = self.smart_db.query_market_data(columns=['symbol'])
         
         if market_data.empty:
             logger.warning("No market data in database")
             return {'stocks': [], 'cryptos': []}
         
-        unique_symbols = market_data['symbol'].unique().tolist()
+        unique_symbols = market_data['symbol'].drop_duplicates()
         
-        # Separate stocks from cryptos (cryptos usually have USDT, USD, BTC suffixes)
-        cryptos = [s for s in unique_symbols if any(suffix in s for suffix in ['USDT', 'USD', 'BTC', 'ETH'])]
-        stocks = [s for s in unique_symbols if s not in cryptos]
+        # Separate stocks from cryptos (cryptos usually have USDT, USD, BTC suffixes);
+        # one mask over the unique symbols, no per-symbol membership checks
+        is_crypto = unique_symbols.str.contains(_CRYPTO_MARKERS_RE, na=False)
+        cryptos = unique_symbols[is_crypto].tolist()
+        stocks = unique_symbols[~is_crypto].tolist()
         
         logger.info(f"Found in database: {len(stocks)} stocks, {len(cryptos)} cryptos")
         
@@ -178,56 +362,57 @@ class SymbolReferenceEngine:
         cryptos = {s: s for s in db_symbols['cryptos']}
         
         if use_external:
-            # Fetch from NASDAQ
-            nasdaq_stocks = self.fetch_nasdaq_stocks()
-            stocks.update(nasdaq_stocks)
-            
-            sleep(1)  # Rate limit
-            
-            # Fetch from NYSE
-            nyse_stocks = self.fetch_nyse_stocks()
-            stocks.update(nyse_stocks)
-            
-            sleep(1)  # Rate limit
-            
-            # Fetch from CoinGecko
-            coingecko_cryptos = self.fetch_coingecko_list()
-            cryptos.update(coingecko_cryptos)
+            # NASDAQ and NYSE share the nasdaqtrader.com host, so they run one
+            # after the other in a single worker; CoinGecko overlaps with them
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                exchange_future = pool.submit(self._fetch_exchange_stocks)
+                coingecko_future = pool.submit(self.fetch_coingecko_list)
+                
+                stocks.update(exchange_future.result())
+                coingecko = coingecko_future.result()
+                cryptos.update(coingecko)
+        
+        if not use_external or not coingecko:
+            # The saved cryptos hold no CoinGecko list, so the next download
+            # must not be a conditional GET whose 304 would "reuse" them
+            self.symbols_data.pop('coingecko_etag', None)
+            self.symbols_data.pop('coingecko_last_modified', None)
         
         self.symbols_data['stocks'] = stocks
         self.symbols_data['cryptos'] = cryptos
+        self._all_symbols = None
         
         self._save_cache()
         
         logger.info(f"Symbol lists updated: {len(stocks)} stocks, {len(cryptos)} cryptos")
     
-    def get_all_symbols(self) -> Set[str]:
-        """Get set of all valid symbols"""
-        all_symbols = set()
-        all_symbols.update(self.symbols_data['stocks'].keys())
-        all_symbols.update(self.symbols_data['cryptos'].keys())
-        return all_symbols
+    def get_all_symbols(self) -> FrozenSet[str]:
+        """Get set of all valid symbols (built once, reset by update_symbol_lists)"""
+        if self._all_symbols is None:
+            self._all_symbols = frozenset(self.symbols_data['stocks']).union(self.symbols_data['cryptos'])
+        return self._all_symbols
     
     def is_valid_symbol(self, symbol: str) -> bool:
         """Check if symbol is valid"""
-        symbol = symbol.upper()
-        return (symbol in self.symbols_data['stocks'] or 
-                symbol in self.symbols_data['cryptos'])
+        return symbol.upper() in self.get_all_symbols()
     
     def get_symbol_info(self, symbol: str) -> Optional[Dict]:
         """Get information about a symbol"""
         symbol = symbol.upper()
         
-        if symbol in self.symbols_data['stocks']:
+        name = self.symbols_data['stocks'].get(symbol)
+        if name is not None:
             return {
                 'symbol': symbol,
-                'name': self.symbols_data['stocks'][symbol],
+                'name': name,
                 'type': 'stock'
             }
-        elif symbol in self.symbols_data['cryptos']:
+        
+        name = self.symbols_data['cryptos'].get(symbol)
+        if name is not None:
             return {
                 'symbol': symbol,
-                'name': self.symbols_data['cryptos'][symbol],
+                'name': name,
                 'type': 'crypto'
             }
         
@@ -244,69 +429,94 @@ class SymbolReferenceEngine:
             return []
         
         text_upper = text.upper()
-        matches = set()
-        
-        # Map of common name patterns to symbols (only major ones)
-        name_to_symbol = {
-            'BITCOIN': 'BTCUSDT',
-            'ETHEREUM': 'ETHUSDT',
-            'APPLE': 'AAPL',
-            'MICROSOFT': 'MSFT',
-            'GOOGLE': 'GOOGL',
-            'AMAZON': 'AMZN',
-            'TESLA': 'TSLA',
-            'META': 'META',
-            'FACEBOOK': 'META',
-            'NVIDIA': 'NVDA',
-        }
         
         # Check for explicit company/crypto names
-        for name, symbol in name_to_symbol.items():
-            if name in text_upper:
-                matches.add(symbol)
+        matches = {symbol for _, symbol in _find_names(text_upper)}
         
         # Check for explicit ticker mentions with $ or in uppercase
-        import re
+        
+        # Patterns 1-3 are probed against the cached frozenset in one C-level
+        # intersection each, so rejected candidates never reach Python code
+        valid_symbols = self.get_all_symbols()
+        
+        # Pattern 3: Common crypto pairs (explicit, case-insensitive)
+        if 'USDT' in text_upper:
+            crypto_pairs = [f"{pair}USDT" for pair in _CRYPTO_PAIR_RE.findall(text_upper)]
+            matches.update(valid_symbols.intersection(crypto_pairs))
+        
+        # The remaining patterns need uppercase letters in the original text;
+        # one cheap scan rejects plain lowercase prose before running them
+        if not _HAS_CAPS_RE.search(text):
+            return list(matches)
         
         # Pattern 1: $SYMBOL (common in financial news)
-        dollar_symbols = re.findall(r'\$([A-Z]{1,10})\b', text)
-        for symbol in dollar_symbols:
-            if self.is_valid_symbol(symbol):
-                matches.add(symbol)
+        matches.update(valid_symbols.intersection(_DOLLAR_RE.findall(text)))
         
         # Pattern 2: Ticker in parentheses like "Apple (AAPL)"
-        paren_symbols = re.findall(r'\(([A-Z]{2,10})\)', text)
-        for symbol in paren_symbols:
-            if self.is_valid_symbol(symbol):
-                matches.add(symbol)
-        
-        # Pattern 3: Common crypto pairs (explicit)
-        crypto_pairs = re.findall(r'\b([A-Z]{2,6})USDT\b', text_upper)
-        for pair in crypto_pairs:
-            full_symbol = f"{pair}USDT"
-            if self.is_valid_symbol(full_symbol):
-                matches.add(full_symbol)
+        matches.update(valid_symbols.intersection(_PAREN_RE.findall(text)))
         
         # Pattern 4: Standalone tickers (only if 2-5 chars and validated)
-        # Only check words that are clearly separated
-        words = re.findall(r'\b([A-Z]{2,5})\b', text)
-        for word in words:
-            # Skip common words that are not tickers
-            if word in ['THE', 'AND', 'FOR', 'ARE', 'BUT', 'NOT', 'YOU', 'ALL', 
-                       'CAN', 'WAS', 'ONE', 'OUR', 'OUT', 'DAY', 'GET', 'HAS', 
-                       'NEW', 'NOW', 'OLD', 'SEE', 'TWO', 'WAY', 'WHO', 'WHY',
-                       'USA', 'CEO', 'CFO', 'CTO', 'SEC', 'FDA', 'FBI', 'CIA', 
-                       'NYSE', 'IPO', 'API', 'USD', 'EUR', 'GBP', 'JPY', 'ATH',
-                       'ETF', 'IRS', 'LLC', 'INC', 'LTD', 'CORP', 'CO', 'GROUP']:
-                continue
-            
-            # Only add if it's a known stock in our database
-            if word in self.symbols_data['stocks']:
-                matches.add(word)
+        # Only check words that are clearly separated; keep known stocks that
+        # are not common words, intersecting whole sets instead of looping
+        words = set(_WORD_RE.findall(text))
+        words -= _STOPWORDS
+        matches.update(words.intersection(self.symbols_data['stocks']))
         
         return list(matches)
 
 
+    def match_texts_to_symbols(self, texts: List[str]) -> List[List[str]]:
+        """
+        Batch version of match_text_to_symbols, one result list per text
+        
+        The texts are joined with a separator so each pattern scans the whole
+        batch once; every match is mapped back to its text by position.
+        """
+        texts = [text or '' for text in texts]
+        matches = [set() for _ in texts]
+        
+        joined = _TEXT_SEP.join(texts)
+        starts = _text_starts(texts)
+        # Uppercasing can change lengths (e.g. 'ß' -> 'SS'), so the uppercased
+        # batch gets its own offsets
+        upper_texts = [text.upper() for text in texts]
+        joined_upper = _TEXT_SEP.join(upper_texts)
+        upper_starts = _text_starts(upper_texts)
+        
+        valid_symbols = self.get_all_symbols()
+        stocks = self.symbols_data['stocks']
+        
+        for position, symbol in _find_names(joined_upper):
+            matches[bisect_right(upper_starts, position) - 1].add(symbol)
+        
+        for m in _CRYPTO_PAIR_RE.finditer(joined_upper):
+            symbol = f"{m.group(1)}USDT"
+            if symbol in valid_symbols:
+                matches[bisect_right(upper_starts, m.start()) - 1].add(symbol)
+        
+        for pattern in (_DOLLAR_RE, _PAREN_RE):
+            for m in pattern.finditer(joined):
+                if m.group(1) in valid_symbols:
+                    matches[bisect_right(starts, m.start()) - 1].add(m.group(1))
+        
+        for m in _WORD_RE.finditer(joined):
+            word = m.group(1)
+            if word in stocks and word not in _STOPWORDS:
+                matches[bisect_right(starts, m.start()) - 1].add(word)
+        
+        return [list(found) for found in matches]
+
+
+def _text_starts(texts: List[str]) -> List[int]:
+    """Offsets at which each text begins once joined with _TEXT_SEP"""
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + len(_TEXT_SEP)
+    return starts
+
+
 def main():
     """Main execution"""
     import argparse
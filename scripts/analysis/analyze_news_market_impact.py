@@ -10,8 +10,9 @@ from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 import json
+import hashlib
 import logging
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 import re
 from collections import defaultdict
 
@@ -33,22 +34,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+HOUR_NS = 3_600_000_000_000
+# Price changes are only measured up to 7 days after the news
+PRICE_WINDOW_NS = 7 * 24 * HOUR_NS
+# Market columns used by the analysis (symbol split + price changes)
+MARKET_COLUMNS = ['symbol', 'timestamp', 'close']
+
+# Price direction each sentiment predicts; anything else predicts nothing
+SENTIMENT_DIRECTION = {'positive': 1, 'negative': -1, 'neutral': 0}
+
+# Sentences per FinBERT forward pass when scoring article/symbol pairs
+FINBERT_BATCH_SIZE = 32
+
 
 class NewsMarketAnalyzer:
     """Analyze correlation between news and market movements"""
     
-    def __init__(self, lookback_hours: List[int] = [1, 4, 24, 48, 168]):
+    def __init__(self, lookback_hours: List[int] = [1, 4, 24, 48, 168],
+                 cache_dir: Optional[str] = 'data/cache/news_impact'):
         """
         Initialize analyzer
         
         Args:
             lookback_hours: Time windows to analyze impact (hours after news)
+            cache_dir: Where stage results are cached as Parquet (None disables)
         """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         self.smart_db = SmartDatabaseManager()
         self.connector = EnhancedConnectorEngine(use_smart_db=True)
         self.lookback_hours = lookback_hours
         self.symbol_ref = SymbolReferenceEngine()
         self.finbert = FinBERTEngine(use_smart_db=False)  # For per-symbol analysis
+        # Syndicated/re-crawled sentences are scored once across runs
+        self.finbert.enable_score_cache()
         
         logger.info(f"Symbol reference loaded: {len(self.symbol_ref.get_all_symbols())} valid symbols")
     
@@ -64,8 +82,9 @@ class NewsMarketAnalyzer:
         sentiment = self.smart_db.query_analysis_data(analysis_type='sentiment')
         logger.info(f"  Loaded {len(sentiment):,} sentiment analyses")
         
-        # Load market data
-        market = self.smart_db.query_market_data()
+        # Load market data (only the columns the price-change step reads;
+        # DuckDB skips decoding the rest of the OHLCV columns)
+        market = self.smart_db.query_market_data(columns=MARKET_COLUMNS)
         logger.info(f"  Loaded {len(market):,} market records")
         
         return news, sentiment, market
@@ -82,7 +101,7 @@ class NewsMarketAnalyzer:
             how='left'
         )
         
-        logger.info(f"  Merged: {len(merged):,} records ({len(merged[merged['sentiment'].notna()]):,} with sentiment)")
+        logger.info(f"  Merged: {len(merged):,} records ({merged['sentiment'].notna().sum():,} with sentiment)")
         
         return merged
     
@@ -90,17 +109,14 @@ class NewsMarketAnalyzer:
         """Extract mentioned symbols from news using validated symbol reference"""
         logger.info("Extracting symbols from news using official symbol reference...")
         
-        # Process in chunks with progress
+        texts = self._article_texts(news_df)
+        
+        # Process in chunks with progress; each chunk is matched in one batch
         chunk_size = 1000
         all_symbols = []
         
-        for i in range(0, len(news_df), chunk_size):
-            chunk = news_df.iloc[i:i+chunk_size]
-            
-            for _, row in chunk.iterrows():
-                text = f"{row.get('title', '')} {row.get('description', '')} {row.get('content', '')}"
-                symbols = self.symbol_ref.match_text_to_symbols(text)
-                all_symbols.append(symbols)
+        for i in range(0, len(texts), chunk_size):
+            all_symbols.extend(self.symbol_ref.match_texts_to_symbols(texts[i:i+chunk_size]))
             
             if (i + chunk_size) % 5000 == 0:
                 logger.info(f"  Processed {i+chunk_size:,}/{len(news_df):,} articles...")
@@ -115,6 +131,16 @@ class NewsMarketAnalyzer:
         
         return news_df
     
+    @staticmethod
+    def _article_texts(news_df: pd.DataFrame) -> List[str]:
+        """Build 'title description content' for every article, column-wise"""
+        parts = [
+            news_df[col].fillna('').astype(str) if col in news_df.columns
+            else pd.Series('', index=news_df.index)
+            for col in ('title', 'description', 'content')
+        ]
+        return (parts[0] + ' ' + parts[1] + ' ' + parts[2]).tolist()
+    
     def ensure_market_data(self, symbols: List[str], start_date: datetime, 
                           end_date: datetime) -> Dict[str, pd.DataFrame]:
         """Ensure we have market data for symbols in date range"""
@@ -211,51 +237,62 @@ class NewsMarketAnalyzer:
             return 'crypto'
         return 'stock'
     
-    def calculate_price_changes(self, market_data: Dict[str, pd.DataFrame], 
+    @staticmethod
+    def prepare_price_arrays(market_data: Dict[str, pd.DataFrame]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Convert per-symbol market frames to sorted (timestamp_ns, close) arrays
+        
+        Timestamps are made tz-naive once here instead of on every lookup, and
+        sorted (stably, so rows sharing a timestamp keep their order).
+        """
+        arrays = {}
+        for symbol, data in market_data.items():
+            timestamps = pd.to_datetime(data['timestamp'])
+            if timestamps.dt.tz is not None:
+                timestamps = timestamps.dt.tz_localize(None)
+            ts_ns = timestamps.to_numpy(dtype='datetime64[ns]').view('i8')
+            order = np.argsort(ts_ns, kind='stable')
+            arrays[symbol] = (ts_ns[order], data['close'].to_numpy(dtype='float64')[order])
+        return arrays
+    
+    def calculate_price_changes(self, market_data: Dict[str, Tuple[np.ndarray, np.ndarray]],
                                 news_time: datetime, symbol: str) -> Dict[str, float]:
-        """Calculate price changes after news within reasonable time window"""
+        """
+        Calculate price changes after news within reasonable time window
+        
+        market_data maps symbol -> (timestamp_ns, close) from prepare_price_arrays.
+        The base price is the first bar at or after the news and each lookback
+        uses the first bar at or after news + hours, all within 7 days.
+        """
         if symbol not in market_data:
             return {}
         
-        data = market_data[symbol].copy()
-        
-        # Normalize all timestamps to remove timezone for comparison
-        data['timestamp'] = pd.to_datetime(data['timestamp']).dt.tz_localize(None)
-        news_time = pd.to_datetime(news_time).tz_localize(None) if hasattr(pd.to_datetime(news_time), 'tz_localize') else pd.to_datetime(news_time)
+        ts_ns, close = market_data[symbol]
         
-        # Filter data to reasonable window around news time (7 days window)
-        window_start = news_time - pd.Timedelta(days=1)
-        window_end = news_time + pd.Timedelta(days=7)
+        # Normalize the news timestamp to tz-naive like the market arrays
+        news_time = pd.Timestamp(news_time)
+        if news_time.tz is not None:
+            news_time = news_time.tz_localize(None)
+        news_ns = news_time.value
         
-        data = data[(data['timestamp'] >= window_start) & (data['timestamp'] <= window_end)]
-        
-        if data.empty:
-            return {}
+        # Bars after the 7 day window are never used
+        window_end = np.searchsorted(ts_ns, news_ns + PRICE_WINDOW_NS, side='right')
         
         # Get price at news time (or closest after)
-        base_price_data = data[data['timestamp'] >= news_time].head(1)
-        if base_price_data.empty:
+        base_idx = np.searchsorted(ts_ns, news_ns, side='left')
+        if base_idx >= window_end:
             return {}
         
-        base_price = base_price_data['close'].iloc[0]
-        changes = {}
+        # All lookback targets located in one searchsorted call
+        offsets_ns = np.asarray(self.lookback_hours, dtype='i8') * HOUR_NS
+        target_idx = np.searchsorted(ts_ns, news_ns + offsets_ns, side='left')
+        found = (offsets_ns <= PRICE_WINDOW_NS) & (target_idx < window_end)
         
-        # Calculate changes for each lookback period
-        for hours in self.lookback_hours:
-            target_time = news_time + pd.Timedelta(hours=hours)
-            
-            # Only calculate if target time is within our data window
-            if target_time > window_end:
-                continue
-            
-            target_data = data[data['timestamp'] >= target_time].head(1)
-            
-            if not target_data.empty:
-                target_price = target_data['close'].iloc[0]
-                change_pct = ((target_price - base_price) / base_price) * 100
-                changes[f'change_{hours}h'] = change_pct
+        base_price = close[base_idx]
+        change_pct = (close[target_idx[found]] - base_price) / base_price * 100
+        hours = np.asarray(self.lookback_hours)[found]
         
-        return changes
+        return {f'change_{h}h': change for h, change in zip(hours.tolist(), change_pct.tolist())}
     
     def analyze_news_impact(self, news_df: pd.DataFrame, 
                            market_data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
@@ -263,25 +300,37 @@ class NewsMarketAnalyzer:
         logger.info("Analyzing news impact on markets with per-symbol sentiment analysis...")
         
         results = []
+        price_arrays = self.prepare_price_arrays(market_data)
+        
+        if 'mentioned_symbols' in news_df.columns:
+            symbol_lists = [symbols if symbols else [] for symbols in news_df['mentioned_symbols']]
+        else:
+            symbol_lists = [[] for _ in range(len(news_df))]
+        
+        # Per-symbol sentiment (highest confidence sentence for each symbol) for
+        # every article at once, so FinBERT sees full batches across articles
+        texts = self._article_texts(news_df)
+        pairs = [(text, symbol) for text, symbols in zip(texts, symbol_lists) for symbol in symbols]
+        logger.info(f"  Scoring {len(pairs):,} article/symbol pairs with FinBERT...")
+        pair_results = iter(self.finbert.analyze_per_symbol_batch(pairs, batch_size=FINBERT_BATCH_SIZE))
         
-        for idx, row in news_df.iterrows():
+        for (idx, row), symbols in zip(news_df.iterrows(), symbol_lists):
             if idx % 100 == 0:
                 logger.info(f"  Processed {idx:,}/{len(news_df):,} news articles...")
             
-            symbols = row.get('mentioned_symbols', [])
             if not symbols:
                 continue
             
             news_time = pd.to_datetime(row['timestamp'])
             
-            # Build full text for sentiment analysis
-            text = f"{row.get('title', '')} {row.get('description', '')} {row.get('content', '')}"
-            
-            # Get per-symbol sentiment (highest confidence sentence for each symbol)
-            symbol_sentiments = self.finbert.analyze_per_symbol(text, symbols)
+            symbol_sentiments = {}
+            for symbol in symbols:
+                result = next(pair_results)
+                if result is not None:
+                    symbol_sentiments[symbol] = result
             
             for symbol in symbols:
-                changes = self.calculate_price_changes(market_data, news_time, symbol)
+                changes = self.calculate_price_changes(price_arrays, news_time, symbol)
                 
                 if changes:
                     # Get symbol-specific sentiment or fall back to article sentiment
@@ -321,137 +370,143 @@ class NewsMarketAnalyzer:
         
         return pd.DataFrame(results)
     
+    def _add_directions(self, impact_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add predicted_direction (from sentiment) and actual_direction_{h}h
+        (sign of each change column) in one vectorized pass over the frame
+        """
+        directions = {
+            'predicted_direction': impact_df['sentiment'].map(SENTIMENT_DIRECTION).fillna(0).astype('int8')
+        }
+        for hours in self.lookback_hours:
+            col = f'change_{hours}h'
+            if col in impact_df.columns:
+                directions[f'actual_direction_{hours}h'] = np.sign(impact_df[col].to_numpy())
+        return impact_df.assign(**directions)
+    
+    def _filter_moves(self, impact_df: pd.DataFrame, key: str, col: str) -> pd.DataFrame:
+        """
+        Rows with a valid `col`, cleaned per `key` group, plus an abs_move column
+        
+        QUALITY FILTERS: drops extreme movements (>1000%, likely data errors)
+        and, in groups with more than 20 rows, the top 1% of absolute moves.
+        """
+        valid = impact_df[impact_df[col].notna()]
+        abs_move = valid[col].abs()
+        
+        extreme = abs_move > 1000
+        for group, count in extreme.groupby(valid[key]).sum().items():
+            if count:
+                logger.warning(f"  Filtering {count} extreme movements (>1000%) from {group}")
+        valid = valid[~extreme]
+        abs_move = abs_move[~extreme]
+        
+        groups = valid[key]
+        group_size = groups.map(groups.value_counts())
+        percentile_99 = groups.map(abs_move.groupby(groups).quantile(0.99))
+        outlier = (group_size > 20) & (abs_move > percentile_99)
+        for group, count in outlier.groupby(groups).sum().items():
+            if count:
+                logger.warning(f"  Filtering {count} outliers (>99th percentile) from {group}")
+        
+        return valid[~outlier].assign(abs_move=abs_move[~outlier])
+    
+    @staticmethod
+    def _ordered_report(frames: List[pd.DataFrame], key: str, key_order: pd.Series,
+                        columns: List[str]) -> pd.DataFrame:
+        """Concatenate per-timeframe group stats, ordered by key (first seen) then timeframe"""
+        if not frames:
+            return pd.DataFrame()
+        
+        report = pd.concat(frames).reset_index()
+        rank = pd.Series(np.arange(len(key_order)), index=key_order)
+        report['_key_rank'] = report[key].map(rank)
+        report = report.sort_values(['_key_rank', '_timeframe_rank'], kind='stable')
+        return report[columns].reset_index(drop=True)
+    
     def generate_source_accuracy_report(self, impact_df: pd.DataFrame) -> pd.DataFrame:
         """Analyze which news sources have most accurate predictions"""
         logger.info("Analyzing news source accuracy...")
         
-        results = []
+        impact_df = self._add_directions(impact_df)
+        frames = []
         
-        for source in impact_df['source'].unique():
-            source_data = impact_df[impact_df['source'] == source]
+        for position, hours in enumerate(self.lookback_hours):
+            col = f'change_{hours}h'
+            if col not in impact_df.columns:
+                continue
             
-            for hours in self.lookback_hours:
-                col = f'change_{hours}h'
-                if col not in source_data.columns:
-                    continue
-                
-                # Filter valid data AND remove extreme movements (outliers)
-                valid_data = source_data[source_data[col].notna()].copy()
-                
-                # QUALITY FILTER: Remove extreme movements (>1000% likely data errors)
-                extreme_mask = valid_data[col].abs() > 1000
-                if extreme_mask.any():
-                    logger.warning(f"  Filtering {extreme_mask.sum()} extreme movements (>1000%) from {source}")
-                    valid_data = valid_data[~extreme_mask]
-                
-                # QUALITY FILTER: Remove top 1% outliers for robust statistics
-                if len(valid_data) > 20:
-                    percentile_99 = valid_data[col].abs().quantile(0.99)
-                    outlier_mask = valid_data[col].abs() > percentile_99
-                    if outlier_mask.any():
-                        logger.warning(f"  Filtering {outlier_mask.sum()} outliers (>99th percentile) from {source}")
-                        valid_data = valid_data[~outlier_mask]
-                
-                if len(valid_data) < 5:
-                    continue
-                
-                # Predict direction based on sentiment
-                valid_data['predicted_direction'] = valid_data['sentiment'].map({
-                    'positive': 1,
-                    'negative': -1,
-                    'neutral': 0
-                })
-                
-                # Actual direction
-                valid_data['actual_direction'] = np.sign(valid_data[col])
-                
-                # Calculate accuracy
-                correct_predictions = (
-                    valid_data['predicted_direction'] * valid_data['actual_direction'] > 0
-                ).sum()
-                
-                accuracy = (correct_predictions / len(valid_data)) * 100
-                
-                # Average magnitude of moves (now without outliers)
-                avg_move = valid_data[col].abs().mean()
-                
-                # Confidence correlation
-                conf_corr = valid_data['confidence'].corr(valid_data[col].abs())
-                
-                results.append({
-                    'source': source,
-                    'timeframe': f'{hours}h',
-                    'sample_size': len(valid_data),
-                    'accuracy': accuracy,
-                    'avg_move': avg_move,
-                    'confidence_correlation': conf_corr,
-                    'avg_confidence': valid_data['confidence'].mean()
-                })
-        
-        return pd.DataFrame(results)
+            valid = self._filter_moves(impact_df, 'source', col)
+            valid = valid.assign(
+                correct=valid['predicted_direction'] * valid[f'actual_direction_{hours}h'] > 0
+            )
+            grouped = valid.groupby('source', sort=False)
+            
+            stats = grouped.agg(
+                sample_size=('correct', 'size'),
+                correct=('correct', 'sum'),
+                avg_move=('abs_move', 'mean'),
+                avg_confidence=('confidence', 'mean'),
+            )
+            # Confidence correlation with the magnitude of the move
+            stats['confidence_correlation'] = grouped['confidence'].corr(valid['abs_move'])
+            stats = stats[stats['sample_size'] >= 5]
+            
+            stats['accuracy'] = (stats['correct'] / stats['sample_size']) * 100
+            stats['timeframe'] = f'{hours}h'
+            stats['_timeframe_rank'] = position
+            frames.append(stats)
+        
+        return self._ordered_report(
+            frames, 'source', impact_df['source'].unique(),
+            ['source', 'timeframe', 'sample_size', 'accuracy', 'avg_move',
+             'confidence_correlation', 'avg_confidence']
+        )
     
     def generate_symbol_sensitivity_report(self, impact_df: pd.DataFrame) -> pd.DataFrame:
         """Analyze which symbols are most affected by news"""
         logger.info("Analyzing symbol sensitivity to news...")
         
-        results = []
+        frames = []
         
-        for symbol in impact_df['symbol'].unique():
-            symbol_data = impact_df[impact_df['symbol'] == symbol]
+        for position, hours in enumerate(self.lookback_hours):
+            col = f'change_{hours}h'
+            if col not in impact_df.columns:
+                continue
             
-            for hours in self.lookback_hours:
-                col = f'change_{hours}h'
-                if col not in symbol_data.columns:
-                    continue
-                
-                valid_data = symbol_data[symbol_data[col].notna()].copy()
-                
-                # QUALITY FILTER: Remove extreme movements and outliers
-                extreme_mask = valid_data[col].abs() > 1000
-                if extreme_mask.any():
-                    logger.warning(f"  Filtering {extreme_mask.sum()} extreme movements from {symbol}")
-                    valid_data = valid_data[~extreme_mask]
-                
-                if len(valid_data) > 20:
-                    percentile_99 = valid_data[col].abs().quantile(0.99)
-                    outlier_mask = valid_data[col].abs() > percentile_99
-                    if outlier_mask.any():
-                        logger.warning(f"  Filtering {outlier_mask.sum()} outliers from {symbol}")
-                        valid_data = valid_data[~outlier_mask]
-                
-                if len(valid_data) < 5:
-                    continue
-                
-                # Calculate volatility (now without outliers)
-                volatility = valid_data[col].std()
-                avg_move = valid_data[col].abs().mean()
-                max_move = valid_data[col].abs().max()
-                
-                # Sentiment correlation
-                pos_moves = valid_data[valid_data['sentiment'] == 'positive'][col].mean()
-                neg_moves = valid_data[valid_data['sentiment'] == 'negative'][col].mean()
-                
-                # Count news mentions
-                news_count = len(valid_data)
-                
-                results.append({
-                    'symbol': symbol,
-                    'timeframe': f'{hours}h',
-                    'news_mentions': news_count,
-                    'volatility': volatility,
-                    'avg_move': avg_move,
-                    'max_move': max_move,
-                    'positive_avg_move': pos_moves,
-                    'negative_avg_move': neg_moves,
-                    'sentiment_impact': pos_moves - neg_moves
-                })
-        
-        return pd.DataFrame(results)
+            valid = self._filter_moves(impact_df, 'symbol', col)
+            
+            # Volatility and move sizes (now without outliers)
+            stats = valid.groupby('symbol', sort=False).agg(
+                news_mentions=(col, 'size'),
+                volatility=(col, 'std'),
+                avg_move=('abs_move', 'mean'),
+                max_move=('abs_move', 'max'),
+            )
+            stats = stats[stats['news_mentions'] >= 5]
+            
+            # Sentiment correlation
+            sentiment_moves = valid.groupby(['symbol', 'sentiment'])[col].mean().unstack('sentiment')
+            for sentiment in ('positive', 'negative'):
+                moves = sentiment_moves.get(sentiment, pd.Series(dtype=float))
+                stats[f'{sentiment}_avg_move'] = moves.reindex(stats.index)
+            stats['sentiment_impact'] = stats['positive_avg_move'] - stats['negative_avg_move']
+            
+            stats['timeframe'] = f'{hours}h'
+            stats['_timeframe_rank'] = position
+            frames.append(stats)
+        
+        return self._ordered_report(
+            frames, 'symbol', impact_df['symbol'].unique(),
+            ['symbol', 'timeframe', 'news_mentions', 'volatility', 'avg_move', 'max_move',
+             'positive_avg_move', 'negative_avg_move', 'sentiment_impact']
+        )
     
     def generate_sentiment_effectiveness_report(self, impact_df: pd.DataFrame) -> pd.DataFrame:
         """Analyze overall sentiment prediction effectiveness"""
         logger.info("Analyzing sentiment prediction effectiveness...")
         
+        impact_df = self._add_directions(impact_df)
         results = []
         
         for hours in self.lookback_hours:
@@ -459,36 +514,31 @@ class NewsMarketAnalyzer:
             if col not in impact_df.columns:
                 continue
             
-            valid_data = impact_df[impact_df[col].notna()].copy()
+            valid_data = impact_df[impact_df[col].notna()]
             if len(valid_data) < 10:
                 continue
             
-            # Overall accuracy
-            valid_data['predicted_direction'] = valid_data['sentiment'].map({
-                'positive': 1, 'negative': -1, 'neutral': 0
-            })
-            valid_data['actual_direction'] = np.sign(valid_data[col])
-            
-            correct = (valid_data['predicted_direction'] * valid_data['actual_direction'] > 0).sum()
-            accuracy = (correct / len(valid_data)) * 100
+            valid_data = valid_data.assign(
+                correct=valid_data['predicted_direction'] * valid_data[f'actual_direction_{hours}h'] > 0
+            )
             
             # By sentiment type
-            for sentiment in ['positive', 'negative', 'neutral']:
-                sent_data = valid_data[valid_data['sentiment'] == sentiment]
-                if len(sent_data) < 5:
-                    continue
-                
-                sent_correct = (sent_data['predicted_direction'] * sent_data['actual_direction'] > 0).sum()
-                sent_accuracy = (sent_correct / len(sent_data)) * 100
-                avg_move = sent_data[col].mean()
-                
+            stats = valid_data.groupby('sentiment').agg(
+                sample_size=('correct', 'size'),
+                correct=('correct', 'sum'),
+                avg_price_change=(col, 'mean'),
+                avg_confidence=('confidence', 'mean'),
+            ).reindex(['positive', 'negative', 'neutral']).dropna(subset=['sample_size'])
+            stats = stats[stats['sample_size'] >= 5]
+            
+            for sentiment, row in stats.iterrows():
                 results.append({
                     'timeframe': f'{hours}h',
                     'sentiment': sentiment,
-                    'sample_size': len(sent_data),
-                    'accuracy': sent_accuracy,
-                    'avg_price_change': avg_move,
-                    'avg_confidence': sent_data['confidence'].mean()
+                    'sample_size': int(row['sample_size']),
+                    'accuracy': (row['correct'] / row['sample_size']) * 100,
+                    'avg_price_change': row['avg_price_change'],
+                    'avg_confidence': row['avg_confidence']
                 })
         
         return pd.DataFrame(results)
@@ -598,6 +648,40 @@ class NewsMarketAnalyzer:
         logger.info(f"Markdown report saved to {report_path}")
         return report_path
     
+    def _news_with_symbols(self, news_df: pd.DataFrame) -> pd.DataFrame:
+        """Extract symbols and keep only the news that mention at least one"""
+        news_df = self.extract_symbols_from_news(news_df)
+        return news_df[news_df['mentioned_symbols'].str.len() > 0]
+    
+    def _cached_stage(self, stage: str, key: Tuple, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return the cached result of a pipeline stage, or compute and cache it
+        
+        The Parquet file name carries a hash of ``key`` (row counts, latest
+        timestamps, settings), so any change in the inputs misses the cache.
+        """
+        if self.cache_dir is None:
+            return compute()
+        
+        digest = hashlib.blake2b('|'.join(map(str, key)).encode('utf-8'), digest_size=8).hexdigest()
+        path = self.cache_dir / f"{stage}_{digest}.parquet"
+        
+        if path.exists():
+            try:
+                df = pd.read_parquet(path)
+                logger.info(f"  Loaded {stage} from cache ({len(df):,} rows): {path}")
+                return df
+            except Exception as exc:
+                logger.warning(f"  Ignoring unreadable cache {path}: {exc}")
+        
+        df = compute()
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(path, compression='zstd', index=False)
+        except Exception as exc:
+            logger.warning(f"  Could not cache {stage}: {exc}")
+        return df
+    
     def run_analysis(self) -> Dict:
         """Run complete analysis"""
         logger.info("="*70)
@@ -610,11 +694,18 @@ class NewsMarketAnalyzer:
         # Merge news with sentiment
         news_df = self.merge_news_sentiment(news, sentiment)
         
-        # Extract symbols
-        news_df = self.extract_symbols_from_news(news_df)
-        
-        # Filter news with symbols
-        news_with_symbols = news_df[news_df['mentioned_symbols'].str.len() > 0].copy()
+        # Extract symbols and keep the news that mention any
+        news_key = (
+            len(news_df), news_df['timestamp'].max(), news_df['sentiment'].notna().sum(),
+            self.symbol_ref.symbols_data.get('updated_at'),
+        )
+        news_with_symbols = self._cached_stage(
+            'news_with_symbols', news_key, lambda: self._news_with_symbols(news_df)
+        )
+        # Parquet hands list columns back as arrays
+        news_with_symbols = news_with_symbols.assign(
+            mentioned_symbols=news_with_symbols['mentioned_symbols'].map(list)
+        )
         
         if news_with_symbols.empty:
             logger.warning("No news with valid symbols found!")
@@ -632,17 +723,22 @@ class NewsMarketAnalyzer:
         
         # Load market data for all symbols once
         logger.info("Loading market data for all symbols...")
+        # One isin + groupby pass instead of a full scan per symbol
         market_data_by_symbol = {}
-        
-        for symbol in all_symbols:
-            symbol_data = market[market['symbol'] == symbol]
-            if not symbol_data.empty:
-                market_data_by_symbol[symbol] = symbol_data
+        if not market.empty:
+            mentioned_market = market[market['symbol'].isin(all_symbols)]
+            market_data_by_symbol = dict(tuple(mentioned_market.groupby('symbol', sort=False)))
         
         logger.info(f"Loaded market data for {len(market_data_by_symbol)} symbols")
         
         # Analyze impact
-        impact_df = self.analyze_news_impact(news_with_symbols, market_data_by_symbol)
+        impact_key = news_key + (
+            len(market), market['timestamp'].max() if not market.empty else None,
+            tuple(self.lookback_hours), self.finbert.model_name,
+        )
+        impact_df = self._cached_stage(
+            'impact', impact_key, lambda: self.analyze_news_impact(news_with_symbols, market_data_by_symbol)
+        )
         
         if impact_df.empty:
             logger.warning("No correlations found!")
@@ -722,9 +818,8 @@ class NewsMarketAnalyzer:
             for hours in [1, 24, 168]:
                 col = f'change_{hours}h'
                 if col in impact_df.columns:
-                    valid = impact_df[impact_df[col].notna()]
-                    if len(valid) > 0:
-                        avg_move = valid[col].abs().mean()
+                    if impact_df[col].notna().any():
+                        avg_move = impact_df[col].abs().mean()  # mean skips NaN
                         insights.append(
                             f"**Average Price Move ({hours}h):** {avg_move:.2f}% after news announcement"
                         )
@@ -741,11 +836,14 @@ def main():
     parser.add_argument('--lookback', type=int, nargs='+', 
                        default=[1, 4, 24, 48, 168],
                        help='Lookback periods in hours (default: 1 4 24 48 168)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Recompute every stage instead of reusing data/cache/news_impact')
     
     args = parser.parse_args()
     
     try:
-        analyzer = NewsMarketAnalyzer(lookback_hours=args.lookback)
+        analyzer = NewsMarketAnalyzer(lookback_hours=args.lookback,
+                                      cache_dir=None if args.no_cache else 'data/cache/news_impact')
         report = analyzer.run_analysis()
         
         print("\n" + "="*70)
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import sys
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional
@@ -33,8 +34,9 @@ def collect_contract_stats(
 
     stats = []
     for name, contract in (contracts or TABLE_CONTRACTS).items():
+        # Directory above the first placeholder (also for key={value} segments)
         prefix = contract.storage_pattern.split("{")[0]
-        base_path = Path(prefix)
+        base_path = Path(os.path.dirname(prefix))
         if not base_path.is_absolute():
             base_path = (root / base_path).resolve()
 
@@ -24,6 +24,10 @@ echo "📦 Installing additional dependencies..."
 pip install sentencepiece
 pip install protobuf
 
+# Optional: ONNX Runtime INT8 backend for faster CPU inference
+echo "📦 Installing ONNX Runtime (optional CPU acceleration)..."
+pip install "optimum[onnxruntime]"
+
 echo ""
 echo "✅ Installation complete!"
 echo ""
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Migra os arquivos de market/news para o layout Hive (chave=valor)
+
+    data/market/{source}/{symbol}/{interval}.parquet
+        -> data/market/source={source}/symbol={symbol}/interval={interval}/data.parquet
+    data/news/{source}/{year}/{month}.parquet
+        -> data/news/src={source}/year={year}/month={month}/data.parquet
+
+Com o layout Hive o DuckDB descarta diretórios inteiros a partir dos filtros
+(hive_partitioning=1) antes de abrir qualquer arquivo.
+
+Símbolos com barra (ccxt, ex.: BTC/USDT) ocupavam um nível extra no layout
+antigo (data/market/ccxt/BTC/USDT/1h.parquet); os valores são codificados
+como no SmartDatabaseManager (symbol=BTC%2FUSDT).
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath('.'))
+
+from engines.smart_db import encode_partition_value
+
+# Chaves gravadas como inteiros pelo SmartDatabaseManager
+INT_KEYS = {"year", "month"}
+
+
+def _legacy_files(base: Path):
+    """Arquivos no layout antigo: três ou mais níveis sem segmentos chave=valor"""
+    for file_path in base.rglob("*.parquet"):
+        parts = file_path.relative_to(base).parts
+        if len(parts) >= 3 and not any('=' in part for part in parts):
+            yield file_path
+
+
+def _legacy_values(parts, width: int, wide: int):
+    """
+    Valores das chaves a partir dos segmentos do caminho antigo
+
+    Os níveis além de `width` pertencem à chave `wide` (a barra do símbolo),
+    que é remontada com '/'.
+    """
+    extra = len(parts) - width
+    return parts[:wide] + ('/'.join(parts[wide:wide + extra + 1]),) + parts[wide + extra + 1:]
+
+
+def migrate(root: Path = Path("data"), dry_run: bool = False) -> int:
+    """Move os arquivos antigos para o layout Hive; retorna quantos foram movidos"""
+    # Chaves de cada layout e o índice da chave que pode conter barras
+    layouts = {
+        "market": (("source", "symbol", "interval"), 1),
+        "news": (("src", "year", "month"), 0),
+    }
+    moved = 0
+
+    for folder, (keys, wide) in layouts.items():
+        base = root / folder
+        if not base.exists():
+            continue
+
+        for file_path in list(_legacy_files(base)):
+            relative = file_path.relative_to(base)
+            values = _legacy_values(relative.parts[:-1] + (relative.stem,), len(keys), wide)
+            # O SmartDatabaseManager grava year/month como inteiros (month=1, não month=01)
+            if not all(value.isdigit() for key, value in zip(keys, values) if key in INT_KEYS):
+                print(f"⚠️  Ano/mês inválido no caminho, ignorando: {file_path}")
+                continue
+            values = [int(value) if key in INT_KEYS else value for key, value in zip(keys, values)]
+            target = base.joinpath(
+                *(f"{key}={encode_partition_value(value)}" for key, value in zip(keys, values)),
+                "data.parquet",
+            )
+
+            if target.exists():
+                print(f"⚠️  Destino já existe, mantendo original: {file_path}")
+                continue
+
+            print(f"{'[dry-run] ' if dry_run else ''}{file_path} -> {target}")
+            if not dry_run:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                file_path.rename(target)
+            moved += 1
+
+    return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra data/market e data/news para o layout Hive")
+    parser.add_argument("--root", default="data", help="Diretório raiz dos dados")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas lista o que seria movido")
+    args = parser.parse_args()
+
+    total = migrate(Path(args.root), dry_run=args.dry_run)
+    print(f"\n✅ {total} arquivo(s) migrado(s)")
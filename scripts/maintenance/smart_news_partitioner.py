@@ -3,11 +3,17 @@
 Implementação melhorada do particionamento de news data
 Particiona por ano/mês baseado no TIMESTAMP dos dados, não na data atual
 """
+import os
+import sys
 import pandas as pd
 from pathlib import Path
 from typing import Dict, List
 from datetime import datetime, timezone
-import hashlib
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.abspath('.'))
+
+from engines.smart_db import encode_partition_value
 
 
 class SmartNewsPartitioner:
@@ -81,19 +87,22 @@ class SmartNewsPartitioner:
     
     def _get_file_path(self, source: str, year: int, month: int) -> Path:
         """Gera path do arquivo baseado no período dos dados"""
-        # Sanitizar nome da fonte
-        clean_source = source.replace('/', '_').replace(' ', '_').replace('-', '_')
-        
-        # Estrutura: data/news/{source}/{year}/{month}.parquet
-        file_path = self.base_path / clean_source / str(year) / f"{month:02d}.parquet"
+        # Estrutura Hive do SmartDatabaseManager (mesma codificação da fonte):
+        # data/news/src={source}/year={year}/month={month}/data.parquet
+        file_path = (self.base_path / f"src={encode_partition_value(source)}"
+                     / f"year={year}" / f"month={month}" / "data.parquet")
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
         return file_path
     
     def _calculate_hash(self, df: pd.DataFrame, columns: List[str]) -> pd.Series:
-        """Calcula hash para deduplicação"""
-        hash_data = df[columns].astype(str).apply(lambda x: '|'.join(x), axis=1)
-        return hash_data.apply(lambda x: hashlib.md5(x.encode()).hexdigest())
+        """
+        Calcula hash para deduplicação (64 bits, vetorizado)
+        
+        Usa hash_pandas_object direto, sem o fold de row_hash_u64; os valores
+        NÃO coincidem com o content_hash gerado pelo SmartDatabaseManager.
+        """
+        return pd.util.hash_pandas_object(df[columns], index=False).astype(str)
     
     def _deduplicate(self, df: pd.DataFrame) -> pd.DataFrame:
         """Remove duplicatas baseado em link + timestamp"""
@@ -124,11 +133,13 @@ class SmartNewsPartitioner:
         existing_files = list(self.base_path.glob(pattern))
         
         for file_path in existing_files:
-            stats['files_read'] += 1
-            
             # Parse source do path
             relative_path = file_path.relative_to(self.base_path)
             file_source = str(relative_path.parts[0])
+            if file_source.startswith('src='):
+                continue  # já está no layout Hive
+            
+            stats['files_read'] += 1
             
             print(f"📄 Processando: {relative_path}")
             
@@ -81,7 +81,7 @@ class SentimentAnalysisChampion:
         
         query = """
             SELECT timestamp, symbol, open, high, low, close, volume, interval
-            FROM read_parquet('data/market/**/*.parquet', hive_partitioning=true)
+            FROM read_parquet('data/market/source=*/symbol=*/interval=*/*.parquet', hive_partitioning=true, hive_types_autocast=false)
         """
         
         conditions = []
@@ -0,0 +1,38 @@
+"""Tests for the row hasher behind SmartDatabaseManager._calculate_hash."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engines import _fasthash
+from engines._fasthash import row_hash_u64
+
+
+def _frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'symbol': np.where(np.arange(rows) % 2, 'AAPL', 'MSFT'),
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='min', tz='UTC'),
+    })
+
+
+def test_row_hash_is_order_sensitive_and_row_stable():
+    df = _frame(4)
+
+    hashes = row_hash_u64(df, ['symbol', 'timestamp'])
+    swapped = row_hash_u64(df, ['timestamp', 'symbol'])
+
+    assert hashes.dtype == np.uint64
+    assert len(set(hashes)) == 4
+    assert not np.array_equal(hashes, swapped)
+    assert np.array_equal(row_hash_u64(df.iloc[[2]], ['symbol', 'timestamp']), hashes[[2]])
+
+
+@pytest.mark.skipif(_fasthash._combine_numba is None, reason="numba not installed")
+def test_numba_fold_matches_numpy():
+    df = _frame(1000)
+    column_hashes = np.stack([
+        pd.util.hash_pandas_object(df[column], index=False).to_numpy() for column in df.columns
+    ])
+
+    assert np.array_equal(_fasthash._combine_numba(column_hashes), _fasthash._combine_numpy(column_hashes))
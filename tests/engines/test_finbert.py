@@ -0,0 +1,116 @@
+"""Tests for FinBERTEngine batching logic with a stubbed model."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from engines.finbert import FinBERTEngine
+
+
+class _CharTokenizer:
+    """Fake tokenizer: one token per character, 0 is padding."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts, truncation=True, max_length=512):
+        self.calls += 1
+        return {'input_ids': [[ord(c) for c in text] for text in texts]}
+
+    def pad(self, encoded, return_tensors=None):
+        longest = max(len(ids) for ids in encoded['input_ids'])
+        return {'input_ids': [ids + [0] * (longest - len(ids)) for ids in encoded['input_ids']]}
+
+
+def _score(text):
+    if 'surges' in text:
+        return [0.9, 0.05, 0.05]
+    if 'falls' in text:
+        return [0.1, 0.7, 0.2]
+    return [0.2, 0.2, 0.6]
+
+
+@pytest.fixture()
+def engine() -> FinBERTEngine:
+    # Bypass __init__ so no model is downloaded; score texts by keyword
+    engine = FinBERTEngine.__new__(FinBERTEngine)
+    engine.device = 'cpu'
+    engine.model_name = 'ProsusAI/finbert'
+    engine.backend = 'torch'
+    engine.autocast_dtype = None
+    engine.tokenizer = _CharTokenizer()
+    engine.score_cache = None
+    engine.calls = []
+
+    def fake_forward(inputs):
+        texts = [''.join(chr(c) for c in ids if c) for ids in inputs['input_ids']]
+        engine.calls.append(texts)
+        return np.array([_score(text) for text in texts])
+
+    engine._forward = fake_forward
+    return engine
+
+
+def test_analyze_batch_runs_one_forward_pass_per_batch(engine: FinBERTEngine):
+    results = engine.analyze_batch(['AAPL surges today', '', 'MSFT falls hard'], batch_size=16)
+
+    assert len(engine.calls) == 1
+    assert engine.tokenizer.calls == 1
+    assert [r['sentiment'] for r in results] == ['positive', 'neutral', 'negative']
+
+
+def test_analyze_per_symbol_batch_picks_most_confident_sentence(engine: FinBERTEngine):
+    text = "AAPL surges after earnings. MSFT falls on guidance. Markets were mixed overall"
+    pairs = [(text, 'AAPL'), (text, 'MSFT'), (text, 'TSLA')]
+
+    results = engine.analyze_per_symbol_batch(pairs)
+
+    assert len(engine.calls) == 1
+    assert results[0]['sentiment'] == 'positive'
+    assert results[0]['matched_sentence'] == 'AAPL surges after earnings'
+    assert results[1]['sentiment'] == 'negative'
+    # No sentence mentions TSLA, so the full text is scored without a match
+    assert 'matched_sentence' not in results[2]
+
+
+def test_analyze_batch_groups_texts_by_length(engine: FinBERTEngine):
+    texts = ['a much longer headline here', 'short', 'medium length', 'tiny']
+
+    results = engine.analyze_batch(texts, batch_size=2)
+
+    assert engine.calls == [['tiny', 'short'], ['medium length', 'a much longer headline here']]
+    assert len(results) == len(texts)
+
+
+def test_score_cache_skips_texts_scored_in_earlier_runs(engine: FinBERTEngine, tmp_path):
+    cache_path = str(tmp_path / 'scores.sqlite')
+    engine.tokenizer.do_lower_case = True  # uncased like FinBERT's tokenizer
+    assert engine.enable_score_cache(cache_path)
+
+    first = engine.analyze_batch(['AAPL surges today', 'MSFT falls hard'])
+    engine.score_cache.close()
+
+    # A fresh cache on the same file (new run) only scores the unseen text
+    engine.enable_score_cache(cache_path, max_memory=1)
+    second = engine.analyze_batch(['aapl surges today  ', 'Quiet session'])
+
+    assert engine.calls == [['MSFT falls hard', 'AAPL surges today'], ['Quiet session']]
+    # The model emits float32 probabilities, which the cache stores as-is
+    assert second[0]['sentiment'] == first[0]['sentiment']
+    assert second[0]['scores'] == pytest.approx(first[0]['scores'])
+    assert second[1]['sentiment'] == 'neutral'
+
+
+def test_score_cache_keys_by_model_variant_and_tokenizer_case(engine: FinBERTEngine, tmp_path):
+    cache_path = str(tmp_path / 'scores.sqlite')
+    engine.enable_score_cache(cache_path)
+    engine.analyze_batch(['AAPL surges today'])
+
+    # Cased tokenizer: a different case is a different text
+    engine.analyze_batch(['aapl surges today'])
+    # Same text, other backend: the FP32 score must not be reused
+    engine.backend = 'onnx-int8'
+    engine.enable_score_cache(cache_path)
+    engine.analyze_batch(['AAPL surges today'])
+
+    assert engine.calls == [['AAPL surges today'], ['aapl surges today'], ['AAPL surges today']]
@@ -0,0 +1,119 @@
+"""Tests for RSSEngine fetch orchestration."""
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from engines.rss import RSSEngine
+
+
+@pytest.fixture()
+def rss(tmp_path: Path) -> RSSEngine:
+    engine = RSSEngine(config_path=str(tmp_path / "missing.json"), use_database=False)
+    engine.settings.update({"batch_timeout": 0.5, "per_host_concurrency": 1})
+    return engine
+
+
+def test_fetch_sources_abandons_feeds_past_batch_timeout(rss: RSSEngine, monkeypatch):
+    release = threading.Event()
+
+    def fake_fetch(url, use_proxy=None):
+        if "slow" in url:
+            release.wait(5)
+        return {"url": url}
+
+    monkeypatch.setattr(rss, "fetch_feed", fake_fetch)
+    sources = [
+        {"name": "a", "url": "https://a.example/feed"},
+        {"name": "slow", "url": "https://slow.example/feed"},
+        {"name": "b", "url": "https://b.example/feed"},
+    ]
+
+    started = time.monotonic()
+    results = rss._fetch_sources(sources)
+    release.set()
+
+    assert time.monotonic() - started < 2
+    assert [source["name"] for source, _ in results] == ["a", "b"]
+
+
+def test_fetch_sources_limits_requests_per_host(rss: RSSEngine, monkeypatch):
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def fake_fetch(url, use_proxy=None):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return {"url": url}
+
+    monkeypatch.setattr(rss, "fetch_feed", fake_fetch)
+    sources = [{"name": str(i), "url": f"https://same.example/feed/{i}"} for i in range(6)]
+
+    results = rss._fetch_sources(sources)
+
+    assert len(results) == 6
+    assert active["peak"] == 1
+
+
+def test_to_arrow_dictionary_encodes_repeated_columns(rss: RSSEngine):
+    pa = pytest.importorskip("pyarrow")
+    from datetime import datetime, timezone
+
+    entries = [
+        {
+            "timestamp": datetime(2024, 1, day, tzinfo=timezone.utc),
+            "source": "Feed",
+            "category": "markets",
+            "title": f"title {day}",
+            "link": f"https://feed.example/{day}",
+            "description": "",
+            "author": "",
+            "tags": "",
+        }
+        for day in (1, 2)
+    ]
+
+    table = rss.to_arrow(entries)
+
+    assert table.num_rows == 2
+    assert pa.types.is_dictionary(table.schema.field("source").type)
+    assert table.column("title").to_pylist() == ["title 1", "title 2"]
+
+
+class _StreamingResponse:
+    url = "https://feed.example/rss"
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+def test_parse_feed_stream_matches_feedparser_entries(rss: RSSEngine):
+    body = (
+        b'<?xml version="1.0"?><rss xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>'
+        b'<item><title>First</title><link>https://feed.example/1</link>'
+        b'<description>Body</description><dc:creator>Desk</dc:creator>'
+        b'<pubDate>Mon, 06 Sep 2021 16:45:00 +0200</pubDate><category>stocks</category></item>'
+        b'<item><title>Undated</title><link>https://feed.example/2</link></item>'
+        b'</channel></rss>'
+    )
+
+    feed = rss._parse_feed_stream(_StreamingResponse(body), chunk_size=16)
+    entries = rss.parse_feed_entries(feed, "Feed", "markets")
+
+    assert feed.bozo == 0
+    assert len(entries) == 1
+    assert entries[0]["title"] == "First"
+    assert entries[0]["author"] == "Desk"
+    assert entries[0]["tags"] == "stocks"
+    assert entries[0]["timestamp"].hour == 14
@@ -0,0 +1,160 @@
+"""Tests for SentimentAnalysisPipeline transforms (no FinBERT model needed)."""
+from __future__ import annotations
+
+import warnings
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from engines.sentiment_pipeline import SentimentAnalysisPipeline
+
+
+@pytest.fixture()
+def pipeline() -> SentimentAnalysisPipeline:
+    # Bypass __init__ so the FinBERT model is never loaded
+    pipeline = SentimentAnalysisPipeline.__new__(SentimentAnalysisPipeline)
+    pipeline._run_started_at = datetime(2024, 1, 3, 12, 0)
+    return pipeline
+
+
+def test_calculate_sentiment_score_signs_confidence(pipeline: SentimentAnalysisPipeline):
+    df = pd.DataFrame({
+        'sentiment': ['positive', 'negative', 'neutral', 'unknown'],
+        'sentiment_confidence': [0.9, 0.6, 0.8, 0.5],
+    })
+
+    with warnings.catch_warnings():
+        # Unknown labels must not trip pandas' Categorical deprecation warning
+        warnings.simplefilter('error')
+        scored = pipeline._calculate_sentiment_score(df)
+
+    assert scored['sentiment_score'].tolist() == pytest.approx([0.9, -0.6, 0.0, 0.0])
+
+
+def test_explode_symbols_merges_tickers_and_cryptos(pipeline: SentimentAnalysisPipeline):
+    df = pd.DataFrame({
+        'id': ['a', 'b', 'c'],
+        'tickers_mentioned': ['AAPL, MSFT,AAPL', None, ''],
+        'cryptos_mentioned': ['BTCUSDT,MSFT', 'ETHUSDT', None],
+    })
+
+    exploded = pipeline._explode_symbols(df)
+
+    assert list(zip(exploded['id'], exploded['symbol'])) == [
+        ('a', 'AAPL'), ('a', 'MSFT'), ('a', 'BTCUSDT'), ('b', 'ETHUSDT'),
+    ]
+
+
+class _FakeDB:
+    def __init__(self):
+        self.saved = {}
+        self.executed = []
+
+    def bulk_insert(self, df, table):
+        self.saved.setdefault(table, []).append(df)
+        return len(df)
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+
+class _FakeFinBERT:
+    def __init__(self):
+        self.pairs = []
+
+    def analyze_per_symbol_batch(self, pairs, batch_size=16):
+        self.pairs.extend(pairs)
+        sentiments = {'AAPL': 'positive', 'BTCUSDT': 'negative'}
+        return [
+            {
+                'sentiment': sentiments.get(symbol, 'neutral'),
+                'confidence': 0.8,
+                'scores': {'positive': 0.1, 'negative': 0.1, 'neutral': 0.8},
+            }
+            for _, symbol in pairs
+        ]
+
+
+def test_analyze_per_symbol_builds_scored_rows(pipeline: SentimentAnalysisPipeline):
+    pipeline.db = _FakeDB()
+    pipeline.finbert = _FakeFinBERT()
+    pipeline.batch_size = 16
+    df = pd.DataFrame({
+        'id': ['n1', 'n2'],
+        'timestamp': pd.to_datetime(['2024-01-01', '2024-01-02']),
+        'source': ['feed', 'feed'],
+        'title': ['Apple and Bitcoin', 'Quiet day'],
+        'description': ['desc', None],
+        'tickers_mentioned': ['AAPL', ''],
+        'cryptos_mentioned': ['BTCUSDT', ''],
+    })
+
+    saved = pipeline._analyze_per_symbol(df)
+
+    assert saved['id'].tolist() == ['symbol_n1_AAPL', 'symbol_n1_BTCUSDT']
+    assert saved['sentiment_score'].tolist() == pytest.approx([0.8, -0.8])
+    assert (saved['timestamp'] == pd.Timestamp('2024-01-01')).all()
+    assert pipeline.finbert.pairs == [('Apple and Bitcoin desc', 'AAPL'), ('Apple and Bitcoin desc', 'BTCUSDT')]
+    assert (saved['analyzed_at'] == pipeline._run_started_at).all()
+
+
+def test_run_processes_pending_news_in_chunks(pipeline: SentimentAnalysisPipeline, monkeypatch):
+    pipeline.batch_size = 1  # chunk size = 64 articles
+    pending = pd.DataFrame({'id': [f"n{i}" for i in range(150)]})
+    saved = []
+
+    monkeypatch.setattr(pipeline, '_load_pending_news', lambda limit=None: pending)
+    monkeypatch.setattr(pipeline, '_analyze_chunk', lambda news: (news, None))
+    monkeypatch.setattr(pipeline, '_save_chunk', lambda analyzed, symbol_df: saved.append(len(analyzed)))
+
+    pipeline.run()
+
+    assert saved == [64, 64, 22]
+
+
+def test_update_status_binds_ids_as_parameter(pipeline: SentimentAnalysisPipeline):
+    pipeline.db = _FakeDB()
+
+    pipeline._update_status(["n1", "o'brien"])
+
+    query, params = pipeline.db.executed[0]
+    assert "o'brien" not in query
+    assert params[1] == ["n1", "o'brien"]
+
+
+def test_filter_seen_content_skips_analyzed_and_repeated(pipeline: SentimentAnalysisPipeline):
+    pipeline._seen_hashes = {'h1'}
+    df = pd.DataFrame({
+        'id': ['n1', 'n2', 'n3', 'n4', 'n5'],
+        'content_hash': ['h1', 'h2', 'h2', None, 'h3'],
+    })
+
+    fresh, skipped = pipeline._filter_seen_content(df)
+
+    assert fresh['id'].tolist() == ['n2', 'n4', 'n5']
+    assert skipped == ['n1', 'n3']
+
+
+def test_save_general_sentiment_maps_columns(pipeline: SentimentAnalysisPipeline):
+    pipeline.db = _FakeDB()
+    df = pd.DataFrame({
+        'id': ['n1', 'n2'],
+        'timestamp': pd.to_datetime(['2024-01-01', '2024-01-02'], utc=True),
+        'source': ['feed', 'feed'],
+        'title': ['t1', 't2'],
+        'link': ['l1', 'l2'],
+        'sentiment': ['positive', 'neutral'],
+        'sentiment_score': [0.7, 0.0],
+        'sentiment_confidence': [0.7, 0.9],
+        'sentiment_positive': [0.7, 0.05],
+        'sentiment_negative': [0.1, 0.05],
+        'sentiment_neutral': [0.2, 0.9],
+    }, index=[10, 20])
+
+    pipeline._save_general_sentiment(df)
+
+    saved = pipeline.db.saved['news_sentiment'][0]
+    assert saved['id'].tolist() == ['sentiment_n1', 'sentiment_n2']
+    assert saved['confidence'].tolist() == [0.7, 0.9]
+    assert str(saved['timestamp'].dtype) == str(df['timestamp'].dtype)
@@ -0,0 +1,346 @@
+"""Tests for SignalExecutionManager validation and sizing (no brokers needed)."""
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from engines.signal_execution import SignalExecutionManager
+
+CONFIG_PATH = Path(__file__).resolve().parents[2] / 'config' / 'paper_trading.json'
+
+
+class _FakeDB:
+    def __init__(self, daily_pnl=None):
+        self.daily_pnl = daily_pnl or {}
+        self.queries = []
+        self.executed = []
+        self.saved = {}
+
+    def query(self, query, params=None):
+        self.queries.append((query, params))
+        exchange = 'binance' if 'binance' in str(params) + query else 'alpaca'
+        return pd.DataFrame({'daily_pnl': [self.daily_pnl.get(exchange, 0.0)]})
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def save_dataframe(self, df, table, mode='append'):
+        self.saved.setdefault(table, []).append(df)
+
+    def bulk_insert(self, df, table):
+        self.saved.setdefault(table, []).append(df)
+        return len(df)
+
+
+@pytest.fixture()
+def manager(monkeypatch) -> SignalExecutionManager:
+    # Bypass __init__ so no broker or database is touched
+    manager = SignalExecutionManager.__new__(SignalExecutionManager)
+    manager.config = json.loads(CONFIG_PATH.read_text())
+    manager._crypto_pairs = frozenset(manager.config['binance']['trading_pairs'])
+    manager._nyse = None
+    manager.alpaca_store = manager.alpaca_broker = None
+    manager.ccxt_store = manager.ccxt_broker = None
+    manager._run_started_at = RUN_STARTED_AT
+    manager._run_started_iso = manager._run_started_at.isoformat()
+    manager._run_started_utc = pd.Timestamp(RUN_STARTED_AT, tz='UTC')
+    manager.db = _FakeDB()
+    manager.portfolio_state = {
+        'alpaca': {'cash': 100000.0, 'positions': {}, 'total_value': 100000.0},
+        'binance': {'cash': 10000.0, 'positions': {}, 'total_value': 10000.0},
+    }
+    manager._risk_ctx = manager._build_risk_contexts()
+    manager._risk_state = manager._load_risk_state()
+    monkeypatch.setattr(manager, '_is_market_open', lambda trading_hours, now=None: True)
+    return manager
+
+
+RUN_STARTED_AT = datetime(2024, 1, 3, 12, 0)
+
+
+def _signals(now=pd.Timestamp(RUN_STARTED_AT, tz='UTC'), **overrides) -> pd.DataFrame:
+    data = {
+        'id': ['s1', 's2', 's3', 's4'],
+        'symbol': ['AAPL', 'BTCUSDT', 'MSFT', 'ETHUSDT'],
+        'signal_type': ['buy', 'buy', 'sell', 'buy'],
+        'signal_strength': [1.0, 1.0, 1.0, 1.0],
+        'sentiment_score': [0.5, 0.6, -0.5, 0.7],
+        'confidence': [0.9, 0.8, 0.95, 0.9],
+        'price': [100.0, 50000.0, 300.0, 2000.0],
+        'timestamp': [now, now, now - pd.Timedelta(minutes=45), now],
+        'news_ids': ['n1', 'n2', 'n3', 'n4'],
+    }
+    data.update(overrides)
+    return pd.DataFrame(data)
+
+
+def test_validate_signals_rejects_with_first_failing_rule(manager: SignalExecutionManager):
+    manager.portfolio_state['binance']['positions']['ETHUSDT'] = {
+        'size': 0.1, 'avg_price': 2000.0, 'current_price': 2000.0, 'pnl': 0.0,
+    }
+
+    signals = _signals()
+    signals['symbol'] = signals['symbol'].astype('category')
+
+    checked = manager._validate_signals(signals)
+
+    assert checked['exchange'].tolist() == ['alpaca', 'binance', 'alpaca', 'binance']
+    assert checked['reject_reason'].tolist() == [
+        'valid', 'confidence_too_low_0.80', 'signal_expired_45min', 'position_already_exists',
+    ]
+
+
+def test_validate_signals_checks_market_hours_for_stocks_only(manager: SignalExecutionManager, monkeypatch):
+    monkeypatch.setattr(manager, '_is_market_open', lambda trading_hours, now=None: False)
+
+    checked = manager._validate_signals(_signals(confidence=[0.9, 0.9, 0.9, 0.9]))
+
+    assert checked['reject_reason'].tolist()[:2] == ['market_closed', 'valid']
+
+
+def test_validate_signals_applies_daily_loss_circuit_breaker(manager: SignalExecutionManager):
+    manager.db = _FakeDB(daily_pnl={'alpaca': -6000.0})
+    manager._risk_state = manager._load_risk_state()
+
+    checked = manager._validate_signals(_signals())
+
+    assert checked['reject_reason'].iloc[0] == 'daily_loss_limit_hit_6.0%'
+
+
+def test_run_submits_valid_orders_and_records_results(manager: SignalExecutionManager, monkeypatch):
+    import threading
+
+    signals = _signals(now=pd.Timestamp.now(tz='UTC'), confidence=[0.9, 0.9, 0.9, 0.3])
+    monkeypatch.setattr(manager, '_load_active_signals', lambda: signals)
+    submitted = []
+
+    def fake_execute(signal, position_size):
+        submitted.append((signal['symbol'], threading.current_thread().name))
+        if signal['symbol'] == 'BTCUSDT':
+            return False, {'error': 'binance_broker_not_initialized'}
+        return True, {'exchange': 'alpaca', 'symbol': signal['symbol'], 'order_ref': 1}
+
+    monkeypatch.setattr(manager, '_execute_signal', fake_execute)
+
+    manager.run()
+
+    assert sorted(symbol for symbol, _ in submitted) == ['AAPL', 'BTCUSDT']
+    assert all(thread != threading.main_thread().name for _, thread in submitted)
+    # One UPDATE for rejections, one for execution results
+    assert len(manager.db.executed) == 2
+    statuses = {}
+    for _, params in manager.db.executed:
+        statuses.update(zip(params[0], params[1]))
+    assert statuses == {'s1': 'executed', 's2': 'failed', 's3': 'rejected', 's4': 'rejected'}
+    assert len(manager.db.saved['paper_trades']) == 1
+
+
+def test_update_signal_statuses_binds_values_as_parameters(manager: SignalExecutionManager):
+    manager._update_signal_statuses([("o'brien", 'executed', '{"side": "buy"}'), ('s2', 'rejected', 'market_closed')])
+
+    query, params = manager.db.executed[0]
+    assert "o'brien" not in query
+    assert params[:3] == [["o'brien", 's2'], ['executed', 'rejected'], ['{"side": "buy"}', 'market_closed']]
+
+
+def test_run_counts_accepted_orders_towards_risk_limit(manager: SignalExecutionManager, monkeypatch):
+    # Each order takes the 10% max position, so the third hits the 20% limit
+    signals = _signals(
+        id=['s1', 's2', 's3'], symbol=['AAPL', 'MSFT', 'NVDA'], signal_type=['buy'] * 3,
+        signal_strength=[1.0] * 3, sentiment_score=[0.5] * 3, confidence=[0.9] * 3,
+        price=[100.0, 300.0, 500.0], timestamp=[pd.Timestamp.now(tz='UTC')] * 3, news_ids=['n1', 'n2', 'n3'],
+    )
+    monkeypatch.setattr(manager, '_load_active_signals', lambda: signals)
+    monkeypatch.setattr(manager, '_execute_signal', lambda signal, size: (True, {'order_ref': 1}))
+    manager.db.queries.clear()
+
+    manager.run()
+
+    statuses = {}
+    for _, params in manager.db.executed:
+        statuses.update(zip(params[0], zip(params[1], params[2])))
+    assert statuses['s3'] == ('rejected', 'max_risk_exceeded_20.0%')
+    assert [statuses[s][0] for s in ('s1', 's2')] == ['executed', 'executed']
+    # Daily PnL is queried once per exchange, not per signal
+    assert sum('paper_trades' in query for query, _ in manager.db.queries) == 2
+
+
+def test_calculate_position_sizes_applies_kelly_per_exchange(manager: SignalExecutionManager):
+    signals = pd.DataFrame({
+        'exchange': ['alpaca', 'binance', 'alpaca', 'alpaca', 'alpaca'],
+        'confidence': [0.9, 0.9, 0.2, 0.9, float('nan')],
+        'price': [100.0, 1000.0, 100.0, 0.0, 100.0],
+    })
+
+    kelly_pct, sizes = manager._calculate_position_sizes(signals)
+
+    # alpaca: b = 2.5, (2.5*0.9 - 0.1)/2.5 * 0.25 = 0.215 -> capped at 10%
+    # binance: b = 8/3, (8/3*0.9 - 0.1)/(8/3) * 0.2 = 0.1725 -> capped at 15%
+    # a NaN confidence sizes to 0 so run() rejects it as too small
+    assert kelly_pct.tolist() == pytest.approx([0.10, 0.15, 0.0, 0.10, 0.0])
+    assert sizes.tolist() == pytest.approx([100.0, 1.5, 0.0, 0.0, 0.0])
+
+
+def test_calculate_daily_pnl_binds_exchange(manager: SignalExecutionManager):
+    manager.db = _FakeDB(daily_pnl={'binance': -12.5})
+
+    assert manager._calculate_daily_pnl('binance') == -12.5
+
+    query, params = manager.db.queries[-1]
+    assert params == ['binance']
+    assert 'binance' not in query
+
+
+def test_update_portfolio_state_writes_both_exchanges_once(manager: SignalExecutionManager):
+    manager.portfolio_state['binance']['positions']['BTCUSDT'] = {
+        'size': 0.1, 'avg_price': 50000.0, 'current_price': 51000.0, 'pnl': 100.0,
+    }
+
+    manager._update_portfolio_state()
+
+    (saved,) = manager.db.saved['portfolio_state']
+    assert list(zip(saved['exchange'], saved['symbol'])) == [
+        ('alpaca', 'TOTAL'), ('binance', 'TOTAL'), ('binance', 'BTCUSDT'),
+    ]
+
+
+def test_is_crypto_uses_pairs_and_usdt_suffix(manager: SignalExecutionManager):
+    assert manager._is_crypto('BTCUSDT')
+    assert manager._is_crypto('PEPEUSDT')
+    assert not manager._is_crypto('AAPL')
+
+
+@pytest.mark.parametrize('moment, expected', [
+    ('2024-07-08 10:00', True),   # Monday, EDT
+    ('2024-01-08 15:59', True),   # Monday, EST
+    ('2024-07-08 09:00', False),  # before the open
+    ('2024-07-06 11:00', False),  # Saturday
+])
+def test_is_market_open_uses_configured_timezone(manager: SignalExecutionManager, moment, expected):
+    trading_hours = manager.config['alpaca']['trading_hours']
+    now = pd.Timestamp(moment, tz='America/New_York')
+
+    assert SignalExecutionManager._is_market_open(manager, trading_hours, now) is expected
+
+
+def test_record_paper_trades_inserts_once_with_exit_levels(manager: SignalExecutionManager):
+    trades = [
+        ({'id': 's1', 'exchange': 'alpaca', 'symbol': 'AAPL', 'signal_type': 'buy',
+          'price': 100.0, 'sentiment_score': 0.5, 'confidence': 0.9}, 10.0),
+        ({'id': 's2', 'exchange': 'binance', 'symbol': 'BTCUSDT', 'signal_type': 'sell',
+          'price': 50000.0, 'sentiment_score': -0.6, 'confidence': 0.9}, 0.01),
+    ]
+
+    manager._record_paper_trades(trades)
+
+    (saved,) = manager.db.saved['paper_trades']
+    assert saved['signal_id'].tolist() == ['s1', 's2']
+    assert saved['stop_loss'].tolist() == pytest.approx([98.0, 51500.0])
+    assert saved['take_profit'].tolist() == pytest.approx([105.0, 46000.0])
+    assert saved['position_size'].tolist() == pytest.approx([10.0, 0.01])
+    assert saved['id'].tolist() == ['alpaca_AAPL_20240103120000_0', 'binance_BTCUSDT_20240103120000_1']
+    assert (saved['entry_time'] == '2024-01-03T12:00:00').all()
+
+
+def test_configure_http_pools_resizes_broker_sessions_once(manager: SignalExecutionManager):
+    import requests
+    from types import SimpleNamespace
+
+    session = requests.Session()
+    manager.ccxt_store = SimpleNamespace(_exchange=SimpleNamespace(session=session))
+    manager.alpaca_store = None
+
+    manager._configure_http_pools(32)
+    adapter = session.get_adapter('https://')
+    manager._configure_http_pools(32)
+
+    assert adapter._pool_maxsize == 32
+    assert session.get_adapter('https://') is adapter
+
+
+def test_update_portfolio_state_keeps_float_columns_without_positions(manager: SignalExecutionManager):
+    manager._update_portfolio_state()
+
+    (saved,) = manager.db.saved['portfolio_state']
+    assert saved['position_size'].dtype == 'float64'
+    assert saved['total_cash'].tolist() == [100000.0, 10000.0]
+
+
+def test_load_active_signals_parses_timestamps_as_utc(manager: SignalExecutionManager):
+    class _SignalsDB(_FakeDB):
+        def query(self, query, params=None):
+            return pd.DataFrame({
+                'id': ['s1', 's2'],
+                'symbol': ['AAPL', 'BTCUSDT'],
+                'signal_type': ['buy', 'sell'],
+                'timestamp': ['2024-01-03T11:50:00', '2024-01-03T11:50:00+00:00'],
+            })
+
+    manager.db = _SignalsDB()
+
+    signals = manager._load_active_signals()
+
+    assert str(signals['timestamp'].dt.tz) == 'UTC'
+    assert (signals['timestamp'] == pd.Timestamp('2024-01-03 11:50', tz='UTC')).all()
+    assert signals['symbol'].dtype == 'category'
+
+
+def test_load_portfolio_state_groups_rows_by_exchange(manager: SignalExecutionManager):
+    class _PortfolioDB(_FakeDB):
+        def query(self, query, params=None):
+            return pd.DataFrame({
+                'exchange': ['ALPACA', 'binance', 'binance', 'kraken'],
+                'symbol': ['TOTAL', 'TOTAL', 'BTCUSDT', 'TOTAL'],
+                'position_size': [0.0, 0.0, 0.5, 0.0],
+                'avg_entry_price': [0.0, 0.0, 40000.0, 0.0],
+                'current_price': [0.0, 0.0, 42000.0, 0.0],
+                'unrealized_pnl': [0.0, 0.0, 1000.0, 0.0],
+                'total_cash': [90000.0, 5000.0, 5000.0, 1.0],
+                'total_value': [95000.0, 26000.0, 26000.0, 1.0],
+            })
+
+    manager.db = _PortfolioDB()
+
+    manager._load_portfolio_state()
+
+    assert manager.portfolio_state['alpaca']['cash'] == 90000.0
+    assert manager.portfolio_state['alpaca']['positions'] == {}
+    assert manager.portfolio_state['binance']['total_value'] == 26000.0
+    assert manager.portfolio_state['binance']['positions'] == {
+        'BTCUSDT': {'size': 0.5, 'avg_price': 40000.0, 'current_price': 42000.0, 'pnl': 1000.0},
+    }
+    assert 'kraken' not in manager.portfolio_state
+
+
+def test_run_still_saves_executions_when_rejection_write_fails(manager: SignalExecutionManager, monkeypatch):
+    signals = _signals(now=pd.Timestamp.now(tz='UTC'), confidence=[0.9, 0.3, 0.3, 0.3])
+    monkeypatch.setattr(manager, '_load_active_signals', lambda: signals)
+    monkeypatch.setattr(manager, '_execute_signal', lambda signal, size: (True, {'order_ref': 1}))
+    writes = []
+
+    def flaky_execute(query, params=None):
+        writes.append(params)
+        if len(writes) == 1:
+            raise RuntimeError('database is locked')
+
+    manager.db.execute = flaky_execute
+
+    manager.run()
+
+    assert writes[-1][:2] == [['s1'], ['executed']]
+    assert len(manager.db.saved['paper_trades']) == 1
+
+
+def test_risk_context_reads_only_risk_fields():
+    from engines.signal_execution import RiskContext
+
+    settings = json.loads(CONFIG_PATH.read_text())['binance']['risk_settings']
+
+    ctx = RiskContext.from_settings({**settings, 'unrelated': 'ignored'})
+
+    assert ctx.min_confidence == 0.85
+    assert ctx.kelly_fraction == 0.2
@@ -55,3 +55,330 @@ def test_self_documentation_includes_tables(smart_db: SmartDatabaseManager):
     assert blob['db_file'].endswith('smart_db.duckdb')
     assert 'navigation' in blob
     assert any(entry['name'] == 'doc_table' for entry in blob['tables'])
+
+
+def test_bulk_insert_creates_then_appends_by_name(smart_db: SmartDatabaseManager):
+    import pandas as pd
+
+    first = pd.DataFrame({'id': ['a', 'b'], 'score': [0.5, -0.25]})
+    second = pd.DataFrame({'score': [0.75], 'id': ['c']})
+
+    assert smart_db.bulk_insert(first, 'bulk_table') == 2
+    assert smart_db.bulk_insert(second, 'bulk_table') == 1
+
+    rows = smart_db.conn.execute("SELECT id, score FROM bulk_table ORDER BY id").fetchall()
+    assert rows == [('a', 0.5), ('b', -0.25), ('c', 0.75)]
+    assert not any(name.startswith('_bulk_') for name in smart_db.list_tables())
+
+
+def test_bulk_insert_adds_new_columns(smart_db: SmartDatabaseManager):
+    import pandas as pd
+
+    smart_db.bulk_insert(pd.DataFrame({'id': ['a']}), 'bulk_table')
+    smart_db.bulk_insert(pd.DataFrame({'id': ['b'], 'content_hash': ['h1']}), 'bulk_table')
+
+    rows = smart_db.conn.execute("SELECT id, content_hash FROM bulk_table ORDER BY id").fetchall()
+    assert rows == [('a', None), ('b', 'h1')]
+
+
+def test_query_and_execute_bind_parameters(smart_db: SmartDatabaseManager):
+    smart_db.execute("CREATE TABLE params_table (id VARCHAR, status VARCHAR)")
+    smart_db.execute("INSERT INTO params_table VALUES (?, ?)", ["o'brien", 'active'])
+
+    result = smart_db.query("SELECT status FROM params_table WHERE id = ?", ["o'brien"])
+
+    assert result['status'].tolist() == ['active']
+
+
+def test_calculate_hash_is_stable_per_row(smart_db: SmartDatabaseManager):
+    import pandas as pd
+
+    df = pd.DataFrame({
+        'link': ['a', 'b', 'a'],
+        'timestamp': pd.to_datetime(['2024-01-01', '2024-01-01', '2024-01-01'], utc=True),
+    })
+
+    hashes = smart_db._calculate_hash(df, ['link', 'timestamp'])
+
+    assert hashes.iloc[0] == hashes.iloc[2]
+    assert hashes.iloc[0] != hashes.iloc[1]
+    assert all(isinstance(value, str) for value in hashes)
+
+
+@pytest.fixture()
+def sandbox_db(tmp_path: Path, monkeypatch) -> Iterator[SmartDatabaseManager]:
+    config_path = Path(__file__).resolve().parents[2] / "config" / "database.json"
+    monkeypatch.chdir(tmp_path)
+    manager = SmartDatabaseManager(config_path=str(config_path), db_path=str(tmp_path / "smart_db.duckdb"))
+    yield manager
+    manager.close()
+
+
+def test_store_market_data_merges_and_dedups(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    first = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-02', '2024-01-01']),
+        'close': [2.0, 1.0],
+    })
+    second = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-02', '2024-01-03'], utc=True),
+        'close': [2.5, 3.0],
+    })
+
+    sandbox_db.store_market_data(first, 'yahoo', 'AAPL', '1d')
+    file_path = sandbox_db.store_market_data(second, 'yahoo', 'AAPL', '1d')
+
+    stored = pd.read_parquet(file_path)
+    assert stored['close'].tolist() == [1.0, 2.5, 3.0]
+    assert stored['timestamp'].is_monotonic_increasing
+
+
+def test_store_reference_data_replaces_by_key(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    sandbox_db.store_reference_data(pd.DataFrame({'symbol': ['AAPL', 'MSFT'], 'name': ['Apple', 'MS']}), 'symbols')
+    file_path = sandbox_db.store_reference_data(pd.DataFrame({'symbol': ['MSFT'], 'name': ['Microsoft']}), 'symbols')
+
+    stored = pd.read_parquet(file_path).sort_values('symbol')
+    assert stored['name'].tolist() == ['Apple', 'Microsoft']
+    assert not list(file_path.parent.glob('*.tmp'))
+
+
+def test_store_reference_data_without_key_overwrites(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    sandbox_db.store_reference_data(pd.DataFrame({'name': ['NYSE', 'NASDAQ']}), 'exchanges')
+    file_path = sandbox_db.store_reference_data(pd.DataFrame({'name': ['NYSE', 'NASDAQ']}), 'exchanges')
+
+    assert pd.read_parquet(file_path)['name'].tolist() == ['NYSE', 'NASDAQ']
+
+
+def test_store_news_data_dedups_within_partition(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    df = pd.DataFrame({
+        'timestamp': ['2024-01-05T10:00:00Z', '2024-01-05T10:00:00Z', '2024-02-01T08:00:00Z'],
+        'link': ['l1', 'l1', 'l2'],
+        'title': ['old', 'new', 'feb'],
+    })
+
+    files = sandbox_db.store_news_data(df, 'feed')
+    sandbox_db.store_news_data(df.iloc[[2]].assign(title='feb2'), 'feed')
+
+    assert [path.parent.name for path in files] == ['month=1', 'month=2']
+    january = pd.read_parquet(files[0])
+    february = pd.concat(pd.read_parquet(path) for path in files[1].parent.glob('*.parquet'))
+    assert january['title'].tolist() == ['new']
+    assert february['title'].tolist() == ['feb2']
+    assert str(february['timestamp'].dt.tz) == 'UTC'
+    # The merge must not copy the year=/month= path keys into the data files
+    stored_columns = sandbox_db.query(
+        f"DESCRIBE SELECT * FROM read_parquet('{files[1].parent}/*.parquet', hive_partitioning=false)"
+    )['column_name'].tolist()
+    assert 'year' not in stored_columns and 'month' not in stored_columns
+
+    queried = sandbox_db.query_news_data(source='feed')
+    assert queried['title'].tolist() == ['feb2', 'new']
+    assert 'year' not in queried.columns
+
+
+def test_store_news_data_with_apostrophe_in_source(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    df = pd.DataFrame({'timestamp': ['2024-01-05T10:00:00Z'], 'link': ['l1'], 'title': ['first']})
+
+    sandbox_db.store_news_data(df, "Investor's Business Daily")
+    files = sandbox_db.store_news_data(df.assign(link='l2', title='second'), "Investor's Business Daily")
+
+    assert 'src=Investor%27s Business Daily' in files[0].parts
+    queried = sandbox_db.query_news_data(source="Investor's Business Daily")
+    assert sorted(queried['title'].tolist()) == ['first', 'second']
+
+
+def test_query_news_data_filters_on_row_source_not_store_key(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    df = pd.DataFrame({
+        'timestamp': ['2024-01-05T10:00:00Z'], 'link': ['l1'], 'title': ['t'], 'source': ['Reuters'],
+    })
+
+    files = sandbox_db.store_news_data(df, 'Reuters_business')
+
+    assert 'src=Reuters_business' in files[0].parts
+    queried = sandbox_db.query_news_data(source='Reuters')
+    assert queried['source'].tolist() == ['Reuters']
+    assert 'src' not in queried.columns
+    assert sandbox_db.query_news_data(source='Reuters_business').empty
+
+
+def test_query_market_data_reads_hive_layout(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01']), 'close': [1.0]})
+    file_path = sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+    sandbox_db.store_market_data(bars.assign(close=2.0), 'yahoo', 'MSFT', '1d')
+
+    result = sandbox_db.query_market_data(symbol='AAPL')
+
+    assert 'symbol=AAPL' in file_path.parts
+    assert result['close'].tolist() == [1.0]
+
+
+def test_slash_symbol_is_encoded_in_one_partition(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01']), 'close': [1.0]})
+    file_path = sandbox_db.store_market_data(bars, 'ccxt', 'BTC/USDT', '1h')
+    sandbox_db.store_market_data(bars.assign(timestamp=pd.Timestamp('2024-01-02'), close=2.0), 'ccxt', 'BTC/USDT', '1h')
+
+    assert 'symbol=BTC%2FUSDT' in file_path.parts
+    result = sandbox_db.query_market_data(symbol='BTC/USDT')
+    assert result['close'].tolist() == [1.0, 2.0]
+    assert result['symbol'].unique().tolist() == ['BTC/USDT']
+    assert sandbox_db.compact('market_data') == 1
+    assert list(file_path.parent.glob('*.parquet')) == [file_path]
+
+
+def test_store_market_data_appends_newer_rows_as_part_file(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01', '2024-01-02']), 'close': [1.0, 2.0]})
+    file_path = sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+    sandbox_db.store_market_data(bars.assign(timestamp=bars['timestamp'] + pd.Timedelta(days=2)), 'yahoo', 'AAPL', '1d')
+
+    parts = sorted(file_path.parent.glob('*.parquet'))
+    assert len(parts) == 2
+    assert pd.read_parquet(file_path)['close'].tolist() == [1.0, 2.0]
+
+    # An overlapping batch folds every part back into data.parquet
+    sandbox_db.store_market_data(bars.iloc[[1]].assign(close=9.0), 'yahoo', 'AAPL', '1d')
+
+    assert list(file_path.parent.glob('*.parquet')) == [file_path]
+    assert pd.read_parquet(file_path)['close'].tolist() == [1.0, 9.0, 1.0, 2.0]
+    assert sandbox_db.query_market_data(symbol='AAPL')['close'].tolist() == [1.0, 9.0, 1.0, 2.0]
+
+
+def test_store_leaves_caller_frame_untouched(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    bars = pd.DataFrame({'timestamp': ['2024-01-01'], 'close': [1.0]})
+
+    sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+
+    assert bars.columns.tolist() == ['timestamp', 'close']
+    assert bars['timestamp'].tolist() == ['2024-01-01']
+
+
+def test_store_writes_zstd_parquet(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01']), 'close': [1.0]})
+
+    file_path = sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+
+    assert pq.ParquetFile(file_path).metadata.row_group(0).column(0).compression == 'ZSTD'
+
+
+def test_query_market_data_binds_filters(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01', '2024-01-05']), 'close': [1.0, 2.0]})
+    sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+
+    result = sandbox_db.query_market_data(symbol='AAPL', start_date='2024-01-02')
+    injected = sandbox_db.query_market_data(symbol="X' OR '1'='1")
+
+    assert result['close'].tolist() == [2.0]
+    assert injected.empty
+
+
+def test_store_creates_one_unified_view_per_data_type(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    assert 'market_all' not in sandbox_db.list_tables()
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01']), 'close': [1.0]})
+    sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+    sandbox_db.store_market_data(bars, 'yahoo', 'MSFT', '1d')
+
+    tables = sandbox_db.list_tables()
+    assert [name for name in tables if name.startswith('market')] == ['market_all']
+    assert sandbox_db.query("SELECT count(*) AS n FROM market_all")['n'].tolist() == [2]
+
+
+def test_get_data_summary_reads_parquet_metadata(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01', '2024-01-02']), 'close': [1.0, 2.0]})
+    sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+
+    summary = sandbox_db.get_data_summary()
+
+    assert summary['market_data']['files'] == 1
+    assert summary['market_data']['rows'] == 2
+    assert 'news_data' not in summary
+
+
+def test_query_data_without_files_returns_empty(sandbox_db: SmartDatabaseManager):
+    assert sandbox_db.query_market_data(symbol='AAPL').empty
+    assert sandbox_db.query_news_data(source='feed').empty
+
+
+def test_compact_folds_part_files(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01']), 'close': [1.0]})
+    file_path = sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+    for day in range(1, 4):
+        sandbox_db.store_market_data(bars.assign(timestamp=bars['timestamp'] + pd.Timedelta(days=day)), 'yahoo', 'AAPL', '1d')
+    assert len(list(file_path.parent.glob('*.parquet'))) == 4
+
+    assert sandbox_db.compact('market_data') == 1
+
+    assert list(file_path.parent.glob('*.parquet')) == [file_path]
+    assert len(pd.read_parquet(file_path)) == 4
+    assert pd.read_parquet(file_path)['timestamp'].is_monotonic_increasing
+
+
+def test_materialize_serves_queries_until_next_store(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01']), 'close': [1.0]})
+    sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+
+    assert sandbox_db.materialize('market_data') == 1
+    assert 'FROM market_hot' in sandbox_db._select_all('market_data')
+    assert sandbox_db.query_market_data(symbol='AAPL')['close'].tolist() == [1.0]
+
+    sandbox_db.store_market_data(bars.assign(timestamp=pd.Timestamp('2024-01-02'), close=2.0), 'yahoo', 'AAPL', '1d')
+
+    assert 'market_hot' not in sandbox_db.list_tables()
+    assert sandbox_db.query_market_data(symbol='AAPL')['close'].tolist() == [1.0, 2.0]
+
+
+def test_query_market_data_projects_columns(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01', '2024-01-02']), 'close': [1.0, 2.0]})
+    sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+
+    result = sandbox_db.query_market_data(symbol='AAPL', start_date='2024-01-02', columns=['close'])
+
+    assert result.columns.tolist() == ['close']
+    assert result['close'].tolist() == [2.0]
+
+
+def test_metadata_defaults_are_categorical_but_stored_as_strings(sandbox_db: SmartDatabaseManager):
+    import pandas as pd
+
+    bars = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01', '2024-01-02']), 'close': [1.0, 2.0]})
+
+    with_meta = sandbox_db._with_defaults(bars, source='yahoo', symbol='AAPL')
+    file_path = sandbox_db.store_market_data(bars, 'yahoo', 'AAPL', '1d')
+
+    assert isinstance(with_meta['symbol'].dtype, pd.CategoricalDtype)
+    assert with_meta['symbol'].tolist() == ['AAPL', 'AAPL']
+    schema = sandbox_db.query(f"DESCRIBE SELECT * FROM read_parquet('{file_path}')")
+    assert dict(zip(schema['column_name'], schema['column_type']))['symbol'] == 'VARCHAR'
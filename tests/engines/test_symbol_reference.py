@@ -0,0 +1,224 @@
+"""Tests for SymbolReferenceEngine matching (no network or database needed)."""
+from __future__ import annotations
+
+import io
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from engines.symbol_reference import SymbolReferenceEngine
+
+
+@pytest.fixture()
+def engine() -> SymbolReferenceEngine:
+    # Bypass __init__ so no SmartDatabaseManager or cache file is touched
+    engine = SymbolReferenceEngine.__new__(SymbolReferenceEngine)
+    engine.symbols_data = {
+        'stocks': {'AAPL': 'Apple Inc.', 'MSFT': 'Microsoft', 'AMD': 'AMD', 'CEO': 'Not a ticker'},
+        'cryptos': {'BTCUSDT': 'Bitcoin (USDT)', 'SOLUSDT': 'Solana (USDT)', 'SOL': 'Solana'},
+        'updated_at': None,
+    }
+    engine._all_symbols = None
+    return engine
+
+
+def test_match_text_to_symbols_uses_all_patterns(engine: SymbolReferenceEngine):
+    text = "Tesla rallies as $AMD and Microsoft (MSFT) gain; SOLUSDT up, CEO says AAPL next"
+
+    matches = engine.match_text_to_symbols(text)
+
+    assert sorted(matches) == ['AAPL', 'AMD', 'MSFT', 'SOLUSDT', 'TSLA']
+
+
+def test_match_text_to_symbols_finds_overlapping_names(engine: SymbolReferenceEngine):
+    matches = engine.match_text_to_symbols("teslapple and facebook")
+
+    assert sorted(matches) == ['AAPL', 'META', 'TSLA']
+
+
+def test_match_text_to_symbols_lowercase_text(engine: SymbolReferenceEngine):
+    matches = engine.match_text_to_symbols("apple and solusdt climbed, amd did not")
+
+    assert sorted(matches) == ['AAPL', 'SOLUSDT']
+
+
+def test_match_text_to_symbols_empty_text(engine: SymbolReferenceEngine):
+    assert engine.match_text_to_symbols('') == []
+
+
+def test_all_symbols_cached_until_lists_update(engine: SymbolReferenceEngine, monkeypatch):
+    first = engine.get_all_symbols()
+    assert engine.get_all_symbols() is first
+    assert engine.filter_valid_symbols(['aapl', 'XYZ', 'SOLUSDT']) == ['aapl', 'SOLUSDT']
+
+    monkeypatch.setattr(engine, 'get_symbols_from_database', lambda: {'stocks': ['NEW'], 'cryptos': []})
+    monkeypatch.setattr(engine, '_save_cache', lambda: None)
+    engine.update_symbol_lists(use_external=False)
+
+    assert engine.is_valid_symbol('new')
+    assert not engine.is_valid_symbol('AAPL')
+
+
+def test_cache_round_trip(engine: SymbolReferenceEngine, tmp_path):
+    engine.cache_file = tmp_path / 'symbol_reference.json'
+    engine.symbols_data['coingecko_etag'] = '"v1"'
+
+    engine._save_cache()
+    loaded = engine._load_cache()
+
+    assert engine.parquet_cache_file.exists()
+    assert not engine.cache_file.exists()
+    assert loaded['stocks'] == engine.symbols_data['stocks']
+    assert loaded['cryptos'] == engine.symbols_data['cryptos']
+    assert loaded['coingecko_etag'] == '"v1"'
+    assert loaded['updated_at']
+
+
+@pytest.mark.parametrize('mmap_min_bytes', [0, 1 << 30])
+def test_load_cache_falls_back_to_legacy_json(engine: SymbolReferenceEngine, tmp_path, monkeypatch, mmap_min_bytes):
+    monkeypatch.setattr('engines.symbol_reference.MMAP_MIN_BYTES', mmap_min_bytes)
+    engine.cache_file = tmp_path / 'symbol_reference.json'
+    engine.cache_file.write_text(json.dumps(engine.symbols_data))
+
+    loaded = engine._load_cache()
+
+    assert loaded == engine.symbols_data
+
+
+def test_parse_symbol_directory_skips_footer_and_keeps_na():
+    raw = (
+        b"ACT Symbol|Security Name|Exchange|CQS Symbol\n"
+        b"A|Agilent Technologies, Inc. Common Stock|N|A\n"
+        b"NA|Nano Labs Ltd|Q|NA\n"
+        b'AB|"Quoted" Holdings|N|AB\n'
+        b"File Creation Time: 0123202418:01|||\n"
+    )
+
+    stocks = SymbolReferenceEngine._parse_symbol_directory(io.BytesIO(raw))
+
+    assert stocks == {
+        'A': 'Agilent Technologies, Inc. Common Stock',
+        'NA': 'Nano Labs Ltd',
+        'AB': '"Quoted" Holdings',
+    }
+
+
+def test_update_symbol_lists_merges_external_sources(engine: SymbolReferenceEngine, monkeypatch):
+    monkeypatch.setattr(engine, 'get_symbols_from_database', lambda: {'stocks': ['AAPL'], 'cryptos': ['BTCUSDT']})
+    monkeypatch.setattr(engine, 'fetch_nasdaq_stocks', lambda: {'AAPL': 'Apple Inc.', 'ZZ': 'Nasdaq name'})
+    monkeypatch.setattr(engine, 'fetch_nyse_stocks', lambda: {'ZZ': 'NYSE name', 'IBM': 'IBM'})
+    monkeypatch.setattr(engine, 'fetch_coingecko_list', lambda: {'ETHUSDT': 'Ethereum (USDT)'})
+    monkeypatch.setattr(engine, '_save_cache', lambda: None)
+    monkeypatch.setattr('engines.symbol_reference.sleep', lambda seconds: None)
+
+    engine.update_symbol_lists()
+
+    assert engine.symbols_data['stocks'] == {'AAPL': 'Apple Inc.', 'ZZ': 'NYSE name', 'IBM': 'IBM'}
+    assert engine.symbols_data['cryptos'] == {'BTCUSDT': 'BTCUSDT', 'ETHUSDT': 'Ethereum (USDT)'}
+
+
+class _FakeResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+        self.content = json.dumps(payload).encode() if payload is not None else b''
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+def test_fetch_coingecko_list_uses_conditional_get(engine: SymbolReferenceEngine, monkeypatch):
+    sent_headers = []
+    responses = [
+        _FakeResponse(200, [{'symbol': 'eth', 'name': 'Ethereum'}], {'ETag': '"v1"', 'Last-Modified': 'Mon'}),
+        _FakeResponse(304),
+    ]
+
+    def fake_get(url, headers=None, timeout=None):
+        sent_headers.append(headers)
+        return responses.pop(0)
+
+    monkeypatch.setattr(engine, '_session', SimpleNamespace(get=fake_get), raising=False)
+
+    fetched = engine.fetch_coingecko_list()
+    engine.symbols_data['cryptos'] = fetched
+    unchanged = engine.fetch_coingecko_list()
+
+    assert fetched == {'ETH': 'Ethereum', 'ETHUSDT': 'Ethereum (USDT)', 'ETHUSD': 'Ethereum (USD)'}
+    assert unchanged == fetched
+    assert sent_headers[1] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon'}
+
+
+def test_failed_coingecko_fetch_drops_validators(engine: SymbolReferenceEngine, monkeypatch):
+    coins = [{'symbol': 'sol', 'name': 'Solana'}]
+    sent_headers = []
+
+    def fake_get(url, headers=None, timeout=None):
+        sent_headers.append(headers)
+        if len(sent_headers) == 2:
+            raise ConnectionError('CoinGecko down')
+        if headers.get('If-None-Match') == '"v1"':
+            return _FakeResponse(304)
+        return _FakeResponse(200, coins, {'ETag': '"v1"'})
+
+    monkeypatch.setattr(engine, '_session', SimpleNamespace(get=fake_get), raising=False)
+    monkeypatch.setattr(engine, 'get_symbols_from_database', lambda: {'stocks': [], 'cryptos': ['BTCUSDT']})
+    monkeypatch.setattr(engine, '_fetch_exchange_stocks', lambda: {})
+    monkeypatch.setattr(engine, '_save_cache', lambda: None)
+
+    engine.update_symbol_lists()  # 200 with an ETag
+    engine.update_symbol_lists()  # fetch fails: only database symbols are saved
+    assert 'coingecko_etag' not in engine.symbols_data
+    engine.update_symbol_lists()  # must download again instead of trusting a 304
+
+    assert sent_headers[2] == {}
+    assert {'SOL', 'SOLUSDT'} <= set(engine.symbols_data['cryptos'])
+
+
+def test_get_symbols_from_database_splits_cryptos(engine: SymbolReferenceEngine):
+    class _FakeSmartDB:
+        def query_market_data(self, columns=None):
+            return pd.DataFrame({'symbol': ['AAPL', 'BTCUSDT', 'AAPL', 'ETHBTC', 'MSFT', 'BTCUSDT']})
+
+    engine.smart_db = _FakeSmartDB()
+
+    assert engine.get_symbols_from_database() == {'stocks': ['AAPL', 'MSFT'], 'cryptos': ['BTCUSDT', 'ETHBTC']}
+
+
+def test_get_symbol_info_looks_up_both_lists(engine: SymbolReferenceEngine):
+    assert engine.get_symbol_info('aapl') == {'symbol': 'AAPL', 'name': 'Apple Inc.', 'type': 'stock'}
+    assert engine.get_symbol_info('sol') == {'symbol': 'SOL', 'name': 'Solana', 'type': 'crypto'}
+    assert engine.get_symbol_info('XYZ') is None
+
+
+def test_match_texts_to_symbols_matches_single_text_results(engine: SymbolReferenceEngine):
+    texts = [
+        "Tesla rallies as $AMD and Microsoft (MSFT) gain; SOLUSDT up, CEO says AAPL next",
+        "",
+        None,
+        "straße news: apple and solusdt climbed",
+        "AMD",
+    ]
+
+    batch = engine.match_texts_to_symbols(texts)
+
+    assert [sorted(found) for found in batch] == [
+        sorted(engine.match_text_to_symbols(text)) for text in texts
+    ]
+    assert sorted(batch[3]) == ['AAPL', 'SOLUSDT']
+    assert batch[4] == ['AMD']
+
+
+def test_create_session_retries_rate_limits(engine: SymbolReferenceEngine):
+    session = engine._create_session()
+
+    retries = session.get_adapter('https://api.coingecko.com').max_retries
+    assert retries.total == 3
+    assert 429 in retries.status_forcelist
+    assert retries.respect_retry_after_header
@@ -0,0 +1,208 @@
+"""Tests for NewsMarketAnalyzer transforms (no database, connectors or FinBERT)."""
+from __future__ import annotations
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture()
+def impact_module(tmp_path, monkeypatch):
+    # The module opens news_market_analysis.log in the cwd on first import
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module('scripts.analysis.analyze_news_market_impact')
+
+
+@pytest.fixture()
+def analyzer(impact_module):
+    # Bypass __init__ so SmartDB, connectors and FinBERT are never created
+    analyzer = impact_module.NewsMarketAnalyzer.__new__(impact_module.NewsMarketAnalyzer)
+    analyzer.lookback_hours = [1, 4, 24, 200]
+    return analyzer
+
+
+def test_calculate_price_changes_uses_first_bar_at_or_after_targets(analyzer):
+    # Hourly bars, shuffled and tz-aware, with a gap between 02:00 and 06:00
+    timestamps = pd.to_datetime(
+        ['2024-01-01 00:00', '2024-01-01 01:00', '2024-01-01 02:00',
+         '2024-01-01 06:00', '2024-01-02 00:30', '2024-01-12 00:00'], utc=True)
+    market = pd.DataFrame({
+        'timestamp': timestamps,
+        'close': [100.0, 110.0, 120.0, 150.0, 200.0, 300.0],
+    }).iloc[[3, 0, 5, 1, 4, 2]]
+    arrays = analyzer.prepare_price_arrays({'AAA': market})
+
+    changes = analyzer.calculate_price_changes(arrays, pd.Timestamp('2024-01-01 00:30'), 'AAA')
+
+    # base = 01:00 (110); 1h -> 02:00, 4h -> 06:00, 24h -> next day 00:30;
+    # 200h is beyond the 7 day window
+    assert changes == pytest.approx({
+        'change_1h': (120 - 110) / 110 * 100,
+        'change_4h': (150 - 110) / 110 * 100,
+        'change_24h': (200 - 110) / 110 * 100,
+    })
+
+
+def test_calculate_price_changes_without_bars_in_window(analyzer):
+    market = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-01', '2024-02-01']),
+        'close': [1.0, 2.0],
+    })
+    arrays = analyzer.prepare_price_arrays({'AAA': market})
+
+    assert analyzer.calculate_price_changes(arrays, pd.Timestamp('2024-01-10', tz='UTC'), 'AAA') == {}
+    assert analyzer.calculate_price_changes(arrays, pd.Timestamp('2024-01-10'), 'BBB') == {}
+    assert isinstance(arrays['AAA'][0], np.ndarray)
+
+
+def test_extract_symbols_from_news_matches_each_article(analyzer):
+    class _FakeSymbolRef:
+        def __init__(self):
+            self.batches = []
+
+        def match_texts_to_symbols(self, texts):
+            self.batches.append(texts)
+            return [['AAPL'] if 'Apple' in text else [] for text in texts]
+
+    analyzer.symbol_ref = _FakeSymbolRef()
+    news = pd.DataFrame({
+        'title': ['Apple jumps', None, 'Quiet day'],
+        'description': ['desc', 'Apple again', None],
+    })
+
+    result = analyzer.extract_symbols_from_news(news)
+
+    assert result['mentioned_symbols'].tolist() == [['AAPL'], ['AAPL'], []]
+    assert analyzer.symbol_ref.batches == [['Apple jumps desc ', ' Apple again ', 'Quiet day  ']]
+
+
+def test_analyze_news_impact_scores_all_pairs_in_one_batch(analyzer):
+    calls = []
+
+    class _FakeFinBERT:
+        def analyze_per_symbol_batch(self, pairs, batch_size=16):
+            calls.append(pairs)
+            return [
+                {'sentiment': 'positive', 'confidence': 0.9,
+                 'scores': {'positive': 0.9, 'negative': 0.05, 'neutral': 0.05},
+                 'matched_sentence': 'Apple beats'} if symbol == 'AAPL' else None
+                for _, symbol in pairs
+            ]
+
+    analyzer.finbert = _FakeFinBERT()
+    analyzer.lookback_hours = [1]
+    hours = pd.date_range('2024-01-01', periods=4, freq='h')
+    market = {
+        'AAPL': pd.DataFrame({'timestamp': hours, 'close': [100.0, 110.0, 120.0, 130.0]}),
+        'MSFT': pd.DataFrame({'timestamp': hours, 'close': [10.0, 10.0, 12.0, 12.0]}),
+    }
+    news = pd.DataFrame({
+        'timestamp': [hours[0], hours[1], hours[2]],
+        'source': ['feed', 'feed', 'feed'],
+        'title': ['Apple beats', 'Nothing', 'Microsoft'],
+        'description': ['', '', ''],
+        'link': ['l1', 'l2', 'l3'],
+        'mentioned_symbols': [['AAPL', 'MSFT'], [], ['MSFT']],
+        'sentiment': ['neutral', 'neutral', 'negative'],
+        'confidence': [0.5, 0.5, 0.7],
+        'positive_score': [0.2, 0.2, 0.1],
+        'negative_score': [0.2, 0.2, 0.7],
+        'neutral_score': [0.6, 0.6, 0.2],
+    })
+
+    impact = analyzer.analyze_news_impact(news, market)
+
+    assert len(calls) == 1
+    assert [symbol for _, symbol in calls[0]] == ['AAPL', 'MSFT', 'MSFT']
+    assert list(zip(impact['symbol'], impact['sentiment'], impact['is_symbol_specific'])) == [
+        ('AAPL', 'positive', True), ('MSFT', 'neutral', False), ('MSFT', 'negative', False),
+    ]
+    assert impact['change_1h'].tolist() == pytest.approx([10.0, 0.0, 0.0])
+
+
+def _impact_frame():
+    return pd.DataFrame({
+        'source': ['a'] * 6 + ['b'] * 6,
+        'symbol': ['AAA', 'BBB'] * 6,
+        'sentiment': ['positive', 'negative', 'neutral', 'positive', 'negative', 'unknown'] * 2,
+        'confidence': [0.9, 0.8, 0.7, 0.6, 0.5, 0.4] * 2,
+        'change_1h': [1.0, -2.0, 0.5, -1.0, -3.0, 2.0, 2.0, 1.0, -0.5, 3.0, -1.0, np.nan],
+    })
+
+
+def test_generate_source_accuracy_report_counts_direction_hits(analyzer):
+    analyzer.lookback_hours = [1]
+    impact = _impact_frame()
+
+    report = analyzer.generate_source_accuracy_report(impact)
+
+    assert report['source'].tolist() == ['a', 'b']
+    assert report['sample_size'].tolist() == [6, 5]
+    # a: positive up, negative down, negative down -> 3/6; b: positive up x2, negative down -> 3/5
+    assert report['accuracy'].tolist() == pytest.approx([50.0, 60.0])
+    assert 'predicted_direction' not in impact.columns
+
+
+def test_generate_sentiment_effectiveness_report_by_sentiment(analyzer):
+    analyzer.lookback_hours = [1]
+
+    impact = pd.concat([_impact_frame()] * 2, ignore_index=True)
+
+    report = analyzer.generate_sentiment_effectiveness_report(impact)
+
+    # neutral has only 4 valid rows, below the 5 row minimum
+    assert report['sentiment'].tolist() == ['positive', 'negative']
+    assert report['sample_size'].tolist() == [8, 8]
+    assert report['accuracy'].tolist() == pytest.approx([75.0, 75.0])
+
+
+def test_generate_symbol_sensitivity_report_filters_outliers_per_symbol(analyzer):
+    analyzer.lookback_hours = [1, 4]
+    moves = [1.0, -1.0] * 11 + [50.0, 5000.0]  # 24 rows: one 99th pct outlier, one extreme
+    impact = pd.DataFrame({
+        'symbol': ['AAA'] * 24 + ['BBB'] * 3,
+        'sentiment': ['positive'] * 24 + ['negative'] * 3,
+        'change_1h': moves + [1.0, 2.0, 3.0],
+    })
+
+    report = analyzer.generate_symbol_sensitivity_report(impact)
+
+    # change_4h is missing and BBB has fewer than 5 mentions
+    assert report[['symbol', 'timeframe', 'news_mentions']].values.tolist() == [['AAA', '1h', 22]]
+    assert report['max_move'].iloc[0] == 1.0
+    assert report['positive_avg_move'].iloc[0] == pytest.approx(0.0)
+    assert np.isnan(report['negative_avg_move'].iloc[0])
+
+
+def test_cached_stage_reuses_parquet_until_key_changes(analyzer, tmp_path):
+    analyzer.cache_dir = tmp_path / 'cache'
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return pd.DataFrame({'id': ['n1'], 'mentioned_symbols': [['AAPL', 'MSFT']]})
+
+    first = analyzer._cached_stage('news_with_symbols', (1, '2024-01-01'), compute)
+    again = analyzer._cached_stage('news_with_symbols', (1, '2024-01-01'), compute)
+    changed = analyzer._cached_stage('news_with_symbols', (2, '2024-01-01'), compute)
+
+    assert len(calls) == 2
+    assert list(again['mentioned_symbols'].iloc[0]) == ['AAPL', 'MSFT']
+    assert first['id'].tolist() == again['id'].tolist() == changed['id'].tolist()
+    assert len(list(analyzer.cache_dir.glob('news_with_symbols_*.parquet'))) == 2
+
+
+def test_reports_leave_impact_frame_untouched(analyzer):
+    analyzer.lookback_hours = [1]
+    impact = pd.concat([_impact_frame()] * 2, ignore_index=True)
+    before = impact.copy()
+
+    analyzer.generate_source_accuracy_report(impact)
+    analyzer.generate_symbol_sensitivity_report(impact)
+    analyzer.generate_sentiment_effectiveness_report(impact)
+    insights = analyzer._generate_insights(pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), impact)
+
+    pd.testing.assert_frame_equal(impact, before)
+    assert insights == [f"**Average Price Move (1h):** {impact['change_1h'].abs().mean():.2f}% after news announcement"]
@@ -0,0 +1,20 @@
+from scripts.maintenance.migrate_hive_layout import migrate
+
+
+def test_migrate_moves_slash_symbols_into_one_encoded_partition(tmp_path):
+    legacy = {
+        "market/yahoo/AAPL/1d.parquet": "market/source=yahoo/symbol=AAPL/interval=1d/data.parquet",
+        "market/ccxt/BTC/USDT/1h.parquet": "market/source=ccxt/symbol=BTC%2FUSDT/interval=1h/data.parquet",
+        "news/feed/2024/01.parquet": "news/src=feed/year=2024/month=1/data.parquet",
+    }
+    for name in legacy:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(name)
+
+    assert migrate(tmp_path) == 3
+
+    for name, target in legacy.items():
+        assert not (tmp_path / name).exists()
+        assert (tmp_path / target).read_text() == name
+    # Already migrated files are left alone on a second run
+    assert migrate(tmp_path) == 0
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pandas as pd
+
+from engines.smart_db import SmartDatabaseManager
+from scripts.maintenance.smart_news_partitioner import SmartNewsPartitioner
+
+
+def test_partitioner_writes_the_smart_db_news_layout(tmp_path, monkeypatch):
+    config_path = Path(__file__).resolve().parents[2] / "config" / "database.json"
+    monkeypatch.chdir(tmp_path)
+    df = pd.DataFrame({
+        'timestamp': ['2024-01-05T10:00:00Z', '2024-02-01T08:00:00Z'],
+        'link': ['l1', 'l2'],
+        'title': ['jan', 'feb'],
+    })
+
+    saved = SmartNewsPartitioner().store_news_data(df, "Investor's Business Daily")
+
+    assert saved['2024-01'] == Path("data/news/src=Investor%27s Business Daily/year=2024/month=1/data.parquet")
+    manager = SmartDatabaseManager(config_path=str(config_path), db_path=str(tmp_path / "smart_db.duckdb"))
+    try:
+        queried = manager.query_news_data(source="Investor's Business Daily")
+    finally:
+        manager.close()
+    assert queried['title'].tolist() == ['feb', 'jan']